@@ -0,0 +1,172 @@
+"""AI 모델 단계 승인 제어 - 동시 실행 수 제한, 클라이언트별 공정 대기열, 초과 시 즉시 거절
+
+한도는 프로세스(gunicorn 워커)별이므로 전체 동시 실행 수는 워커 수 × ADMISSION_LIMIT입니다.
+대기열은 클라이언트마다 따로 두고 돌아가며 자리를 배정하므로 한 클라이언트가 몰아서 보낸 요청이
+다른 클라이언트를 밀어내지 못하며, 클라이언트당 동시 실행은 ADMISSION_PER_CLIENT개까지입니다.
+"""
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import deadline
+import metrics
+
+
+ADMISSION_LIMIT = int(os.getenv('ADMISSION_LIMIT', '4'))
+ADMISSION_QUEUE_MAX = int(os.getenv('ADMISSION_QUEUE_MAX', '8'))
+ADMISSION_PER_CLIENT = int(os.getenv('ADMISSION_PER_CLIENT', '2'))
+# 대화형 요청이 자리를 기다리는 최대 시간
+ADMISSION_QUEUE_SECONDS = float(os.getenv('ADMISSION_QUEUE_SECONDS', '5'))
+# 초과 시 동작: fallback(대체 분석으로 응답) / reject(429 + Retry-After)
+ADMISSION_OVERFLOW = os.getenv('ADMISSION_OVERFLOW', 'fallback')
+# X-Forwarded-For의 첫 주소를 클라이언트로 볼지 (리버스 프록시 뒤에서만 사용)
+TRUST_FORWARDED = os.getenv('ADMISSION_TRUST_FORWARDED', '0') == '1'
+
+_client = contextvars.ContextVar('admission_client', default='')
+
+
+def set_client(client_id):
+    """현재 컨텍스트(요청)의 클라이언트 식별자 설정"""
+    _client.set(client_id or '')
+
+
+def client_id(remote_addr, forwarded_for=None):
+    if TRUST_FORWARDED and forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr or ''
+
+
+class Overloaded(Exception):
+    """허용 대기 시간 안에 실행 자리를 얻지 못함"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"요청이 많아 처리할 수 없습니다 ({reason}, {retry_after}초 뒤 재시도)")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('client', 'granted', 'event')
+
+    def __init__(self, client):
+        self.client = client
+        self.granted = False
+        self.event = threading.Event()
+
+
+class AdmissionController:
+    """동시 실행 limit개, 대기 queue_max개, 클라이언트당 동시 실행 per_client개"""
+
+    def __init__(self, name, limit=ADMISSION_LIMIT, queue_max=ADMISSION_QUEUE_MAX, per_client=ADMISSION_PER_CLIENT):
+        self.name = name
+        self.limit = limit
+        self.queue_max = queue_max
+        self.per_client = per_client
+        self._running = 0
+        self._running_by_client = {}
+        # 클라이언트 → 대기자 목록 (앞쪽 클라이언트부터 돌아가며 배정)
+        self._queues = OrderedDict()
+        self._waiting = 0
+        # 자리 점유 시간의 지수 이동 평균 (Retry-After 추정용)
+        self._hold_avg = 30.0
+        self._lock = threading.Lock()
+        metrics.ADMISSION_LIMIT.set(limit, pool=name)
+
+    def _can_run(self, client):
+        return self._running < self.limit and self._running_by_client.get(client, 0) < self.per_client
+
+    def _grant(self, client):
+        self._running += 1
+        self._running_by_client[client] = self._running_by_client.get(client, 0) + 1
+
+    def _dispatch(self):
+        """빈 자리를 대기 중인 클라이언트에게 돌아가며 배정"""
+        while self._running < self.limit and self._queues:
+            for client in list(self._queues):
+                if self._running_by_client.get(client, 0) < self.per_client:
+                    break
+            else:
+                return
+            queue = self._queues.pop(client)
+            waiter = queue.popleft()
+            if queue:
+                # 남은 대기자는 맨 뒤로 (라운드 로빈)
+                self._queues[client] = queue
+            self._waiting -= 1
+            waiter.granted = True
+            self._grant(client)
+            waiter.event.set()
+
+    def _retry_after(self):
+        return max(math.ceil(self._hold_avg * (self._waiting + 1) / self.limit), 1)
+
+    def _publish(self):
+        metrics.ADMISSION_IN_USE.set(self._running, pool=self.name)
+        metrics.ADMISSION_QUEUE_DEPTH.set(self._waiting, pool=self.name)
+
+    def acquire(self, client, timeout):
+        """자리를 얻을 때까지 최대 timeout초 대기, 실패하면 Overloaded"""
+        started = time.perf_counter()
+        with self._lock:
+            # 대기자는 모두 한도(전체 또는 클라이언트별) 때문에 기다리는 중이므로, 바로 실행할 수 있으면 먼저 실행
+            if client not in self._queues and self._can_run(client):
+                self._grant(client)
+                self._publish()
+                metrics.ADMISSION_WAIT.observe(0, pool=self.name)
+                return
+            if self._waiting >= self.queue_max or timeout <= 0:
+                metrics.ADMISSION_REJECTED.inc(pool=self.name, reason='queue_full')
+                raise Overloaded('queue_full', self._retry_after())
+            waiter = _Waiter(client)
+            self._queues.setdefault(client, deque()).append(waiter)
+            self._waiting += 1
+            self._publish()
+
+        waiter.event.wait(timeout)
+        with self._lock:
+            if not waiter.granted:
+                queue = self._queues.get(client)
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[client]
+                self._waiting -= 1
+                self._publish()
+                metrics.ADMISSION_REJECTED.inc(pool=self.name, reason='timeout')
+                raise Overloaded('timeout', self._retry_after())
+            self._publish()
+        metrics.ADMISSION_WAIT.observe(time.perf_counter() - started, pool=self.name)
+
+    def release(self, client, held):
+        with self._lock:
+            self._running -= 1
+            remaining = self._running_by_client.get(client, 1) - 1
+            if remaining:
+                self._running_by_client[client] = remaining
+            else:
+                self._running_by_client.pop(client, None)
+            self._hold_avg = 0.8 * self._hold_avg + 0.2 * held
+            self._dispatch()
+            self._publish()
+
+    @contextmanager
+    def slot(self, timeout=ADMISSION_QUEUE_SECONDS):
+        """현재 요청의 클라이언트로 자리를 얻어 블록 실행 (대기 시간은 요청 마감으로도 제한)"""
+        client = _client.get()
+        self.acquire(client, deadline.cap(timeout))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(client, time.perf_counter() - started)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit, "running": self._running, "waiting": self._waiting,
+                "queue_max": self.queue_max, "per_client": self.per_client,
+                "clients_waiting": len(self._queues), "hold_avg_s": round(self._hold_avg, 1)
+            }
@@ -1,24 +1,182 @@
-from flask import Flask, render_template, request, jsonify
-import requests
+from flask import Flask, Response, abort, g, render_template, request, jsonify, send_file, stream_with_context
+import hashlib
 import json
+import logging
 import os
+import queue
+import threading
 from datetime import datetime
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
 from dotenv import load_dotenv
 
+import admission
+import deadline
+import geocoding
+import http_cache
+import http_client
+import image_proxy
+import inference
+import metrics
+from cache_store import SQLiteCache
+from jobs import JobManager, JobQueueFull, JobStoreError
+from model_warmup import ModelCold, ModelWarmup
+from rate_limit import RateLimited
+from prompt_builder import ANALYSIS_TIERS, PROMPT_TEMPLATE_VERSION, build_prompt
+from section_parser import SECTION_KEYS, SectionStreamParser, parse_sections
+from snapshot import Snapshot
+from spatial_index import SpatialIndex, admin_level, find_reusable
+from logging_setup import setup_logging
+from pipeline import StagePipeline
+
 load_dotenv()
+setup_logging()
 
 app = Flask(__name__)
+logger = logging.getLogger(__name__)
+# 요청별 스팬 요약 (JSON 한 줄)
+access_logger = logging.getLogger('access')
 
 # API 키 설정
 HF_API_KEY = os.getenv('HF_API_KEY')
 
 if not HF_API_KEY:
-    print("⚠️ 경고: HF_API_KEY가 .env 파일에 설정되지 않았습니다!")
+    logger.warning("⚠️ 경고: HF_API_KEY가 .env 파일에 설정되지 않았습니다!")
 
 # Hugging Face API 설정 (더 강력한 모델)
-HF_API_URL = "https://api-inference.huggingface.co/models/mistralai/Mixtral-8x7B-Instruct-v0.1"
+HF_API_URL = os.getenv('HF_API_URL', "https://api-inference.huggingface.co/models/mistralai/Mixtral-8x7B-Instruct-v0.1")
 HF_HEADERS = {"Authorization": f"Bearer {HF_API_KEY}"}
+# 토큰 스트리밍 사용 여부 (완성된 섹션부터 전달, 5개 섹션이 끝나면 생성 조기 종료)
+# 추론 배칭(INFERENCE_BATCH_WINDOW_MS)이 켜져 있으면 섹션을 바로 전달하는 스트리밍 라우트에만 적용
+HF_STREAMING = os.getenv('HF_STREAMING', '1') == '1'
+
+# 모델 콜드 스타트: 예상 대기 시간이 이 값(초)을 넘으면 기다리지 않고 바로 대체 분석 사용
+# 백그라운드 작업은 응답을 기다리는 사용자가 없으므로 더 오래 기다림
+MODEL_MAX_WAIT = float(os.getenv('MODEL_MAX_WAIT', '10'))
+MODEL_MAX_WAIT_JOB = float(os.getenv('MODEL_MAX_WAIT_JOB', '180'))
+model_warmup = ModelWarmup('huggingface', HF_API_URL, HF_HEADERS)
+# 모델 호출 동시 실행 제한 (캐시 적중 · 인근 분석 재사용은 제한 없이 바로 응답)
+model_admission = admission.AdmissionController('model')
+if inference.INFERENCE_BACKEND == 'stub':
+    inference_backend = inference.StubBackend()
+else:
+    inference_backend = inference.HTTPBackend(HF_API_URL, HF_HEADERS, model_warmup)
+    if HF_API_KEY and os.getenv('MODEL_WARMUP', '1') == '1':
+        model_warmup.start()
+# 동시에 들어온 분석 요청을 한 번의 추론 요청으로 묶음 (토큰 스트리밍으로 섹션을 바로 전달하는 요청 제외)
+# 배치를 기다리는 요청도 승인 자리를 차지하므로 배치 크기는 승인 한도를 넘지 않음
+model_batcher = inference.MicroBatcher(inference_backend, inference.batch_max_size(model_admission.limit))
+
+# 날씨 캐시: 좌표를 격자(도 단위)로 양자화, Open-Meteo 현재값 갱신 주기(15분)만큼 유지
+WEATHER_GRID_DEG = float(os.getenv('WEATHER_GRID_DEG', '0.01'))
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '900'))
+weather_cache = SQLiteCache('weather', ttl=WEATHER_CACHE_TTL)
+# 다중 지점 요청 한 번에 묶을 최대 좌표 수 (URL 길이 제한)
+WEATHER_BATCH_MAX = int(os.getenv('WEATHER_BATCH_MAX', '100'))
+
+# 위키피디아 캐시: (언어, 제목) 단위, 만료 후에는 ETag로 재검증, 용량 초과 시 LRU 제거
+WIKI_CACHE_TTL = int(os.getenv('WIKI_CACHE_TTL', '86400'))
+WIKI_CACHE_MAX_BYTES = int(os.getenv('WIKI_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+wiki_cache = SQLiteCache('wikipedia', ttl=WIKI_CACHE_TTL, max_bytes=WIKI_CACHE_MAX_BYTES, revalidate=True)
+
+# AI 분석 캐시: (지역, 언어, 분석 단계, 프롬프트 버전, 날씨 구간) 단위, 지역 태그로 수동 무효화
+# 프롬프트 내용이나 섹션 파싱 방식이 바뀌면 prompt_builder.PROMPT_TEMPLATE_VERSION으로 기존 결과를 무효화합니다
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', str(7 * 86400)))
+AI_CACHE_MAX_BYTES = int(os.getenv('AI_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+ai_cache = SQLiteCache('analysis', ttl=AI_CACHE_TTL, max_bytes=AI_CACHE_MAX_BYTES)
+# 완료된 AI 분석의 위치 색인: 같은 행정 단위의 가까운 지점을 클릭하면 기존 분석 재사용 (날씨는 새로 조회)
+analysis_index = SpatialIndex()
+
+# 사전 생성 스냅샷 (python prewarm.py로 생성): 캐시에 없는 인기 지역의 위키피디아 · 이미지 · AI 분석
+# 파일을 메모리 매핑하므로 시작 시간이 크기와 무관하고 워커 간 메모리를 공유함
+snapshot = Snapshot()
+
+# 썸네일 이미지 프록시 (IMAGE_PROXY=1이면 갤러리 썸네일을 /img/<hash>로 디스크 캐시해 제공)
+images_proxy = image_proxy.ImageProxy()
+
+# Nominatim 지오코딩 프록시 (브라우저 대신 서버에서 캐시 · 속도 제한)
+geocoder = geocoding.Geocoder()
+
+# 스트리밍 응답 유휴 시 keep-alive 주석 전송 간격 (프록시 연결 끊김 방지)
+SSE_KEEPALIVE_SECONDS = 15
+
+# 작업 구독(SSE) 시 상태 확인 간격
+JOB_POLL_SECONDS = 0.5
+
+# 분석 섹션 (응답 키 순서 = 프롬프트 섹션 번호 순서)
+ANALYSIS_SECTION_KEYS = SECTION_KEYS
+
+# fields=로 고를 수 있는 지역 정보 (= 파이프라인 단계)와 각각의 응답 키, 실행에 필요한 단계
+REGION_FIELDS = {
+    'weather': ('current_weather',),
+    'wiki': ('wiki_summary',),
+    'images': ('images', 'compact', 'has_images', 'image_count'),
+    'analysis': ('information', 'tier', 'nearby'),
+}
+REGION_FIELD_DEPENDENCIES = {'analysis': ('weather', 'wiki')}
+# 필드를 골라 요청했을 때 공통으로 포함하는 키
+REGION_COMMON_KEYS = ('region', 'coordinates', 'language', 'fields', 'generated_at', 'timings', 'partial')
+# 필드별 브라우저 · 프록시 캐시 시간(초), 여러 필드를 함께 요청하면 가장 짧은 값
+# 날씨는 Open-Meteo 갱신 주기보다 짧게, 분석은 날씨 구간이 바뀔 수 있으므로 한 시간
+REGION_FIELD_MAX_AGE = {'weather': 300, 'wiki': 86400, 'images': 86400, 'analysis': 3600}
+
+# 일괄 분석: 요청당 최대 지역 수, 위키피디아·이미지 조회 동시 실행 수, AI 분석 동시 실행 수
+BATCH_MAX_REGIONS = int(os.getenv('BATCH_MAX_REGIONS', '50'))
+BATCH_FETCH_WORKERS = int(os.getenv('BATCH_FETCH_WORKERS', '8'))
+BATCH_AI_CONCURRENCY = int(os.getenv('BATCH_AI_CONCURRENCY', '2'))
+
+# 캐시 무효화 등 관리용 API 토큰 (미설정 시 관리 API 비활성화)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+
+def summarize_spans(spans):
+    """스팬을 (종류, 이름)별 합계로 요약 - 느린 요청이 어느 업스트림/단계 때문인지 확인용"""
+    totals = {}
+    for span in spans:
+        name = f"{span['kind']}:{span['name']}"
+        totals[name] = round(totals.get(name, 0) + span['ms'], 1)
+    return totals
+
+
+@app.before_request
+def start_request_trace():
+    """요청별 스팬 기록 시작, 처리 중 요청 수 증가"""
+    g.request_started = time.perf_counter()
+    g.endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.spans = metrics.start_trace()
+    # 스레드가 재사용되므로 이전 요청의 마감 시각을 지움 (필요한 라우트에서 다시 설정)
+    deadline.clear()
+    admission.set_client(admission.client_id(request.remote_addr, request.headers.get('X-Forwarded-For')))
+    metrics.REQUESTS_IN_FLIGHT.inc(endpoint=g.endpoint)
+
+
+@app.after_request
+def remember_status(response):
+    g.status = response.status_code
+    return response
+
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    """요청 처리 시간 기록, 스팬 요약을 JSON 한 줄로 로그 (스트리밍 응답은 전송이 끝난 뒤)"""
+    if 'request_started' not in g:
+        return
+    duration = time.perf_counter() - g.request_started
+    status = g.get('status', 500)
+    metrics.REQUESTS_IN_FLIGHT.dec(endpoint=g.endpoint)
+    metrics.REQUEST_DURATION.observe(duration, endpoint=g.endpoint, status=status)
+    if g.endpoint == '/metrics':
+        return
+    # 백그라운드 스레드가 계속 추가할 수 있으므로 복사본 사용
+    spans = list(g.spans)
+    access_logger.info(json.dumps({
+        "method": request.method,
+        "path": request.path,
+        "status": status,
+        "ms": round(duration * 1000, 1),
+        "totals": summarize_spans(spans),
+        "spans": spans
+    }, ensure_ascii=False))
 
 
 @app.route('/')
@@ -26,50 +184,121 @@ def index():
     return render_template('index.html')
 
 
+def weather_bucket(lat, lng):
+    """좌표를 격자 칸으로 양자화 (캐시 키, 칸 중심 좌표)"""
+    row = round(lat / WEATHER_GRID_DEG)
+    col = round(lng / WEATHER_GRID_DEG)
+    key = f"{WEATHER_GRID_DEG}:{row}:{col}"
+    return key, round(row * WEATHER_GRID_DEG, 6), round(col * WEATHER_GRID_DEG, 6)
+
+
+OPEN_METEO_URL = os.getenv('OPEN_METEO_URL', "https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_CURRENT = "temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation,apparent_temperature,pressure_msl,weather_code,cloud_cover,wind_direction_10m"
+OPEN_METEO_DAILY = "temperature_2m_max,temperature_2m_min,precipitation_sum,sunrise,sunset"
+
+
+def parse_weather(data):
+    """Open-Meteo 지점 응답을 날씨 dict로 변환"""
+    current = data.get('current', {})
+    daily = data.get('daily', {})
+    
+    weather_code = current.get('weather_code', 0)
+    weather_desc = get_weather_description(weather_code)
+    
+    return {
+        "temperature": round(current.get('temperature_2m', 0), 1),
+        "humidity": round(current.get('relative_humidity_2m', 0)),
+        "wind_speed": round(current.get('wind_speed_10m', 0), 1),
+        "wind_direction": current.get('wind_direction_10m', 0),
+        "precipitation": round(current.get('precipitation', 0), 1),
+        "apparent_temperature": round(current.get('apparent_temperature', 0), 1),
+        "pressure": round(current.get('pressure_msl', 0)),
+        "cloud_cover": current.get('cloud_cover', 0),
+        "weather_description": weather_desc,
+        "temp_max": round(daily.get('temperature_2m_max', [0])[0], 1) if daily.get('temperature_2m_max') else 0,
+        "temp_min": round(daily.get('temperature_2m_min', [0])[0], 1) if daily.get('temperature_2m_min') else 0,
+        "sunrise": daily.get('sunrise', [''])[0] if daily.get('sunrise') else '',
+        "sunset": daily.get('sunset', [''])[0] if daily.get('sunset') else ''
+    }
+
+
+def fallback_weather():
+    """날씨 조회 실패 시 기본값 (캐시하지 않음)"""
+    return {
+        "temperature": 0, "humidity": 0, "wind_speed": 0,
+        "precipitation": 0, "apparent_temperature": 0, "pressure": 0,
+        "weather_description": "알 수 없음", "temp_max": 0, "temp_min": 0
+    }
+
+
 def get_weather_data(lat, lng):
-    """실시간 날씨 데이터 수집"""
+    """실시간 날씨 데이터 수집 (격자 단위 캐시)"""
+    key, bucket_lat, bucket_lng = weather_bucket(lat, lng)
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return cached
+    
     try:
-        url = "https://api.open-meteo.com/v1/forecast"
         params = {
-            "latitude": lat,
-            "longitude": lng,
-            "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation,apparent_temperature,pressure_msl,weather_code,cloud_cover,wind_direction_10m",
-            "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,sunrise,sunset",
+            "latitude": bucket_lat,
+            "longitude": bucket_lng,
+            "current": OPEN_METEO_CURRENT,
+            "daily": OPEN_METEO_DAILY,
             "timezone": "auto"
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get('open_meteo', OPEN_METEO_URL, params=params)
         response.raise_for_status()
-        data = response.json()
-        
-        current = data.get('current', {})
-        daily = data.get('daily', {})
-        
-        weather_code = current.get('weather_code', 0)
-        weather_desc = get_weather_description(weather_code)
         
-        return {
-            "temperature": round(current.get('temperature_2m', 0), 1),
-            "humidity": round(current.get('relative_humidity_2m', 0)),
-            "wind_speed": round(current.get('wind_speed_10m', 0), 1),
-            "wind_direction": current.get('wind_direction_10m', 0),
-            "precipitation": round(current.get('precipitation', 0), 1),
-            "apparent_temperature": round(current.get('apparent_temperature', 0), 1),
-            "pressure": round(current.get('pressure_msl', 0)),
-            "cloud_cover": current.get('cloud_cover', 0),
-            "weather_description": weather_desc,
-            "temp_max": round(daily.get('temperature_2m_max', [0])[0], 1) if daily.get('temperature_2m_max') else 0,
-            "temp_min": round(daily.get('temperature_2m_min', [0])[0], 1) if daily.get('temperature_2m_min') else 0,
-            "sunrise": daily.get('sunrise', [''])[0] if daily.get('sunrise') else '',
-            "sunset": daily.get('sunset', [''])[0] if daily.get('sunset') else ''
-        }
+        weather = parse_weather(response.json())
+        weather_cache.set(key, weather)
+        return weather
     except Exception as e:
-        print(f"❌ 날씨 데이터 오류: {e}")
-        return {
-            "temperature": 0, "humidity": 0, "wind_speed": 0,
-            "precipitation": 0, "apparent_temperature": 0, "pressure": 0,
-            "weather_description": "알 수 없음", "temp_max": 0, "temp_min": 0
-        }
+        logger.error(f"❌ 날씨 데이터 오류: {e}")
+        return fallback_weather()
+
+
+def get_weather_batch(points):
+    """여러 좌표의 날씨를 한 번에 수집 - 캐시에 없는 격자 칸만 모아 Open-Meteo 다중 지점 요청
+
+    points: [(lat, lng), ...], 반환 순서는 입력 순서와 같음
+    """
+    buckets = [weather_bucket(lat, lng) for lat, lng in points]
+    found = {}
+    missing = {}
+    for key, bucket_lat, bucket_lng in buckets:
+        if key in found or key in missing:
+            continue
+        cached = weather_cache.get(key)
+        if cached is not None:
+            found[key] = cached
+        else:
+            missing[key] = (bucket_lat, bucket_lng)
+    
+    keys = list(missing)
+    for start in range(0, len(keys), WEATHER_BATCH_MAX):
+        chunk = keys[start:start + WEATHER_BATCH_MAX]
+        try:
+            params = {
+                "latitude": ",".join(str(missing[key][0]) for key in chunk),
+                "longitude": ",".join(str(missing[key][1]) for key in chunk),
+                "current": OPEN_METEO_CURRENT,
+                "daily": OPEN_METEO_DAILY,
+                "timezone": "auto"
+            }
+            response = http_client.get('open_meteo', OPEN_METEO_URL, params=params)
+            response.raise_for_status()
+            data = response.json()
+            # 지점이 하나면 목록이 아닌 단일 객체로 응답
+            locations = data if isinstance(data, list) else [data]
+            for key, location in zip(chunk, locations):
+                found[key] = parse_weather(location)
+                weather_cache.set(key, found[key])
+            logger.info(f"☁️  날씨 일괄 조회: {len(chunk)}개 지점 (요청 1회)")
+        except Exception as e:
+            logger.error(f"❌ 날씨 일괄 조회 오류: {e}")
+    
+    return [found.get(key) or fallback_weather() for key, _, _ in buckets]
 
 
 def get_weather_description(code):
@@ -86,52 +315,124 @@ def get_weather_description(code):
     return weather_codes.get(code, "알 수 없음")
 
 
+# 위키피디아 언어별 주소 ({lang} 자리에 언어 코드), Commons API 주소 - 벤치마크 등에서 대체 서버 지정용
+WIKIPEDIA_URL = os.getenv('WIKIPEDIA_URL', "https://{lang}.wikipedia.org")
+COMMONS_API_URL = os.getenv('COMMONS_API_URL', "https://commons.wikimedia.org/w/api.php")
+
+
+def fetch_wikipedia_summary(wiki_lang, region_name, headers=None):
+    """REST 요약 요청 (조건부 요청 헤더 지원, 응답 객체 반환)"""
+    summary_url = f"{WIKIPEDIA_URL.format(lang=wiki_lang)}/api/rest_v1/page/summary/{region_name}"
+    return http_client.get('wikipedia', summary_url, headers=headers)
+
+
+def fetch_wikipedia_extract(wiki_lang, region_name):
+    """본문(최대 5000자)과 분류 목록 요청"""
+    page_url = f"{WIKIPEDIA_URL.format(lang=wiki_lang)}/w/api.php"
+    params = {
+        "action": "query",
+        "format": "json",
+        "titles": region_name,
+        "prop": "extracts|categories|coordinates",
+        "explaintext": True,
+        "exintro": False
+    }
+    
+    response = http_client.get('wikipedia', page_url, params=params)
+    data = response.json()
+    
+    pages = data.get('query', {}).get('pages', {})
+    page = list(pages.values())[0]
+    
+    full_text = page.get('extract', '')[:5000]
+    categories = [cat.get('title', '') for cat in page.get('categories', [])[:15]]
+    return full_text, categories
+
+
+def wiki_cache_key(region_name, language='ko'):
+    """위키피디아 캐시 · 스냅샷 키 (한국어 외에는 영어 위키피디아)"""
+    return f"{'ko' if language == 'ko' else 'en'}:{region_name}"
+
+
 def get_wikipedia_info(region_name, language='ko'):
-    """위키피디아에서 상세 정보 수집"""
+    """위키피디아에서 상세 정보 수집 (디스크 캐시 + ETag/Last-Modified 재검증)"""
+    wiki_lang = 'ko' if language == 'ko' else 'en'
+    key = wiki_cache_key(region_name, language)
+    
+    entry = wiki_cache.get_entry(key)
+    if entry and entry['fresh']:
+        return entry['value']['info']
+    if entry is None:
+        info = snapshot.get('wikipedia', key)
+        if info is not None:
+            return info
+    
     try:
-        wiki_lang = 'ko' if language == 'ko' else 'en'
+        if entry:
+            # 만료된 항목: 요약만 조건부 요청, 변경이 없으면(304) 캐시 연장
+            cached = entry['value']
+            headers = {}
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            elif cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+            
+            response = fetch_wikipedia_summary(wiki_lang, region_name, headers)
+            if response.status_code == 304:
+                wiki_cache.touch(key)
+                return cached['info']
+            full_text, categories = fetch_wikipedia_extract(wiki_lang, region_name)
+        else:
+            # 캐시 없음: 요약과 본문을 동시에 요청
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                summary_future = metrics.submit(executor, fetch_wikipedia_summary, wiki_lang, region_name)
+                extract_future = metrics.submit(executor, fetch_wikipedia_extract, wiki_lang, region_name)
+                response = summary_future.result()
+                full_text, categories = extract_future.result()
         
-        # 요약 정보
-        summary_url = f"https://{wiki_lang}.wikipedia.org/api/rest_v1/page/summary/{region_name}"
-        response = requests.get(summary_url, timeout=10)
         response.raise_for_status()
         summary_data = response.json()
         
-        # 상세 정보
-        page_url = f"https://{wiki_lang}.wikipedia.org/w/api.php"
-        params = {
-            "action": "query",
-            "format": "json",
-            "titles": region_name,
-            "prop": "extracts|categories|coordinates",
-            "explaintext": True,
-            "exintro": False
-        }
-        
-        response = requests.get(page_url, params=params, timeout=10)
-        data = response.json()
-        
-        pages = data.get('query', {}).get('pages', {})
-        page = list(pages.values())[0]
-        
-        full_text = page.get('extract', '')[:5000]
-        categories = [cat.get('title', '') for cat in page.get('categories', [])[:15]]
-        
-        return {
+        info = {
             "summary": summary_data.get('extract', ''),
             "full_text": full_text,
             "categories": categories,
             "title": summary_data.get('title', region_name),
             "description": summary_data.get('description', '')
         }
+        wiki_cache.set(key, {
+            "info": info,
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified')
+        })
+        return info
         
     except Exception as e:
-        print(f"❌ 위키피디아 오류: {e}")
+        if entry:
+            # 업스트림 장애(서킷 열림 포함) 중에는 만료된 캐시라도 제공
+            logger.warning(f"⚠️ 위키피디아 오류, 만료된 캐시 사용: {e}")
+            return entry['value']['info']
+        logger.error(f"❌ 위키피디아 오류: {e}")
         return None
 
 
+def snapshot_images(region_name, language):
+    """스냅샷에 저장된 이미지 목록 (이미지 프록시 사용 시 썸네일을 이 서버에 등록), 없으면 None"""
+    images = snapshot.get('images', f"{language}:{region_name}")
+    if images is None or not image_proxy.IMAGE_PROXY:
+        return images
+    for image in images:
+        image['thumbnails'] = {width: images_proxy.register(url) for width, url in image['thumbnails'].items()}
+        image['thumbnail'] = images_proxy.register(image['thumbnail'])
+    return images
+
+
 def get_comprehensive_images(region_name, language='ko'):
-    """환경 이미지 + 건축물 이미지 종합 검색"""
+    """환경 이미지 + 건축물 이미지 종합 검색 (스냅샷에 있으면 검색하지 않음)"""
+    cached = snapshot_images(region_name, language)
+    if cached is not None:
+        return cached
+    
     all_images = []
     
     # 검색어 목록
@@ -156,14 +457,13 @@ def get_comprehensive_images(region_name, language='ko'):
         ]
     }
     
-    terms = search_terms.get(language, search_terms['en'])
+    terms = search_terms.get(language, search_terms['en'])[:5]  # 상위 5개 검색어
     
-    for term in terms[:5]:  # 상위 5개 검색어
-        images = search_wikimedia_images(term, max_results=4)
-        all_images.extend(images)
-        
-        if len(all_images) >= 15:  # 최대 15개 이미지
-            break
+    # 검색어별 요청을 동시에 실행 (결과는 검색어 순서대로 병합)
+    with ThreadPoolExecutor(max_workers=len(terms)) as executor:
+        futures = [metrics.submit(executor, search_wikimedia_images, term, max_results=4) for term in terms]
+        for future in futures:
+            all_images.extend(future.result())
     
     # 중복 제거
     unique_images = []
@@ -173,74 +473,62 @@ def get_comprehensive_images(region_name, language='ko'):
             seen_urls.add(img['url'])
             unique_images.append(img)
     
-    return unique_images[:15]
+    return unique_images[:15]  # 최대 15개 이미지
 
 
 def search_wikimedia_images(search_query, max_results=5):
-    """Wikimedia Commons에서 이미지 검색"""
+    """Wikimedia Commons에서 이미지 검색 (검색 + URL · 썸네일 URL 조회를 한 번의 요청으로)
+
+    url은 원본(링크용), thumbnails는 폭별 썸네일 URL {폭: URL}입니다.
+    """
     images = []
     
     try:
-        url = "https://commons.wikimedia.org/w/api.php"
+        url = COMMONS_API_URL
         params = {
             "action": "query",
             "format": "json",
-            "list": "search",
-            "srsearch": search_query,
-            "srnamespace": "6",
-            "srlimit": str(max_results * 2)
+            "generator": "search",
+            "gsrsearch": search_query,
+            "gsrnamespace": "6",
+            "gsrlimit": str(max_results * 2),
+            "prop": "imageinfo",
+            "iiprop": "url|size",
+            "iiurlwidth": str(image_proxy.THUMB_WIDTH)
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get('commons', url, params=params)
         response.raise_for_status()
         data = response.json()
         
-        search_results = data.get('query', {}).get('search', [])
+        # generator 결과는 pageid 기준 dict이므로 검색 순위(index)로 정렬
+        pages = data.get('query', {}).get('pages', {})
+        search_results = sorted(pages.values(), key=lambda page: page.get('index', 0))
         
         for result in search_results[:max_results]:
             title = result.get('title', '')
-            img_url = get_image_url(title)
+            info = (result.get('imageinfo') or [{}])[0]
+            img_url = info.get('url')
             
             if img_url and is_valid_image(img_url):
+                thumbnails = image_proxy.thumbnail_urls(info.get('thumburl') or img_url, info.get('width'))
+                if image_proxy.IMAGE_PROXY:
+                    thumbnails = {width: images_proxy.register(url) for width, url in thumbnails.items()}
                 images.append({
                     'url': img_url,
+                    'thumbnail': thumbnails.get(image_proxy.THUMB_WIDTH) or next(iter(thumbnails.values())),
+                    'thumbnails': thumbnails,
                     'title': title.replace('File:', '').replace('.jpg', '').replace('.png', '').replace('.jpeg', '')[:80],
                     'source': 'Wikimedia Commons',
                     'type': categorize_image(title)
                 })
         
     except Exception as e:
-        print(f"❌ 이미지 검색 오류: {e}")
+        logger.error(f"❌ 이미지 검색 오류: {e}")
     
     return images
 
 
-def get_image_url(file_title):
-    """파일 제목으로 실제 이미지 URL 가져오기"""
-    try:
-        url = "https://commons.wikimedia.org/w/api.php"
-        params = {
-            "action": "query",
-            "format": "json",
-            "titles": file_title,
-            "prop": "imageinfo",
-            "iiprop": "url"
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        pages = data.get('query', {}).get('pages', {})
-        for page_data in pages.values():
-            imageinfo = page_data.get('imageinfo', [])
-            if imageinfo:
-                return imageinfo[0].get('url')
-        
-        return None
-    except:
-        return None
-
-
 def is_valid_image(url):
     """이미지 URL 유효성 검증"""
     if not url:
@@ -260,212 +548,259 @@ def categorize_image(title):
         return 'general'
 
 
-def analyze_with_ai_enhanced(region_name, weather_data, wiki_info, language='ko'):
-    """AI 초강력 전문 분석 - 매우 상세한 버전"""
+def analysis_region_tag(region_name):
+    """지역 단위 캐시 무효화 태그"""
+    return region_name.strip().lower()
+
+
+def snapshot_analysis_key(region_name, language='ko', tier='full'):
+    """스냅샷의 AI 분석 키 (사전 생성 시점 날씨와 관계없이 지역 단위)"""
+    return f"{analysis_region_tag(region_name)}|{language}|{tier}|{PROMPT_TEMPLATE_VERSION}"
+
+
+def analysis_tier(value):
+    """요청의 분석 단계 값 정리 (알 수 없는 값은 전체 분석)"""
+    return value if value in ANALYSIS_TIERS else 'full'
+
+
+def request_coordinates(data):
+    """요청의 lat, lng → (위도, 경도), 숫자가 아니거나 범위를 벗어나면 ValueError (없으면 0)"""
     try:
-        if language == 'ko':
-            prompt = f"""당신은 세계 최고 수준의 기후학자, 지리학자, 건축학자, 환경공학자입니다. 
-다음 지역에 대해 **대학원 수준의 전문적이고 상세한 분석**을 제공하세요.
-
-**분석 대상**: {region_name}
-
-**실시간 기상 데이터**:
-- 현재 기온: {weather_data['temperature']}°C (체감: {weather_data['apparent_temperature']}°C)
-- 일교차: {weather_data['temp_max'] - weather_data['temp_min']}°C (최고: {weather_data['temp_max']}°C, 최저: {weather_data['temp_min']}°C)
-- 상대습도: {weather_data['humidity']}%
-- 풍속: {weather_data['wind_speed']} km/h (풍향: {weather_data['wind_direction']}°)
-- 강수량: {weather_data['precipitation']} mm
-- 기압: {weather_data['pressure']} hPa
-- 운량: {weather_data.get('cloud_cover', 0)}%
-- 날씨: {weather_data['weather_description']}
-
-**배경 정보**:
-{wiki_info['full_text'][:2000] if wiki_info else '정보 없음'}
-
----
-
-다음 5개 섹션을 **각각 최소 400자 이상**, **구체적인 수치, 과학적 용어, 실제 사례**를 포함하여 작성하세요:
-
-**1. 기후 특성 전문 분석 (Climatology)**
-- 쾨펜-가이거 기후 구분 (정확한 기호 예: Cfa, Dwa, BWh 등)
-- 연평균 기온, 최한월/최난월 평균기온, 연교차, 일교차
-- 연평균 강수량(mm), 계절별 강수 분포, 강수 집중도
-- 주요 기단: 시베리아 기단, 북태평양 고기압, 적도 기단 등의 영향
-- 대기 순환: 편서풍, 무역풍, 몬순, 제트기류
-- 특수 기상 현상: 태풍, 뇌우, 한파, 폭염, 가뭄
-- 기후변화 영향: 기온 상승률, 강수 패턴 변화, 극한 기상 빈도
-- 미기후(microclimate) 특성
-- **반드시 구체적 수치 포함**
-
-**2. 자연 환경 지리학적 분석 (Physical Geography)**
-- 지형: 해발고도(m), 지형 기복, 주요 산맥명, 하천명, 분지/평야
-- 지질: 암석 종류(화강암, 편마암, 석회암 등), 지질 시대, 토양 유형(충적토, 황토, 화산토)
-- 식생: 식물군계(낙엽활엽수림, 침엽수림 등), 주요 수종, 식생대
-- 수문: 연간 강수량, 증발산량, 하천 유량, 지하수위
-- 생태계: 생물다양성, 주요 동식물종, 생태 서비스
-- 자연재해: 홍수, 산사태, 가뭄 위험도
-- **실제 지명과 수치 필수**
-
-**3. 전통 건축 양식 건축학적 분석 (Architecture)**
-- 건축 양식 명칭과 역사적 시대 배경
-- **건축 재료 상세 분석**:
-  * 목재: 수종(소나무, 참나무, 삼나무 등), 목재 선택 이유, 건조 방법, 내구성
-  * 석재: 암석 종류(화강암, 대리석 등), 채석 위치, 가공 기법, 구조적 특성
-  * 흙/점토: 토양 특성, 벽돌 제조법, 흙벽 구조, 단열 성능
-  * 지붕재: 기와 종류, 초가, 석판, 제조 방식, 배수 시스템
-- **구조 시스템**:
-  * 기초: 초석, 기단, 지내력, 내진 설계
-  * 골조: 목구조(기둥-보 구조), 조적조, 트러스, 접합 방식
-  * 지붕: 형태(맞배, 우진각, 팔작), 경사각, 처마 길이, 하중 분산
-- **공간 구성**: 평면 배치, 동선, 방 구성, 마당/중정, 창호 체계
-- **실제 건축물 최소 7개** (건물명, 건축 연도, 크기, 구조, 특징)
-- 지역별/시대별 변화와 차이점
-
-**4. 기후 적응 건축 원리 환경공학적 분석 (Environmental Engineering)**
-- **열환경 제어**:
-  * 일사 조절: 처마 설계, 차양, 남향 배치, 창호 크기
-  * 자연 환기: 베르누이 원리, 온도 차 환기, 풍압 환기, 굴뚝 효과
-  * 단열: 재료별 열전도율(W/m·K), R-value, U-value
-  * 축열/방열: 열용량, 야간 복사냉각
-- **습도 제어**:
-  * 흡습/방습 재료: 목재, 흙, 회반죽의 습기 조절 특성
-  * 결로 방지: 노점온도, 습기 차단층, 환기량
-- **구조 안정성**:
-  * 내진 설계: 유연 구조, 감쇠 메커니즘, 내진 요소
-  * 내풍 설계: 공기역학, 풍압 계수, 저층 설계
-- **우수 처리**: 지붕 경사, 배수로, 빗물 저장
-- **에너지 효율**: 패시브 디자인, 자연 채광, 열교 차단
-- **과학적 원리**: 열역학 법칙, 유체역학, 재료역학 적용
-- 현대 건축에 주는 시사점
-
-**5. 쉬운 추가 설명 (Simple Explanation)**
-위의 전문 용어들을 **중학생도 이해할 수 있게** 쉽게 풀어서 설명하세요:
-- 쾨펜 기후 구분이 뭔가요?
-- 기단이 날씨에 어떤 영향을 주나요?
-- 목구조와 석조 구조의 차이는?
-- 베르누이 원리로 어떻게 환기가 되나요?
-- 열전도율이 낮다는 게 왜 좋은가요?
-- 내진 설계는 어떻게 지진을 견디나요?
-- 남향 배치가 왜 중요한가요?
-
-각 섹션마다 **구체적인 숫자, 전문 용어, 실제 사례**를 반드시 포함하세요."""
-
-        else:  # English
-            prompt = f"""You are a world-class climatologist, geographer, architect, and environmental engineer.
-Provide **graduate-level professional and detailed analysis** of the following region.
-
-**Region**: {region_name}
-
-**Real-time Weather Data**:
-- Temperature: {weather_data['temperature']}°C (Feels like: {weather_data['apparent_temperature']}°C)
-- Daily range: {weather_data['temp_max'] - weather_data['temp_min']}°C
-- Humidity: {weather_data['humidity']}%
-- Wind: {weather_data['wind_speed']} km/h (Direction: {weather_data['wind_direction']}°)
-- Precipitation: {weather_data['precipitation']} mm
-- Pressure: {weather_data['pressure']} hPa
-
-**Background**:
-{wiki_info['full_text'][:2000] if wiki_info else 'No information'}
-
----
-
-Write 5 sections with **at least 400 characters each**, including **specific numbers, scientific terms, real examples**:
-
-**1. Climate Analysis (Climatology)** - Köppen classification, temperatures, precipitation, air masses, weather phenomena
-
-**2. Natural Environment (Physical Geography)** - Topography, geology, vegetation, hydrology, ecosystems
-
-**3. Traditional Architecture (Architecture)** - Style, materials (wood types, stone, earth), structure, spatial composition, at least 7 building examples
-
-**4. Climate Adaptation (Environmental Engineering)** - Thermal control, ventilation, insulation, seismic design, water management, scientific principles
-
-**5. Simple Explanation** - Explain technical terms in simple language for students
-
-Include **specific numbers, technical terms, and real examples** in each section."""
-
-        print(f"🤖 AI 초강력 분석 시작... (지역: {region_name})")
-        
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 4000,
-                "temperature": 0.75,
-                "top_p": 0.95,
-                "do_sample": True,
-                "return_full_text": False
-            }
-        }
-        
-        response = requests.post(HF_API_URL, headers=HF_HEADERS, json=payload, timeout=150)
-        
-        if response.status_code == 503:
-            print("⏳ 모델 로딩 중... 25초 대기")
-            time.sleep(25)
-            response = requests.post(HF_API_URL, headers=HF_HEADERS, json=payload, timeout=150)
-        
-        response.raise_for_status()
-        result = response.json()
-        
-        if isinstance(result, list) and len(result) > 0:
-            ai_text = result[0].get('generated_text', '')
-        else:
-            ai_text = str(result)
-        
-        print(f"✅ AI 분석 완료: {len(ai_text)} 글자")
-        
-        analysis = parse_ai_response_enhanced(ai_text, region_name, weather_data, wiki_info)
-        
-        return analysis
-        
-    except Exception as e:
-        print(f"❌ AI 분석 오류: {e}")
-        return create_fallback_analysis_enhanced(region_name, weather_data, wiki_info, language)
+        lat = float(data.get('lat', 0))
+        lng = float(data.get('lng', 0))
+    except (TypeError, ValueError):
+        raise ValueError("lat, lng는 숫자여야 합니다.") from None
+    # NaN도 범위 비교에서 걸러짐
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat은 -90~90, lng는 -180~180 범위여야 합니다.")
+    return lat, lng
+
+
+def bad_coordinates(e):
+    return jsonify({"error": "bad_request", "message": str(e)}), 400
+
 
+def analysis_cache_key(region_name, weather_data, language='ko', tier='full'):
+    """AI 분석 캐시 키 (날씨는 분석 내용이 달라지지 않을 정도의 구간으로 묶음)"""
+    weather_band = "|".join([
+        str(int(weather_data.get('temperature', 0) // 5)),
+        str(int(weather_data.get('humidity', 0) // 20)),
+        'wet' if weather_data.get('precipitation', 0) > 0 else 'dry'
+    ])
+    raw = f"{analysis_region_tag(region_name)}|{language}|{tier}|{PROMPT_TEMPLATE_VERSION}|{weather_band}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
 
-def parse_ai_response_enhanced(text, region_name, weather_data, wiki_info):
-    """AI 응답을 구조화된 데이터로 파싱 (강화 버전)"""
+
+def read_generation_stream(response, on_section=None, keys=None):
+    """토큰 스트림(SSE)을 읽으며 완성된 섹션을 on_section(key, content)으로 전달, 전체 텍스트 반환
+
+    요청 마감 시각이 지나면 읽기를 멈추고, 그때까지 완성된 섹션을 담아 DeadlineExceeded를 발생시킵니다.
+    """
+    parser = SectionStreamParser(keys)
+    try:
+        for line in response.iter_lines():
+            if deadline.expired():
+                break
+            if not line.startswith(b'data:'):
+                continue
+            event = json.loads(line[5:].decode('utf-8'))
+            if event.get('error'):
+                raise RuntimeError(event['error'])
+            token = event.get('token') or {}
+            if token.get('special'):
+                continue
+            for key, content in parser.feed(token.get('text', '')):
+                if on_section:
+                    on_section(key, content)
+            if parser.complete:
+                logger.info(f"✂️  {len(parser.keys)}개 섹션 완성 - 생성 조기 종료")
+                break
+    except Exception:
+        # 남은 시간으로 줄인 읽기 타임아웃이 끝난 경우도 마감 초과로 처리
+        if not deadline.expired():
+            raise
+    finally:
+        # 연결을 닫으면 서버 측 생성도 중단됨
+        response.close()
     
-    sections = {
-        "climate": "",
-        "environment": "",
-        "architecture": "",
-        "adaptation": "",
-        "simple_explanation": "",
-        "building_examples": []
-    }
+    if deadline.expired() and not parser.complete:
+        raise deadline.DeadlineExceeded(
+            "AI 생성 중 요청 마감 시각을 넘었습니다",
+            partial={"sections": dict(parser.sections), "examples": list(parser.examples)}
+        )
     
-    keywords = {
-        "climate": ["기후", "Climate", "쾨펜", "Köppen", "기온", "Temperature", "강수", "Precipitation", "기단"],
-        "environment": ["환경", "Environment", "지형", "Topography", "토양", "Soil", "식생", "Vegetation", "지질"],
-        "architecture": ["건축", "Architecture", "양식", "Style", "구조", "Structure", "재료", "Material", "목재", "석재"],
-        "adaptation": ["적응", "Adaptation", "조절", "Control", "원리", "Principle", "환기", "Ventilation", "단열"],
-        "simple_explanation": ["설명", "Explanation", "쉽게", "Simple", "이해", "Understand"]
-    }
+    for key, content in parser.close():
+        if on_section:
+            on_section(key, content)
+    return parser.text
+
+
+# 요청 마감이 지나도 끝까지 실행 중인 분석 생성 (캐시 키 → Future, 같은 분석을 요청하면 새로 생성하지 않고 합류)
+_analysis_inflight = {}
+_analysis_inflight_lock = threading.Lock()
+
+
+def start_analysis_generation(cache_key, generate):
+    """generate()를 요청과 분리된 스레드에서 실행, (Future, 새로 시작했는지) 반환
+
+    요청 마감 대신 JOB_DEADLINE_SECONDS 안에서 끝까지 실행되므로 마감에 걸린 요청이 먼저 응답해도
+    생성 결과는 캐시에 저장되어 다음 요청이 그대로 사용합니다.
+    """
+    with _analysis_inflight_lock:
+        future = _analysis_inflight.get(cache_key)
+        if future is not None:
+            return future, False
+        future = _analysis_inflight[cache_key] = Future()
     
-    lines = text.split('\n')
-    current_section = None
+    def run():
+        deadline.start(deadline.JOB_DEADLINE_SECONDS)
+        try:
+            future.set_result(generate())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with _analysis_inflight_lock:
+                _analysis_inflight.pop(cache_key, None)
     
-    for line in lines:
-        line = line.strip()
-        if not line or len(line) < 10:
-            continue
+    threading.Thread(target=metrics.in_context(run), daemon=True, name='analysis').start()
+    return future, True
+
+
+def analyze_with_ai_enhanced(region_name, weather_data, wiki_info, language='ko', on_section=None,
+                             max_model_wait=None, tier='full', location=None, queue_timeout=None, overflow=None):
+    """AI 초강력 전문 분석 - 매우 상세한 버전 (성공한 결과만 캐시)
+
+    on_section(key, content)을 지정하면 토큰 스트리밍 중 완성된 섹션을 즉시 전달합니다.
+    모델이 로딩 중이고 예상 대기가 max_model_wait(초)를 넘으면 즉시 대체 분석을 반환합니다.
+    tier가 'summary'이면 기후(1)와 쉬운 설명(5) 섹션만 생성합니다 (prompt_builder.ANALYSIS_TIERS).
+    캐시에 없으면 사전 생성 스냅샷(지역 단위)을 먼저 확인합니다.
+    location=(lat, lng, 행정 단위)를 지정하면 반경 안의 기존 분석을 재사용하고(nearby에 원래 지역 · 거리 기록),
+    새로 생성한 분석은 위치 색인에 등록합니다.
+    모델 호출은 model_admission 자리를 얻어야 하며, queue_timeout(기본 ADMISSION_QUEUE_SECONDS) 안에 얻지 못하면
+    overflow(기본 ADMISSION_OVERFLOW)가 'reject'일 때 admission.Overloaded를, 아니면 대체 분석을 반환합니다.
+    생성은 start_analysis_generation으로 실행되어 요청 마감에 걸려도 중단되지 않고 캐시를 채웁니다.
+    """
+    cache_key = analysis_cache_key(region_name, weather_data, language, tier)
+    cached = ai_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"⚡ AI 분석 캐시 적중 (지역: {region_name})")
+        return cached
+    
+    cached = snapshot.get('analysis', snapshot_analysis_key(region_name, language, tier))
+    if cached is not None:
+        logger.info(f"📀 사전 생성 분석 사용 (지역: {region_name})")
+        return cached
+    
+    if location is not None:
+        lat, lng, level = location
+        reusable = find_reusable(analysis_index, ai_cache, lat, lng, language, tier, level)
+        if reusable is not None:
+            analysis, distance, nearby_region = reusable
+            logger.info(f"📍 인근 분석 재사용: {nearby_region} ({distance:.1f}km) → {region_name}")
+            return dict(analysis, nearby={"region": nearby_region, "distance_km": round(distance, 2)})
+    
+    try:
+        built = build_prompt(region_name, weather_data, wiki_info, language, tier)
+        prompt = built['prompt']
+
+        parameters = {
+            "max_new_tokens": built['max_new_tokens'],
+            "temperature": 0.75,
+            "top_p": 0.95,
+            "do_sample": True,
+            "return_full_text": False
+        }
+        max_wait = MODEL_MAX_WAIT if max_model_wait is None else max_model_wait
+        # 섹션을 받는 즉시 전달해야 하는 요청(또는 배칭을 끈 경우)만 호출자별 토큰 스트리밍
+        streaming = HF_STREAMING and (on_section is not None or not model_batcher.enabled)
         
-        for section, kws in keywords.items():
-            if any(kw.lower() in line.lower() for kw in kws) and len(line) < 150:
-                current_section = section
-                break
+        queue_wait = admission.ADMISSION_QUEUE_SECONDS if queue_timeout is None else queue_timeout
+        # 마감까지 받은 섹션 (마감 뒤에는 요청에 전달하지 않고 생성만 계속)
+        sections = {}
+        abandoned = threading.Event()
+        
+        def forward_section(key, content):
+            sections[key] = content
+            if on_section and not abandoned.is_set():
+                on_section(key, content)
+        
+        def generate():
+            logger.info(f"🤖 AI 초강력 분석 시작... (지역: {region_name}, 단계: {tier}, "
+                        f"입력 약 {built['input_tokens']} / 출력 최대 {built['max_new_tokens']} 토큰)")
+            with model_admission.slot(queue_wait):
+                if streaming:
+                    response = inference_backend.stream(prompt, parameters, max_wait)
+                    ai_text = read_generation_stream(response, forward_section, built['sections'])
+                else:
+                    ai_text = model_batcher.generate(prompt, parameters, max_wait)
+            
+            logger.info(f"✅ AI 분석 완료: {len(ai_text)} 글자")
+            
+            analysis = parse_ai_response_enhanced(ai_text, region_name, weather_data, wiki_info, built['sections'])
+            ai_cache.set(cache_key, analysis, tag=analysis_region_tag(region_name))
+            if location is not None:
+                analysis_index.add(cache_key, region_name, lat, lng, language, tier, level)
+            return analysis
         
-        if current_section and len(line) > 30:
-            sections[current_section] += line + "\n"
-    
-    # 건축물 예시 추출
-    examples = []
-    for line in lines:
-        if any(marker in line for marker in ['1.', '2.', '3.', '4.', '5.', '6.', '7.', '-', '•']):
-            if any(kw in line.lower() for kw in ['palace', 'temple', 'house', 'building', '궁', '사원', '집', '건물', '전각']):
-                clean_line = line.strip('- •1234567890.')
-                if len(clean_line) > 15 and len(clean_line) < 250:
-                    examples.append(clean_line)
+        future, started = start_analysis_generation(cache_key, generate)
+        if not started:
+            logger.info(f"🔗 진행 중인 AI 분석에 합류 (지역: {region_name})")
+        try:
+            return dict(future.result(timeout=deadline.grace_remaining()))
+        except FutureTimeout:
+            # DeadlineExceeded도 TimeoutError이므로 생성이 끝나지 않은 경우만 요청 마감으로 처리
+            if future.done():
+                raise
+            abandoned.set()
+            logger.info(f"⌛ 마감 뒤에도 AI 분석 생성 계속 (지역: {region_name}, 완료되면 캐시)")
+            raise deadline.DeadlineExceeded("AI 생성 중 요청 마감 시각을 넘었습니다",
+                                            partial={"sections": dict(sections), "examples": []})
+        
+    except admission.Overloaded as e:
+        if (overflow or admission.ADMISSION_OVERFLOW) == 'reject':
+            raise
+        logger.warning(f"🚦 AI 분석 자리 없음, 대체 분석으로 응답 (지역: {region_name}): {e}")
+        return partial_analysis(region_name, weather_data, wiki_info, language, {}, [])
+    except deadline.DeadlineExceeded as e:
+        partial = e.partial or {}
+        logger.warning(f"⏰ AI 분석 마감 초과 (지역: {region_name}, 완성된 섹션 {len(partial.get('sections', {}))}개)")
+        return partial_analysis(region_name, weather_data, wiki_info, language,
+                                partial.get('sections', {}), partial.get('examples', []))
+    except ModelCold as e:
+        # 콜드 스타트는 예상된 상황이므로 오류가 아닌 경고로 기록
+        logger.warning(f"⏳ 모델 로딩 중, 대체 분석으로 응답 (지역: {region_name}): {e}")
+        return partial_analysis(region_name, weather_data, wiki_info, language, {}, [])
+    except Exception as e:
+        if deadline.expired():
+            # 남은 시간으로 줄인 타임아웃에 걸린 경우
+            logger.warning(f"⏰ AI 분석 마감 초과 (지역: {region_name}): {e}")
+            return partial_analysis(region_name, weather_data, wiki_info, language, {}, [])
+        logger.error(f"❌ AI 분석 오류: {e}")
+        return partial_analysis(region_name, weather_data, wiki_info, language, {}, [])
+
+
+def partial_analysis(region_name, weather_data, wiki_info, language, sections, examples):
+    """완성된 섹션만 쓰고 나머지는 대체 분석으로 채움 (캐시하지 않음)
+
+    마감 초과 · 자리 없음 · 모델 로딩 중 · 모델 오류 모두 이 함수로 응답하며,
+    대체 분석으로 채운 섹션은 fallback_sections에 기록되어 응답이 캐시되지 않습니다 (region_cache_control).
+    """
+    analysis = create_fallback_analysis_enhanced(region_name, weather_data, wiki_info, language)
+    for key in ANALYSIS_SECTION_KEYS:
+        if sections.get(key):
+            analysis[key] = sections[key]
+    if examples:
+        analysis['building_examples'] = examples[:10]
+    analysis['fallback_sections'] = [key for key in ANALYSIS_SECTION_KEYS if not sections.get(key)]
+    return analysis
+
+
+def parse_ai_response_enhanced(text, region_name, weather_data, wiki_info, keys=None):
+    """AI 응답을 구조화된 데이터로 파싱 (번호 붙은 섹션 제목 기준 단일 패스, 요청하지 않은 섹션은 빈 값)"""
+    
+    keys = keys or ANALYSIS_SECTION_KEYS
+    parsed, examples = parse_sections(text, keys)
+    sections = {key: parsed.get(key, "") if key in keys else "" for key in ANALYSIS_SECTION_KEYS}
     
     sections['building_examples'] = examples[:10] if examples else [
         f"{region_name}의 전통 왕궁 건축",
@@ -474,7 +809,7 @@ def parse_ai_response_enhanced(text, region_name, weather_data, wiki_info):
     ]
     
     # 최소 길이 보장
-    for key in ['climate', 'environment', 'architecture', 'adaptation', 'simple_explanation']:
+    for key in keys:
         if len(sections[key]) < 200:
             sections[key] = text[:1200] if text else f"{region_name}에 대한 {key} 정보를 분석 중입니다."
     
@@ -593,106 +928,709 @@ def translate_text(text, target_language):
     return text
 
 
-@app.route('/api/region-info', methods=['POST'])
-def get_region_info():
-    """메인 API 엔드포인트 - 모든 정보 수집"""
+def region_fields(value):
+    """fields= 값 정리 ('weather,images' → ('weather', 'images'), 정의 순서), 없으면 None (전체)
+
+    알 수 없는 필드가 있으면 ValueError
+    """
+    if not value:
+        return None
+    names = {name.strip() for name in str(value).split(',') if name.strip()}
+    unknown = names - set(REGION_FIELDS)
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(sorted(unknown))} (가능: {', '.join(REGION_FIELDS)})")
+    return tuple(name for name in REGION_FIELDS if name in names) or None
+
+
+def region_stages(fields=None):
+    """필드를 만드는 데 필요한 단계 이름 (의존 단계 포함)"""
+    if fields is None:
+        return tuple(REGION_FIELDS)
+    needed = set(fields)
+    for name in fields:
+        needed.update(REGION_FIELD_DEPENDENCIES.get(name, ()))
+    return tuple(name for name in REGION_FIELDS if name in needed)
+
+
+def region_cache_control(fields, result):
+    """필드별 응답의 Cache-Control (대체 값이 섞였으면 저장 금지, 전체 응답은 ETag 재검증만)"""
+    if result['partial']['stages'] or result['partial']['analysis_sections']:
+        return 'no-store'
+    if fields is None:
+        return 'no-cache'
+    return f"public, max-age={min(REGION_FIELD_MAX_AGE[name] for name in fields)}"
+
+
+def build_region_pipeline(region, lat, lng, language='ko', on_section=None, max_model_wait=None, tier='full',
+                          admin_level='', queue_timeout=None, overflow=None, fields=None):
+    """지역 분석 단계 구성 (의존성: AI 분석 ← 날씨 + 위키피디아)
+
+    fields를 지정하면 그 필드에 필요한 단계만 실행합니다 (날씨만 요청하면 모델을 호출하지 않음).
+    """
+    stages = region_stages(fields)
+    pipeline = StagePipeline()
+    if 'weather' in stages:
+        pipeline.add_stage('weather', lambda: get_weather_data(lat, lng))
+    if 'wiki' in stages:
+        pipeline.add_stage('wiki', lambda: get_wikipedia_info(region, language))
+    if 'images' in stages:
+        pipeline.add_stage('images', lambda: get_comprehensive_images(region, language))
+    if 'analysis' in stages:
+        pipeline.add_stage(
+            'analysis',
+            lambda weather, wiki: analyze_with_ai_enhanced(region, weather, wiki, language, on_section,
+                                                           max_model_wait, tier, (lat, lng, admin_level),
+                                                           queue_timeout, overflow),
+            depends_on=('weather', 'wiki')
+        )
+    return pipeline
+
+
+@app.route('/api/stats')
+def get_stats():
+    """업스트림 커넥션 풀 · 재시도 · 캐시 통계"""
+    return jsonify({
+        "http": http_client.stats(),
+        "cache": {
+            "weather": weather_cache.stats(),
+            "wikipedia": wiki_cache.stats(),
+            "analysis": ai_cache.stats(),
+            "nearby_index": analysis_index.stats(),
+            "geocode": geocoder.stats(),
+            "snapshot": snapshot.stats()
+        },
+        "admission": model_admission.stats(),
+        "inference": model_batcher.stats(),
+        "jobs": job_manager.stats(),
+        "model": inference_backend.state()
+    })
+
+
+def geocode_error(e):
+    """지오코딩 실패 응답 (호출 한도 초과는 503 + Retry-After)"""
+    if isinstance(e, RateLimited):
+        response = jsonify({"error": "rate_limited", "message": "요청이 많아 잠시 후 다시 시도해 주세요."})
+        response.headers['Retry-After'] = str(max(int(e.retry_after + 0.999), 1))
+        return response, 503
+    logger.error(f"❌ 지오코딩 오류: {e}")
+    return jsonify({"error": "geocode_failed", "message": "위치 정보를 가져오지 못했습니다."}), 502
+
+
+@app.route('/api/reverse')
+def reverse_geocode():
+    """좌표 → 지역 이름 · 행정 단위 (Nominatim 프록시, 격자 칸 단위 캐시)"""
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "bad_request", "message": "lat, lng 값이 필요합니다."}), 400
+    deadline.start(geocoding.GEOCODE_DEADLINE_SECONDS)
+    try:
+        place = geocoder.reverse(lat, lng, request.args.get('language', 'ko'))
+    except Exception as e:
+        return geocode_error(e)
+    return jsonify(place)
+
+
+@app.route('/api/geocode')
+def forward_geocode():
+    """검색어 → 위치 후보 (Nominatim 프록시, 검색어 단위 캐시)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "bad_request", "message": "q 값이 필요합니다."}), 400
+    try:
+        limit = int(request.args.get('limit', 1))
+    except ValueError:
+        limit = 1
+    deadline.start(geocoding.GEOCODE_DEADLINE_SECONDS)
     try:
-        data = request.json
+        results = geocoder.search(query, request.args.get('language', 'ko'), limit)
+    except Exception as e:
+        return geocode_error(e)
+    return jsonify({"query": query, "results": results})
+
+
+@app.route('/img/<key>')
+def proxied_image(key):
+    """디스크 캐시 썸네일 (등록된 해시만, 내용이 바뀌지 않으므로 장기 캐시 + ETag)"""
+    if not image_proxy.IMAGE_PROXY:
+        abort(404)
+    try:
+        found = images_proxy.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ 이미지 프록시 오류 ({key}): {e}")
+        abort(502)
+    if found is None:
+        abort(404)
+    path, mimetype = found
+    response = send_file(path, mimetype=mimetype, etag=key, max_age=image_proxy.IMAGE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus 텍스트 형식 메트릭 (업스트림 · 단계 · 요청별 지연 히스토그램, 진행 중 게이지)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """지역의 AI 분석 캐시 수동 무효화 (X-Admin-Token 헤더 필요)"""
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "forbidden", "message": "관리자 토큰이 필요합니다."}), 403
+    
+    data = request.json or {}
+    region = data.get('region')
+    if not region:
+        return jsonify({"error": "bad_request", "message": "region 값이 필요합니다."}), 400
+    
+    removed = ai_cache.invalidate(analysis_region_tag(region))
+    logger.info(f"🗑️ AI 분석 캐시 무효화: {region} ({removed}건)")
+    return jsonify({"region": region, "removed": removed})
+
+
+def split_images(images):
+    """이미지를 건축물 / 환경 카테고리로 분류"""
+    architecture_imgs = [img for img in images if img['type'] == 'architecture']
+    environment_imgs = [img for img in images if img['type'] == 'environment']
+    return architecture_imgs, environment_imgs
+
+
+def fill_missing_results(region, language, results, stages=tuple(REGION_FIELDS)):
+    """마감 시각까지 끝나지 않은 단계를 대체 값으로 채움 (results 직접 수정), 채운 단계 이름 반환
+
+    stages에 없는(요청하지 않은) 단계는 빈 값으로만 채우고 대체 분석은 만들지 않습니다.
+    """
+    missing = [name for name in stages if name not in results]
+    results.setdefault('weather', fallback_weather())
+    results.setdefault('wiki', None)
+    results.setdefault('images', [])
+    if 'analysis' not in results:
+        results['analysis'] = (partial_analysis(region, results['weather'], results['wiki'], language, {}, [])
+                               if 'analysis' in stages else {})
+    return missing
+
+
+def build_region_result(region, lat, lng, language, results, timings, tier='full', compact=False, fields=None):
+    """파이프라인 결과로 최종 응답 구성
+
+    마감 시각 때문에 대체 값을 쓴 부분은 partial에 표시합니다
+    (stages: 끝나지 않은 단계, analysis_sections: 대체 분석으로 채운 섹션).
+    compact이면 images.architecture / environment에 이미지 객체 대신 images.all의 인덱스를 담습니다.
+    fields를 지정하면 그 필드의 키(REGION_FIELDS)와 공통 키만 담습니다.
+    """
+    missing = fill_missing_results(region, language, results, fields or tuple(REGION_FIELDS))
+    weather_data = results['weather']
+    wiki_info = results['wiki']
+    images = results['images']
+    analysis = dict(results['analysis'])
+    fallback_sections = analysis.pop('fallback_sections', [])
+    nearby = analysis.pop('nearby', None)
+    architecture_imgs, environment_imgs = split_images(images)
+    if compact:
+        architecture_refs = [index for index, img in enumerate(images) if img['type'] == 'architecture']
+        environment_refs = [index for index, img in enumerate(images) if img['type'] == 'environment']
+    else:
+        architecture_refs, environment_refs = architecture_imgs, environment_imgs
+    
+    result = {
+        "region": region,
+        "coordinates": {"lat": lat, "lng": lng},
+        "current_weather": weather_data,
+        "information": analysis,
+        "images": {
+            "all": images,
+            "architecture": architecture_refs,
+            "environment": environment_refs
+        },
+        "compact": compact,
+        "has_images": len(images) > 0,
+        "image_count": {
+            "total": len(images),
+            "architecture": len(architecture_imgs),
+            "environment": len(environment_imgs)
+        },
+        "data_sources": {
+            "wikipedia": wiki_info is not None,
+            "weather_api": True,
+            "ai_analysis": True,
+            "image_sources": ["Wikimedia Commons"]
+        },
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "wiki_summary": wiki_info['summary'] if wiki_info else None,
+        "language": language,
+        "tier": tier,
+        "timings": timings,
+        "partial": {"stages": missing, "analysis_sections": fallback_sections},
+        "nearby": nearby
+    }
+    if fields is None:
+        return result
+    keys = set(REGION_COMMON_KEYS).union(*(REGION_FIELDS[name] for name in fields))
+    return {key: value for key, value in dict(result, fields=list(fields)).items() if key in keys}
+
+
+def stage_events(name, value):
+    """완료된 단계 결과를 스트리밍 이벤트 목록으로 변환"""
+    if name == 'weather':
+        return [('weather', value)]
+    if name == 'wiki':
+        summary = None
+        if value:
+            summary = {key: value[key] for key in ('title', 'summary', 'description')}
+        return [('wiki', summary)]
+    if name == 'images':
+        architecture_imgs, environment_imgs = split_images(value)
+        return [('images', {"all": value, "architecture": architecture_imgs, "environment": environment_imgs})]
+    if name == 'analysis':
+        return [
+            ('analysis_section', {"section": key, "content": value[key]})
+            for key in ANALYSIS_SECTION_KEYS + ['building_examples']
+        ]
+    return []
+
+
+def sse_event(event, data):
+    """Server-Sent Events 메시지 형식으로 직렬화"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/region-info/stream')
+def stream_region_info():
+    """SSE 엔드포인트 - 각 단계 결과를 준비되는 즉시 전송"""
+    region = request.args.get('region', 'Unknown')
+    try:
+        lat, lng = request_coordinates(request.args)
+    except ValueError as e:
+        return bad_coordinates(e)
+    language = request.args.get('language', 'ko')
+    tier = analysis_tier(request.args.get('tier', 'full'))
+    level = admin_level(request.args.get('admin_level', ''))
+    try:
+        fields = region_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({"error": "invalid_fields", "message": str(e)}), 400
+    deadline.start(deadline.resolve(request.args.get('deadline_ms')))
+    
+    logger.info(f"🌊 스트리밍 분석 시작: {region} ({lat:.4f}, {lng:.4f}), 필드: {','.join(fields) if fields else '전체'}")
+    events = queue.Queue()
+    
+    def on_stage_done(name, value):
+        # 요청한 필드의 단계만 전송 (분석만 요청해도 날씨 · 위키피디아 단계는 실행됨)
+        if fields is not None and name not in fields:
+            return
+        for event in stage_events(name, value):
+            events.put(event)
+    
+    def on_section(key, content):
+        # 토큰 스트리밍 중 완성된 섹션 (최종 파싱 결과는 analysis 단계 완료 시 다시 전송)
+        events.put(('analysis_section', {"section": key, "content": content, "streaming": True}))
+    
+    def run():
+        try:
+            pipeline = build_region_pipeline(region, lat, lng, language, on_section, tier=tier, admin_level=level,
+                                             fields=fields)
+            results, timings = pipeline.run(on_stage_done)
+            result = build_region_result(region, lat, lng, language, results, timings, tier, fields=fields)
+            # 마감 시각까지 끝나지 않은 단계는 대체 값으로 전송
+            for name in result['partial']['stages']:
+                on_stage_done(name, results[name])
+            events.put(('done', {
+                key: result[key]
+                for key in ('data_sources', 'image_count', 'generated_at', 'timings', 'partial', 'nearby')
+                if key in result
+            }))
+            logger.info(f"✅ 스트리밍 분석 완료: {region} ({timings['total_ms']:.0f}ms)")
+        except admission.Overloaded as e:
+            logger.warning(f"🚦 스트리밍 분석 거절: {region} ({e})")
+            events.put(('failure', {"error": "overloaded", "retry_after": e.retry_after,
+                                    "message": "요청이 많아 잠시 후 다시 시도해 주세요."}))
+        except Exception as e:
+            logger.error(f"❌ 스트리밍 분석 오류: {e}")
+            events.put(('failure', {"error": str(e), "message": "정보를 가져오는 중 오류가 발생했습니다."}))
+        finally:
+            events.put(None)
+    
+    # 클라이언트가 연결을 끊어도 파이프라인은 끝까지 실행되어 캐시를 채움
+    threading.Thread(target=metrics.in_context(run), daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield sse_event(*item)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def run_region_job(params, on_stage_done):
+    """백그라운드 작업으로 전체 분석 파이프라인 실행"""
+    region, lat, lng, language = params['region'], params['lat'], params['lng'], params['language']
+    tier = params.get('tier', 'full')
+    level = params.get('admin_level', '')
+    deadline.start(deadline.resolve(params.get('deadline_ms'), deadline.JOB_DEADLINE_SECONDS))
+    logger.info(f"🧵 작업 실행: {region} ({language}, {tier})")
+    # 백그라운드 작업은 하나의 클라이언트로 묶어 대화형 요청의 자리를 남겨 두고, 거절 대신 오래 기다림
+    admission.set_client('jobs')
+    pipeline = build_region_pipeline(region, lat, lng, language, max_model_wait=MODEL_MAX_WAIT_JOB, tier=tier,
+                                     admin_level=level, queue_timeout=MODEL_MAX_WAIT_JOB, overflow='fallback')
+    results, timings = pipeline.run(on_stage_done)
+    return build_region_result(region, lat, lng, language, results, timings, tier)
+
+
+job_manager = JobManager(run_region_job)
+
+
+def job_response(job, coalesced=None):
+    """작업 상태 응답 (완료 전에는 결과 제외)"""
+    body = {
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "stages": job['stages'],
+        "subscribers": job['subscribers'],
+        "created_at": datetime.fromtimestamp(job['created']).strftime("%Y-%m-%d %H:%M:%S"),
+        "expires_at": datetime.fromtimestamp(job['expires']).strftime("%Y-%m-%d %H:%M:%S"),
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "events_url": f"/api/jobs/{job['job_id']}/events"
+    }
+    if coalesced is not None:
+        body["coalesced"] = coalesced
+    if job['status'] == 'done':
+        body["result"] = job['result']
+    if job['status'] == 'failed':
+        body["error"] = job['error']
+        body["message"] = "정보를 가져오는 중 오류가 발생했습니다."
+    return body
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """분석 작업 등록 - 작업 ID 즉시 반환, 같은 (지역, 언어, 분석 단계) 진행 중 작업에는 합류"""
+    data = request.json or {}
+    try:
+        lat, lng = request_coordinates(data)
+    except ValueError as e:
+        return bad_coordinates(e)
+    params = {
+        "region": data.get('region', 'Unknown'),
+        "lat": lat,
+        "lng": lng,
+        "language": data.get('language', 'ko'),
+        "tier": analysis_tier(data.get('tier', 'full')),
+        "admin_level": admin_level(data.get('admin_level', ''))
+    }
+    stages = list(build_region_pipeline(**params).stages)
+    if data.get('deadline_ms') is not None:
+        params['deadline_ms'] = data['deadline_ms']
+    key = f"{analysis_region_tag(params['region'])}|{params['language']}|{params['tier']}"
+    
+    try:
+        job, coalesced = job_manager.submit(key, params, stages)
+    except JobQueueFull as e:
+        logger.warning(f"⚠️ 작업 거부: {e}")
+        response = jsonify({"error": "queue_full", "message": "요청이 많아 잠시 후 다시 시도해 주세요."})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    except JobStoreError:
+        return job_store_error()
+    
+    if coalesced:
+        logger.info(f"🔗 진행 중인 작업에 합류: {params['region']} ({job['job_id']})")
+    return jsonify(job_response(job, coalesced)), 202
+
+
+def job_store_error():
+    """작업 저장소 오류 응답 (잠김 등 일시적인 경우가 대부분이므로 503 + Retry-After)"""
+    response = jsonify({"error": "job_store_unavailable", "message": "작업 상태를 확인할 수 없습니다. 잠시 후 다시 시도해 주세요."})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """작업 상태 · 단계 진행 상황 · 결과 조회"""
+    try:
+        job = job_manager.get(job_id)
+    except JobStoreError:
+        return job_store_error()
+    if job is None:
+        return jsonify({"error": "not_found", "message": "작업이 없거나 만료되었습니다."}), 404
+    return jsonify(job_response(job))
+
+
+@app.route('/api/jobs/<job_id>/events')
+def stream_job(job_id):
+    """SSE로 작업 진행 상황 구독 (다른 워커에서 실행 중인 작업도 구독 가능)"""
+    try:
+        if job_manager.get(job_id) is None:
+            return jsonify({"error": "not_found", "message": "작업이 없거나 만료되었습니다."}), 404
+    except JobStoreError:
+        return job_store_error()
+    
+    def generate():
+        last_stages = None
+        idle = 0.0
+        job = None
+        while True:
+            try:
+                job = job_manager.get(job_id)
+            except JobStoreError:
+                # 일시적인 잠김일 수 있으므로 다음 확인까지 대기
+                pass
+            if job is None:
+                yield sse_event('failure', {"error": "expired", "message": "작업이 만료되었습니다."})
+                return
+            if job['stages'] != last_stages:
+                last_stages = job['stages']
+                idle = 0.0
+                yield sse_event('progress', {"status": job['status'], "stages": job['stages']})
+            if job['status'] in ('done', 'failed'):
+                yield sse_event('done' if job['status'] == 'done' else 'failure', job_response(job))
+                return
+            time.sleep(JOB_POLL_SECONDS)
+            idle += JOB_POLL_SECONDS
+            if idle >= SSE_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+class RegionBatch:
+    """여러 지역 분석 - 날씨는 다중 지점 요청 한 번, 같은 지역의 위키피디아·이미지·AI 분석은 한 번만 실행
+
+    지역별 작업은 BATCH_AI_CONCURRENCY개 스레드에서 실행되므로 AI 분석 동시 실행 수가 제한됩니다.
+    """
+
+    def __init__(self, entries, language='ko', tier='full', deadline_seconds=deadline.JOB_DEADLINE_SECONDS):
+        self.entries = entries
+        self.language = language
+        self.tier = tier
+        self.deadline_seconds = deadline_seconds
+        self._fetch_pool = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix='batch-fetch')
+        self._region_pool = ThreadPoolExecutor(max_workers=BATCH_AI_CONCURRENCY, thread_name_prefix='batch-ai')
+        self._lookups = {}
+        self._analyses = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, kind, region, func):
+        """(종류, 지역) 단위로 한 번만 조회"""
+        key = (kind, analysis_region_tag(region))
+        if key not in self._lookups:
+            self._lookups[key] = metrics.submit(self._fetch_pool, self._timed, kind, func, region, self.language)
+        return self._lookups[key]
+
+    @staticmethod
+    def _timed(stage, func, *args):
+        with metrics.stage_span(stage):
+            return func(*args)
+
+    def _analyze(self, region, weather, wiki, location):
+        """같은 캐시 키의 분석이 진행 중이면 그 결과를 기다림"""
+        key = analysis_cache_key(region, weather, self.language, self.tier)
+        with self._lock:
+            future = self._analyses.get(key)
+            owner = future is None
+            if owner:
+                future = self._analyses[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            with metrics.stage_span('analysis'):
+                analysis = analyze_with_ai_enhanced(region, weather, wiki, self.language,
+                                                    max_model_wait=MODEL_MAX_WAIT_JOB, tier=self.tier,
+                                                    location=location, queue_timeout=MODEL_MAX_WAIT_JOB,
+                                                    overflow='fallback')
+            future.set_result(analysis)
+            return analysis
+        except Exception as e:
+            future.set_exception(e)
+            raise
+
+    def _run_region(self, index, entry, weather, started):
+        region, lat, lng = entry['region'], entry['lat'], entry['lng']
+        # 지역마다 AI 동시 실행 슬롯을 얻은 시점부터 마감 시각 적용
+        deadline.start(self.deadline_seconds)
+        results = {'weather': weather}
+        for kind in ('wiki', 'images'):
+            try:
+                results[kind] = self._lookups[(kind, analysis_region_tag(region))].result(timeout=deadline.remaining())
+            except FutureTimeout:
+                # 마감까지 끝나지 않은 조회는 대체 값 사용 (build_region_result)
+                pass
+        if not deadline.expired():
+            results['analysis'] = self._analyze(region, weather, results.get('wiki'),
+                                                (lat, lng, entry['admin_level']))
+        timings = {"total_ms": round((time.perf_counter() - started) * 1000, 1)}
+        return dict(build_region_result(region, lat, lng, self.language, results, timings, self.tier), index=index)
+
+    def run(self):
+        """지역별 결과를 끝나는 순서대로 생성 (실패한 지역은 error 포함)"""
+        started = time.perf_counter()
+        try:
+            with metrics.stage_span('weather'):
+                weathers = get_weather_batch([(entry['lat'], entry['lng']) for entry in self.entries])
+            for entry in self.entries:
+                self._lookup('wiki', entry['region'], get_wikipedia_info)
+                self._lookup('images', entry['region'], get_comprehensive_images)
+            
+            futures = {
+                metrics.submit(self._region_pool, self._run_region, index, entry, weather, started): (index, entry)
+                for index, (entry, weather) in enumerate(zip(self.entries, weathers))
+            }
+            for future in as_completed(futures):
+                index, entry = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.error(f"❌ 일괄 분석 오류 ({entry['region']}): {e}")
+                    yield {"index": index, "region": entry['region'], "error": str(e),
+                           "message": "정보를 가져오는 중 오류가 발생했습니다."}
+        finally:
+            # 클라이언트가 연결을 끊으면 아직 시작하지 않은 지역은 취소
+            self._region_pool.shutdown(wait=False, cancel_futures=True)
+            self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.route('/api/region-info/batch', methods=['POST'])
+def batch_region_info():
+    """여러 지역 일괄 분석 - 지역별 결과를 끝나는 순서대로 NDJSON(한 줄에 하나)으로 전송"""
+    data = request.json or {}
+    try:
+        entries = [
+            {"region": item.get('region', 'Unknown'), "lat": float(item.get('lat', 0)), "lng": float(item.get('lng', 0)),
+             "admin_level": admin_level(item.get('admin_level', ''))}
+            for item in data.get('regions') or []
+        ]
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({"error": "bad_request", "message": "regions 형식이 올바르지 않습니다."}), 400
+    if not entries:
+        return jsonify({"error": "bad_request", "message": "regions 값이 필요합니다."}), 400
+    if len(entries) > BATCH_MAX_REGIONS:
+        return jsonify({"error": "too_many_regions",
+                        "message": f"한 번에 최대 {BATCH_MAX_REGIONS}개 지역까지 분석할 수 있습니다."}), 400
+    
+    language = data.get('language', 'ko')
+    tier = analysis_tier(data.get('tier', 'full'))
+    region_deadline = deadline.resolve(data.get('deadline_ms'), deadline.JOB_DEADLINE_SECONDS)
+    batch = RegionBatch(entries, language, tier, region_deadline)
+    logger.info(f"📚 일괄 분석 시작: {len(entries)}개 지역 "
+                f"(AI 동시 실행 {BATCH_AI_CONCURRENCY})")
+    
+    def generate():
+        started = time.perf_counter()
+        failed = 0
+        for item in batch.run():
+            failed += 'error' in item
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"✅ 일괄 분석 완료: {len(entries)}개 지역, 실패 {failed}개 ({total_ms:.0f}ms)")
+        yield json.dumps({"done": True, "count": len(entries), "failed": failed, "total_ms": total_ms}) + "\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route('/api/region-info/<field>')
+def get_region_field(field):
+    """필드 하나만 수집 (/api/region-info/weather 등, fields=<field>와 같음)"""
+    if field not in REGION_FIELDS:
+        return jsonify({"error": "not_found", "message": f"알 수 없는 필드: {field}",
+                        "fields": list(REGION_FIELDS)}), 404
+    return get_region_info((field,))
+
+
+@app.route('/api/region-info', methods=['GET', 'POST'])
+def get_region_info(fields=None):
+    """메인 API 엔드포인트 - 모든 정보 수집
+
+    GET(쿼리 문자열)은 브라우저가 ETag로 재검증할 수 있어 같은 결과를 다시 볼 때 304를 받습니다.
+    compact=1이면 카테고리별 이미지 목록을 인덱스로 보냅니다.
+    fields=weather,wiki,images,analysis 중 일부를 지정하면 필요한 단계만 실행하고,
+    응답은 필드별 Cache-Control(REGION_FIELD_MAX_AGE)로 캐시할 수 있습니다.
+    """
+    data = {}
+    try:
+        data = request.args.to_dict() if request.method == 'GET' else (request.json or {})
+        try:
+            fields = fields or region_fields(data.get('fields'))
+        except ValueError as e:
+            return jsonify({"error": "invalid_fields", "message": str(e)}), 400
+        compact = str(data.get('compact', '')).lower() in ('1', 'true')
         region = data.get('region', 'Unknown')
-        lat = float(data.get('lat', 0))
-        lng = float(data.get('lng', 0))
+        try:
+            lat, lng = request_coordinates(data)
+        except ValueError as e:
+            return bad_coordinates(e)
         language = data.get('language', 'ko')
+        tier = analysis_tier(data.get('tier', 'full'))
+        level = admin_level(data.get('admin_level', ''))
+        deadline.start(deadline.resolve(data.get('deadline_ms')))
         
-        print(f"\n{'='*80}")
-        print(f"🌍 [{datetime.now().strftime('%H:%M:%S')}] 지역 분석 시작: {region}")
-        print(f"📍 좌표: ({lat:.4f}, {lng:.4f})")
-        print(f"🗣️ 언어: {language}")
-        print(f"{'='*80}\n")
-        
-        # Step 1: 실시간 날씨 (5초)
-        print("☁️  [1/5] 실시간 기상 데이터 수집 중...")
-        weather_data = get_weather_data(lat, lng)
-        print(f"   ✅ 기온: {weather_data['temperature']}°C, 습도: {weather_data['humidity']}%")
-        time.sleep(0.5)
-        
-        # Step 2: 위키피디아 (5초)
-        print("\n📚 [2/5] 위키피디아 배경 정보 수집 중...")
-        wiki_info = get_wikipedia_info(region, language)
-        if wiki_info:
-            print(f"   ✅ 정보 획득: {wiki_info['title']} ({len(wiki_info['full_text'])} 글자)")
-        else:
-            print(f"   ⚠️  위키피디아 정보 없음")
-        time.sleep(0.5)
-        
-        # Step 3: AI 초강력 분석 (60-120초)
-        print("\n🤖 [3/5] AI 초강력 전문 분석 진행 중... (60-120초 소요)")
-        print("   → 기후, 환경, 건축, 적응 원리, 쉬운 설명 생성")
-        analysis = analyze_with_ai_enhanced(region, weather_data, wiki_info, language)
-        print(f"   ✅ AI 분석 완료!")
-        print(f"      • 기후: {len(analysis['climate'])} 글자")
-        print(f"      • 환경: {len(analysis['environment'])} 글자")
-        print(f"      • 건축: {len(analysis['architecture'])} 글자")
-        print(f"      • 적응: {len(analysis['adaptation'])} 글자")
-        print(f"      • 쉬운 설명: {len(analysis['simple_explanation'])} 글자")
-        print(f"      • 건축물 예시: {len(analysis['building_examples'])}개")
-        time.sleep(0.5)
-        
-        # Step 4: 종합 이미지 검색 (15-30초)
-        print("\n🖼️  [4/5] 환경 + 건축물 이미지 종합 검색 중...")
-        images = get_comprehensive_images(region, language)
-        
-        architecture_imgs = [img for img in images if img['type'] == 'architecture']
-        environment_imgs = [img for img in images if img['type'] == 'environment']
-        
-        print(f"   ✅ 총 {len(images)}개 이미지 발견")
-        print(f"      • 건축물: {len(architecture_imgs)}개")
-        print(f"      • 환경/경관: {len(environment_imgs)}개")
-        time.sleep(0.5)
-        
-        # Step 5: 결과 생성 (즉시)
-        print("\n📦 [5/5] 최종 결과 생성 중...")
-        
-        result = {
-            "region": region,
-            "coordinates": {"lat": lat, "lng": lng},
-            "current_weather": weather_data,
-            "information": analysis,
-            "images": {
-                "all": images,
-                "architecture": architecture_imgs,
-                "environment": environment_imgs
-            },
-            "has_images": len(images) > 0,
-            "image_count": {
-                "total": len(images),
-                "architecture": len(architecture_imgs),
-                "environment": len(environment_imgs)
-            },
-            "data_sources": {
-                "wikipedia": wiki_info is not None,
-                "weather_api": True,
-                "ai_analysis": True,
-                "image_sources": ["Wikimedia Commons"]
-            },
-            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "wiki_summary": wiki_info['summary'] if wiki_info else None,
-            "language": language
-        }
+        logger.info(f"🌍 지역 분석 시작: {region} ({lat:.4f}, {lng:.4f}), 언어: {language}, 분석 단계: {tier}, "
+                    f"필드: {','.join(fields) if fields else '전체'}")
         
-        print(f"\n{'='*80}")
-        print(f"✅ 완료! {region}의 모든 정보를 성공적으로 수집했습니다")
-        print(f"   • 날씨 데이터: ✅")
-        print(f"   • 위키피디아: {'✅' if wiki_info else '❌'}")
-        print(f"   • AI 분석: ✅ (5개 섹션)")
-        print(f"   • 이미지: ✅ ({len(images)}개)")
-        print(f"{'='*80}\n")
+        # 날씨 · 위키피디아 · 이미지는 서로 독립적이므로 병렬 실행,
+        # AI 분석은 날씨와 위키피디아가 준비되는 즉시 시작
+        pipeline = build_region_pipeline(region, lat, lng, language, tier=tier, admin_level=level, fields=fields)
+        results, timings = pipeline.run()
+        result = build_region_result(region, lat, lng, language, results, timings, tier, compact, fields)
+
+        weather_data = results['weather']
+        wiki_info = results['wiki']
+        analysis = results['analysis']
+        images = results['images']
+
+        if fields is None and logger.isEnabledFor(logging.DEBUG):
+            architecture_imgs, environment_imgs = split_images(images)
+            logger.debug(f"☁️  기상 데이터: {weather_data['temperature']}°C, 습도: {weather_data['humidity']}%")
+            if wiki_info:
+                logger.debug(f"📚 위키피디아: {wiki_info['title']} ({len(wiki_info['full_text'])} 글자)")
+            else:
+                logger.debug("📚 위키피디아 정보 없음")
+            logger.debug("🤖 AI 분석: " + ", ".join(
+                f"{key} {len(analysis[key])} 글자" for key in ANALYSIS_SECTION_KEYS
+            ) + f", 건축물 예시 {len(analysis['building_examples'])}개")
+            logger.debug(f"🖼️  이미지 {len(images)}개 (건축물 {len(architecture_imgs)}, 환경/경관 {len(environment_imgs)})")
+
+        if result['partial']['stages'] or result['partial']['analysis_sections']:
+            logger.warning(f"⏱️ 일부 결과를 대체 분석으로 채움: {region} (단계: {result['partial']['stages']}, "
+                           f"섹션: {result['partial']['analysis_sections']})")
+        logger.info(f"✅ 완료: {region} ({timings['total_ms']:.0f}ms, "
+                    f"임계 경로: {' → '.join(timings['critical_path'])})")
         
-        return jsonify(result)
+        # ETag는 요청마다 달라지는 생성 시각 · 소요 시간을 뺀 내용(캐시된 날씨 · 위키 · 이미지 · 분석)으로 계산
+        etag = http_cache.content_etag({
+            key: value for key, value in result.items() if key not in ('generated_at', 'timings')
+        })
+        return http_cache.json_response(result, etag=etag, cache_control=region_cache_control(fields, result))
         
+    except admission.Overloaded as e:
+        logger.warning(f"🚦 요청 거절: {data.get('region', 'Unknown')} ({e})")
+        response = jsonify({"error": "overloaded", "message": "요청이 많아 잠시 후 다시 시도해 주세요.",
+                            "retry_after": e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
     except Exception as e:
-        print(f"\n❌ 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ 오류 발생: {e}")
         
         return jsonify({
             "error": str(e),
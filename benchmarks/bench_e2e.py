@@ -0,0 +1,256 @@
+"""종단 간 부하 벤치마크 - 대체 업스트림 서버 + gunicorn 앱에 /api/region-info 부하
+
+시나리오별 p50/p95/p99 지연 시간, 초당 요청 수, 평균 응답 크기(전송 바이트)와
+서버 측 직렬화 · 압축 시간(Server-Timing), 추론 배치 통계(/api/stats, 응답한 워커 하나의 누적값)를 JSON으로 출력합니다.
+
+사용법: python benchmarks/bench_e2e.py [--scenarios warm_cache,cold_cache] [--workers 2] [--threads 8]
+                                       [--json results.json]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_upstreams import start_stubs, stub_env  # noqa: E402
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# profile: 업스트림 설정 덮어쓰기 (stub_upstreams.DEFAULT_PROFILE 기준)
+# regions: 'repeat'이면 같은 지역 반복(캐시 적중), 'unique'이면 요청마다 다른 지역(캐시 미스)
+# accept_encoding(기본 identity), compact: 응답 형식, conditional: 첫 응답의 ETag로 재검증(If-None-Match)
+# clients: 요청을 나눠 보낼 클라이언트 수 (X-Forwarded-For, 없으면 모두 한 클라이언트)
+# env: 앱 환경변수 덮어쓰기 (다르면 그 시나리오 앞에서 앱을 다시 시작)
+SCENARIOS = {
+    'warm_cache': {'profile': {}, 'regions': 'repeat', 'requests': 200, 'concurrency': 16},
+    'warm_compact_gzip': {'profile': {}, 'regions': 'repeat', 'requests': 200, 'concurrency': 16,
+                          'accept_encoding': 'gzip', 'compact': True},
+    'warm_conditional': {'profile': {}, 'regions': 'repeat', 'requests': 200, 'concurrency': 16,
+                         'accept_encoding': 'gzip', 'compact': True, 'conditional': True},
+    'cold_cache': {'profile': {}, 'regions': 'unique', 'requests': 40, 'concurrency': 8},
+    'slow_commons': {'profile': {'commons': {'latency_ms': 1500}}, 'regions': 'unique', 'requests': 24, 'concurrency': 8},
+    'slow_model': {'profile': {'huggingface': {'latency_ms': 10000}}, 'regions': 'unique', 'requests': 16,
+                   'concurrency': 8},
+    # 수업 시간처럼 여러 사용자가 한꺼번에 서로 다른 지역을 조회 (INFERENCE_BATCH_WINDOW_MS=0과 비교)
+    'classroom_burst': {'profile': {}, 'regions': 'unique', 'requests': 32, 'concurrency': 16, 'clients': 16},
+    # 배치 크기는 승인 한도를 넘을 수 없으므로 한도와 배치 최대 크기를 함께 늘린 경우
+    # (한도 안에서는 요청이 대기열에 모이지 않고 단계 지연만큼 흩어져 도착하므로 창도 넓힘)
+    'classroom_burst_wide': {'profile': {}, 'regions': 'unique', 'requests': 32, 'concurrency': 16, 'clients': 16,
+                             'env': {'ADMISSION_LIMIT': '8', 'INFERENCE_BATCH_MAX': '8',
+                                     'INFERENCE_BATCH_WINDOW_MS': '150'}},
+    'flaky_upstreams': {
+        'profile': {name: {'error_rate': 0.2} for name in ('open_meteo', 'wikipedia', 'commons', 'huggingface')},
+        'regions': 'unique', 'requests': 40, 'concurrency': 8
+    },
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_app(env, workers, threads):
+    """gunicorn으로 앱 실행, 응답할 때까지 대기"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', str(threads),
+         '-b', f'127.0.0.1:{port}', '--timeout', '300', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base}/metrics", timeout=1).ok:
+                return process, base
+        except requests.ConnectionError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn이 시작되지 않았습니다")
+
+
+def percentile(sorted_values, pct):
+    """최근접 순위 백분위수"""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def server_timing(header):
+    """Server-Timing 헤더의 dur 합계(ms)"""
+    total = 0.0
+    for metric in (header or '').split(','):
+        for param in metric.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'dur':
+                total += float(value)
+    return total
+
+
+def run_scenario(base, name, scenario, servers):
+    for upstream, overrides in scenario['profile'].items():
+        servers[upstream].config.update(overrides)
+
+    def region(i):
+        if scenario['regions'] == 'repeat':
+            return {"region": "Bench-Seoul", "lat": 37.5665, "lng": 126.978}
+        # 요청마다 다른 이름과 날씨 격자 칸
+        return {"region": f"Bench-{name}-{i}-{time.time_ns()}", "lat": 10 + i * 0.05, "lng": 100 + i * 0.05}
+
+    headers = {'Accept-Encoding': scenario.get('accept_encoding', 'identity')}
+    clients = scenario.get('clients')
+
+    def request_headers(i):
+        if not clients:
+            return headers
+        return dict(headers, **{'X-Forwarded-For': f"10.0.{i % clients // 256}.{i % clients % 256}"})
+
+    def body(i):
+        return dict(region(i), compact=scenario.get('compact', False))
+
+    etag = None
+    if scenario['regions'] == 'repeat':
+        # 첫 요청으로 캐시를 채운 뒤 측정
+        etag = requests.post(f"{base}/api/region-info", json=body(0), headers=headers, timeout=300).headers.get('ETag')
+    if scenario.get('conditional') and etag:
+        headers['If-None-Match'] = etag
+
+    local = threading.local()
+
+    def call(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            # stream=True: 압축을 풀기 전 전송 크기(Content-Length)를 읽기 위함
+            response = session.post(f"{base}/api/region-info", json=body(i), headers=request_headers(i),
+                                    timeout=300, stream=True)
+            response.content
+            sample = (response.status_code, int(response.headers.get('Content-Length') or 0),
+                      server_timing(response.headers.get('Server-Timing')))
+        except requests.RequestException:
+            sample = (0, 0, 0.0)
+        return ((time.perf_counter() - started) * 1000,) + sample
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scenario['concurrency']) as executor:
+        samples = list(executor.map(call, range(scenario['requests'])))
+    elapsed = time.perf_counter() - started
+
+    for upstream, overrides in scenario['profile'].items():
+        for key in overrides:
+            servers[upstream].config[key] = servers[upstream].defaults[key]
+
+    try:
+        inference = requests.get(f"{base}/api/stats", timeout=10).json()['inference']
+    except (requests.RequestException, ValueError, KeyError):
+        inference = {}
+
+    latencies = sorted(sample[0] for sample in samples)
+    return {
+        "scenario": name,
+        "requests": scenario['requests'],
+        "concurrency": scenario['concurrency'],
+        "errors": sum(1 for _, status, _, _ in samples if status not in (200, 304)),
+        "not_modified": sum(1 for _, status, _, _ in samples if status == 304),
+        "bytes_mean": round(sum(size for _, _, size, _ in samples) / len(samples)),
+        "serialize_ms_mean": round(sum(ms for _, _, _, ms in samples) / len(samples), 2),
+        "rps": round(len(samples) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 1),
+        "max_ms": round(latencies[-1], 1),
+        "batch_max_size": inference.get('max_size'),
+        "mean_batch_size": inference.get('mean_batch_size'),
+        "profile": scenario['profile'],
+        "env": scenario.get('env', {})
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='쉼표로 구분한 시나리오 이름')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn 워커 수')
+    parser.add_argument('--threads', type=int, default=8, help='워커당 스레드 수')
+    parser.add_argument('--requests', type=int, help='시나리오별 요청 수 덮어쓰기')
+    parser.add_argument('--json', help='결과 JSON 파일 경로 (생략 시 표준 출력)')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+
+    servers = start_stubs()
+
+    workdir = tempfile.mkdtemp(prefix='bench-e2e-')
+    env = dict(os.environ, **stub_env(servers))
+    env.update({
+        'CACHE_DB_PATH': os.path.join(workdir, 'cache.db'),
+        'HF_API_KEY': 'bench',
+        'MODEL_WARMUP': '0',
+        'LOG_LEVEL': 'WARNING',
+        'GUNICORN_THREADS': str(args.threads),
+        # clients 시나리오의 X-Forwarded-For를 클라이언트로 구분
+        'ADMISSION_TRUST_FORWARDED': '1',
+    })
+
+    results = []
+    process = base = None
+    app_env = None
+    try:
+        for name in names:
+            scenario = dict(SCENARIOS[name])
+            if args.requests:
+                scenario['requests'] = args.requests
+            scenario_env = scenario.get('env', {})
+            if process is None or scenario_env != app_env:
+                if process is not None:
+                    process.terminate()
+                    process.wait(timeout=30)
+                process, base = start_app(dict(env, **scenario_env), args.workers, args.threads)
+                app_env = scenario_env
+            result = run_scenario(base, name, scenario, servers)
+            print(f"{name:>20}: p50 {result['p50_ms']:.0f}ms  p95 {result['p95_ms']:.0f}ms  "
+                  f"p99 {result['p99_ms']:.0f}ms  {result['rps']} req/s  {result['bytes_mean']}B  "
+                  f"serialize {result['serialize_ms_mean']}ms  batch {result['mean_batch_size']}"
+                  f"/{result['batch_max_size']}  errors {result['errors']}", file=sys.stderr)
+            results.append(result)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "app": {"workers": args.workers, "threads": args.threads},
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scenarios": results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
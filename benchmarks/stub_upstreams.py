@@ -0,0 +1,265 @@
+"""벤치마크용 업스트림 대체 서버 - Open-Meteo · 위키피디아 · Commons · Hugging Face 응답 흉내
+
+업스트림마다 지연 시간(평균 ± 지터), 오류율, 응답 크기를 설정할 수 있으며 실행 중에도
+config를 바꾸면 다음 요청부터 반영됩니다.
+
+단독 실행: python benchmarks/stub_upstreams.py [--latency-ms 50] [--error-rate 0.01]
+출력되는 환경변수를 앱 실행 환경에 지정하면 실제 API 대신 이 서버들을 사용합니다.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_section_parser import generate_output  # noqa: E402
+
+
+# latency_ms: 평균 응답 지연 (Hugging Face는 전체 생성 시간), jitter_ms: 정규분포 표준편차
+# error_rate: 오류 응답 비율, payload_kb: 응답 본문 크기
+DEFAULT_PROFILE = {
+    'open_meteo': {'latency_ms': 40, 'jitter_ms': 10, 'error_rate': 0.0, 'payload_kb': 1},
+    'wikipedia': {'latency_ms': 80, 'jitter_ms': 20, 'error_rate': 0.0, 'payload_kb': 5},
+    'commons': {'latency_ms': 120, 'jitter_ms': 30, 'error_rate': 0.0, 'payload_kb': 2},
+    'huggingface': {'latency_ms': 3000, 'jitter_ms': 300, 'error_rate': 0.0, 'payload_kb': 12},
+}
+
+WIKI_SENTENCES = [
+    "이 지역은 온대 몬순 기후로 여름철 강수가 집중되며 연평균 기온은 12°C 안팎이다.",
+    "The city lies in a river basin surrounded by granite mountains at an elevation of about 40 m.",
+    "전통 가옥은 목조 골조와 흙벽, 기와지붕으로 구성되며 온돌과 대청을 함께 갖춘다.",
+    "Major landmarks include a 14th-century palace complex and several Buddhist temples.",
+    "인구는 약 950만 명이며 행정 구역은 25개 자치구로 나뉜다.",
+    "The economy is dominated by services, finance and electronics manufacturing.",
+]
+
+
+def _sleep(config):
+    delay = random.gauss(config['latency_ms'], config['jitter_ms']) / 1000
+    time.sleep(max(delay, 0))
+
+
+def _filler(size_kb, rng=random):
+    """size_kb 크기가 될 때까지 위키 문장 반복"""
+    target = size_kb * 1024
+    parts = []
+    written = 0
+    while written < target:
+        sentence = rng.choice(WIKI_SENTENCES)
+        parts.append(sentence)
+        written += len(sentence.encode('utf-8')) + 1
+    return " ".join(parts)
+
+
+def open_meteo_response(query, config):
+    latitudes = query.get('latitude', ['0'])[0].split(',')
+    locations = []
+    for lat in latitudes:
+        locations.append({
+            "latitude": float(lat),
+            "current": {
+                "temperature_2m": round(random.uniform(-5, 30), 1), "relative_humidity_2m": random.randint(30, 90),
+                "wind_speed_10m": round(random.uniform(0, 20), 1), "wind_direction_10m": random.randint(0, 359),
+                "precipitation": 0.0, "apparent_temperature": 18.0, "pressure_msl": 1013,
+                "weather_code": random.choice([0, 1, 2, 3, 61]), "cloud_cover": random.randint(0, 100)
+            },
+            "daily": {
+                "temperature_2m_max": [24.0], "temperature_2m_min": [14.0], "precipitation_sum": [0.0],
+                "sunrise": ["2024-05-01T05:35"], "sunset": ["2024-05-01T19:22"]
+            },
+            # 응답 크기 조절용
+            "padding": "x" * max(config['payload_kb'] * 1024 - 400, 0)
+        })
+    return locations if len(locations) > 1 else locations[0]
+
+
+def wikipedia_response(path, query, config):
+    if '/api/rest_v1/page/summary/' in path:
+        title = path.rsplit('/', 1)[-1]
+        return {"title": title, "extract": " ".join(WIKI_SENTENCES[:3]), "description": "stub region"}
+    title = query.get('titles', ['Stub'])[0]
+    return {"query": {"pages": {"1": {
+        "title": title,
+        "extract": _filler(config['payload_kb']),
+        "categories": [{"title": f"Category:Stub {i}"} for i in range(10)]
+    }}}}
+
+
+def commons_response(query, config):
+    term = query.get('gsrsearch', ['stub'])[0].replace(' ', '_')
+    count = int(query.get('gsrlimit', ['8'])[0])
+    pages = {}
+    for index in range(count):
+        kind = 'temple' if index % 2 else 'landscape'
+        name = f"{term}_{kind}_{index}.jpg"
+        info = {"url": f"https://upload.wikimedia.org/stub/{name}", "width": 4000, "height": 3000,
+                "descriptionurl": "https://commons.wikimedia.org/wiki/File:stub.jpg"}
+        if 'iiurlwidth' in query:
+            width = int(query['iiurlwidth'][0])
+            info.update(thumburl=f"https://upload.wikimedia.org/stub/thumb/{name}/{width}px-{name}",
+                        thumbwidth=width, thumbheight=width * 3 // 4)
+        pages[str(1000 + index)] = {"index": index + 1, "title": f"File:{name}", "imageinfo": [info]}
+    return {"query": {"pages": pages}, "padding": "x" * max(config['payload_kb'] * 1024 - 200 * count, 0)}
+
+
+def make_handler(name, config):
+    """업스트림 name 흉내를 내는 요청 핸들러 클래스"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, body, headers=()):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in headers:
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _fail(self):
+            if random.random() < config['error_rate']:
+                self._send_json(502 if name != 'huggingface' else 500, {"error": "stub failure"})
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            _sleep(config)
+            if self._fail():
+                return
+            if name == 'open_meteo':
+                self._send_json(200, open_meteo_response(query, config))
+            elif name == 'wikipedia':
+                etag = '"stub-v1"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self._send_json(200, wikipedia_response(url.path, query, config), [('ETag', etag)])
+            elif name == 'commons':
+                self._send_json(200, commons_response(query, config))
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if name != 'huggingface':
+                self._send_json(405, {"error": "method not allowed"})
+                return
+            # 1토큰 예열 요청은 즉시 응답
+            if body.get('parameters', {}).get('max_new_tokens') == 1:
+                self._send_json(200, [{"generated_text": "."}])
+                return
+            if self._fail():
+                return
+
+            if isinstance(body.get('inputs'), list):
+                # 배치 입력: 한 번의 생성 시간으로 입력마다 결과 하나씩 (입력 순서 유지)
+                _sleep(config)
+                self._send_json(200, [[{"generated_text": generate_output(config['payload_kb'],
+                                                                          seed=random.randint(0, 1000))}]
+                                      for _ in body['inputs']])
+                return
+            text = generate_output(config['payload_kb'], seed=random.randint(0, 1000))
+            if not body.get('stream'):
+                _sleep(config)
+                self._send_json(200, [{"generated_text": text}])
+                return
+
+            # 토큰 스트리밍: 전체 지연 시간을 토큰 수로 나눠 일정 간격으로 전송
+            tokens = [line + "\n" for line in text.split("\n")]
+            total = max(random.gauss(config['latency_ms'], config['jitter_ms']), 0) / 1000
+            interval = total / max(len(tokens), 1)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for token in tokens:
+                    event = {"token": {"text": token, "special": False}}
+                    self.wfile.write(f"data:{json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(interval)
+            except (BrokenPipeError, ConnectionResetError):
+                # 앱이 섹션을 모두 받으면 연결을 끊어 생성을 조기 종료함
+                pass
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 앱(클라이언트)이 keep-alive 연결을 먼저 끊는 것은 정상 동작
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_stubs(profile=None, host='127.0.0.1'):
+    """업스트림별 대체 서버를 백그라운드 스레드로 시작, {이름: 서버} 반환
+
+    server.config를 바꾸면 설정이 바뀌고, server.defaults에 시작 시 설정이 남아 있습니다.
+    """
+    servers = {}
+    for name, defaults in DEFAULT_PROFILE.items():
+        config = dict(defaults, **(profile or {}).get(name, {}))
+        server = StubServer((host, 0), make_handler(name, config))
+        server.config = config
+        server.defaults = dict(config)
+        threading.Thread(target=server.serve_forever, name=f'stub-{name}', daemon=True).start()
+        servers[name] = server
+    return servers
+
+
+def stub_env(servers):
+    """앱이 대체 서버를 사용하도록 지정하는 환경변수"""
+    def base(name):
+        host, port = servers[name].server_address[:2]
+        return f"http://{host}:{port}"
+
+    return {
+        'OPEN_METEO_URL': f"{base('open_meteo')}/v1/forecast",
+        'WIKIPEDIA_URL': f"{base('wikipedia')}/{{lang}}",
+        'COMMONS_API_URL': f"{base('commons')}/w/api.php",
+        'HF_API_URL': f"{base('huggingface')}/models/stub",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, help='모든 업스트림의 평균 지연 (Hugging Face 제외)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    profile = {name: {'error_rate': args.error_rate} for name in DEFAULT_PROFILE}
+    if args.latency_ms is not None:
+        for name in ('open_meteo', 'wikipedia', 'commons'):
+            profile[name]['latency_ms'] = args.latency_ms
+    servers = start_stubs(profile)
+    for key, value in stub_env(servers).items():
+        print(f"export {key}='{value}'")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""gunicorn 워커 간 공유되는 SQLite 기반 TTL/LRU 캐시"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import metrics
+
+
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', 'cache.db')
+
+_local = threading.local()
+# 이미 만든 (스키마 이름, DB 경로) (프로세스당 한 번만 실행)
+_initialized = set()
+_init_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def ensure_schema(conn, path, name, create):
+    """create(conn)으로 테이블 · 색인 생성 (스키마 이름과 DB 경로마다 프로세스에서 한 번만 실행)"""
+    if (name, path) in _initialized:
+        return
+    with _init_lock:
+        if (name, path) in _initialized:
+            return
+        create(conn)
+        _initialized.add((name, path))
+
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created REAL NOT NULL,
+            expires REAL NOT NULL,
+            accessed REAL NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL DEFAULT 0,
+            tag TEXT,
+            PRIMARY KEY (namespace, key)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_tag ON cache_entries (namespace, tag)")
+
+
+def get_connection(path=CACHE_DB_PATH):
+    """스레드별 SQLite 연결 (WAL 모드로 여러 프로세스가 동시에 읽기 가능)"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        ensure_schema(conn, path, 'cache_entries', _create_table)
+        connections[path] = conn
+    return conn
+
+
+class SQLiteCache:
+    """네임스페이스 단위 JSON 캐시 (만료 시각 기준 TTL, 용량 초과 시 LRU 제거)
+
+    revalidate=True이면 만료된 항목도 재검증(ETag 등)을 위해 남겨 두고
+    용량 한도(max_bytes)에 따른 LRU 제거로만 정리합니다.
+    적중률과 적중 시 제공한 데이터의 경과 시간(staleness)을 프로세스별로 집계합니다.
+    """
+
+    def __init__(self, namespace, ttl, path=CACHE_DB_PATH, max_bytes=None, revalidate=False):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.path = path
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+        self._age_total = 0.0
+        self._age_max = 0.0
+
+    def get(self, key):
+        """유효한 값 반환, 없거나 만료되었으면 None"""
+        entry = self.get_entry(key)
+        if entry is None or not entry['fresh']:
+            return None
+        return entry['value']
+
+    def get_entry(self, key):
+        """만료 여부와 함께 항목 반환 (revalidate 캐시는 만료된 항목도 반환)"""
+        started = time.perf_counter()
+        now = time.time()
+        try:
+            conn = get_connection(self.path)
+            row = conn.execute(
+                "SELECT value, created, expires FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is not None and (row[2] > now or self.revalidate):
+                conn.execute(
+                    "UPDATE cache_entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 캐시 조회 오류 ({self.namespace}): {e}")
+            row = None
+
+        fresh = row is not None and row[2] > now
+        if fresh:
+            result = 'hit'
+        elif row is not None and self.revalidate:
+            result = 'stale'
+        else:
+            result = 'miss'
+        metrics.CACHE_LOOKUPS.inc(cache=self.namespace, result=result)
+        metrics.record_span('cache', self.namespace, time.perf_counter() - started, result=result)
+
+        with self._lock:
+            if result == 'miss':
+                self._misses += 1
+                return None
+            if result == 'stale':
+                self._stale += 1
+            else:
+                age = now - row[1]
+                self._hits += 1
+                self._age_total += age
+                self._age_max = max(self._age_max, age)
+        return {"value": json.loads(row[0]), "created": row[1], "fresh": fresh}
+
+    def set(self, key, value, ttl=None, tag=None):
+        """값 저장 (tag를 지정하면 invalidate(tag)로 한꺼번에 삭제 가능)"""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        try:
+            conn = get_connection(self.path)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created, expires, accessed, size, tag) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, now, now + (ttl or self.ttl), now, len(payload.encode('utf-8')), tag)
+            )
+            if self.max_bytes:
+                self._evict(conn)
+            # 가끔씩 만료된 항목 정리
+            if not self.revalidate and random.random() < 0.01:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND expires <= ?",
+                    (self.namespace, now)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 캐시 저장 오류 ({self.namespace}): {e}")
+
+    def touch(self, key, ttl=None):
+        """재검증 성공(304) 시 만료 시각만 연장"""
+        now = time.time()
+        try:
+            get_connection(self.path).execute(
+                "UPDATE cache_entries SET created = ?, expires = ?, accessed = ? WHERE namespace = ? AND key = ?",
+                (now, now + (ttl or self.ttl), now, self.namespace, key)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 캐시 갱신 오류 ({self.namespace}): {e}")
+
+    def invalidate(self, tag):
+        """태그가 같은 항목 모두 삭제, 삭제된 개수 반환"""
+        try:
+            cursor = get_connection(self.path).execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND tag = ?",
+                (self.namespace, tag)
+            )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 캐시 삭제 오류 ({self.namespace}): {e}")
+            return 0
+
+    def _evict(self, conn):
+        """용량 한도를 넘으면 가장 오래 사용되지 않은 항목부터 제거"""
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed",
+            (self.namespace,)
+        )
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((self.namespace, key))
+            total -= size
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        with self._lock:
+            self._evictions += len(victims)
+
+    def stats(self):
+        try:
+            entries, stored = get_connection(self.path).execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,)
+            ).fetchone()
+        except sqlite3.Error:
+            entries, stored = 0, 0
+
+        with self._lock:
+            lookups = self._hits + self._misses + self._stale
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "avg_staleness_s": round(self._age_total / self._hits, 1) if self._hits else 0.0,
+                "max_staleness_s": round(self._age_max, 1),
+                "ttl_s": self.ttl,
+                "entries": entries,
+                "bytes_stored": stored,
+                "max_bytes": self.max_bytes
+            }
@@ -0,0 +1,116 @@
+"""업스트림별 서킷 브레이커 - 장애 중인 의존 서비스는 타임아웃을 기다리지 않고 즉시 실패
+
+closed(정상) → 최근 호출의 오류율 또는 느린 호출 비율이 기준을 넘으면 open(즉시 실패)
+→ OPEN_SECONDS 뒤 half_open(시험 호출 PROBES개만 허용) → 시험 호출이 모두 성공하면 closed,
+하나라도 실패하면 다시 open. 상태는 프로세스(gunicorn 워커)별로 관리합니다.
+"""
+import collections
+import os
+import threading
+import time
+
+import metrics
+
+
+WINDOW = int(os.getenv('BREAKER_WINDOW', '20'))
+MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', '10'))
+FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', '0.5'))
+SLOW_RATE = float(os.getenv('BREAKER_SLOW_RATE', '0.8'))
+OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))
+PROBES = int(os.getenv('BREAKER_PROBES', '3'))
+
+STATES = ('closed', 'open', 'half_open')
+
+
+class CircuitOpen(Exception):
+    """서킷이 열려 있어 호출하지 않음"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} 서킷 열림 ({retry_in:.0f}초 뒤 재시도)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """최근 WINDOW개 호출 결과(실패 여부, 느린 호출 여부)로 상태를 판단
+
+    slow_seconds보다 오래 걸린 호출은 성공했더라도 느린 호출로 집계합니다.
+    """
+
+    def __init__(self, name, slow_seconds):
+        self.name = name
+        self.slow_seconds = slow_seconds
+        self.state = 'closed'
+        self._calls = collections.deque(maxlen=WINDOW)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        for state in STATES:
+            metrics.CIRCUIT_STATE.set(1 if state == self.state else 0, upstream=self.name, state=state)
+
+    def _transition(self, state):
+        self.state = state
+        self._probes = 0
+        self._probe_successes = 0
+        if state == 'open':
+            self._opened_at = time.monotonic()
+        self._calls.clear()
+        metrics.CIRCUIT_TRANSITIONS.inc(upstream=self.name, state=state)
+        self._publish()
+
+    def before_call(self):
+        """호출 가능 여부 확인, 열려 있으면 CircuitOpen (half_open이면 시험 호출 자리 확보)"""
+        with self._lock:
+            if self.state == 'open':
+                retry_in = self._opened_at + OPEN_SECONDS - time.monotonic()
+                if retry_in > 0:
+                    metrics.CIRCUIT_REJECTED.inc(upstream=self.name)
+                    raise CircuitOpen(self.name, retry_in)
+                self._transition('half_open')
+            if self.state == 'half_open':
+                if self._probes >= PROBES:
+                    metrics.CIRCUIT_REJECTED.inc(upstream=self.name)
+                    raise CircuitOpen(self.name, 0)
+                self._probes += 1
+
+    def record(self, failed, duration):
+        """호출 결과 기록 후 상태 전이"""
+        slow = duration >= self.slow_seconds
+        with self._lock:
+            if self.state == 'half_open':
+                if failed or slow:
+                    self._transition('open')
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= PROBES:
+                        self._transition('closed')
+                return
+            if self.state != 'closed':
+                return
+
+            self._calls.append((failed, slow))
+            if len(self._calls) < MIN_CALLS:
+                return
+            failures = sum(1 for f, _ in self._calls if f)
+            slows = sum(1 for _, s in self._calls if s)
+            if failures / len(self._calls) >= FAILURE_RATE or slows / len(self._calls) >= SLOW_RATE:
+                self._transition('open')
+
+    def release(self):
+        """결과를 판단하지 않은 호출(마감 초과 등)의 시험 호출 자리 반납"""
+        with self._lock:
+            if self.state == 'half_open' and self._probes > 0:
+                self._probes -= 1
+
+    def snapshot(self):
+        with self._lock:
+            calls = list(self._calls)
+            snapshot = {"state": self.state, "calls": len(calls),
+                        "failures": sum(1 for f, _ in calls if f), "slow": sum(1 for _, s in calls if s)}
+            if self.state == 'open':
+                snapshot["retry_in_s"] = round(max(self._opened_at + OPEN_SECONDS - time.monotonic(), 0), 1)
+        return snapshot
@@ -0,0 +1,92 @@
+"""요청 단위 마감 시각 - 모든 단계와 업스트림 호출이 남은 시간 안에서만 실행되도록
+
+마감 시각은 contextvars에 저장되므로 metrics.submit()/in_context()로 넘긴 스레드 작업도 같은 마감을 따릅니다.
+"""
+import contextvars
+import os
+import time
+
+
+# 대화형 요청(동기 · 스트리밍) 기본 마감, 백그라운드 작업 · 일괄 분석의 지역별 마감, 클라이언트 지정 허용 범위
+# 대화형 기본값은 AI 생성 시간(60-120초, 업스트림 타임아웃 150초)보다 길어야 정상 생성이 잘리지 않음
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '150'))
+JOB_DEADLINE_SECONDS = float(os.getenv('JOB_DEADLINE_SECONDS', '300'))
+MIN_DEADLINE_SECONDS = 1.0
+MAX_DEADLINE_SECONDS = float(os.getenv('MAX_DEADLINE_SECONDS', '600'))
+# 마감을 스스로 확인하는 작업(AI 생성 등)이 부분 결과를 돌려줄 때까지 더 기다리는 시간
+GRACE_SECONDS = 0.25
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """요청 마감 시각 초과 (partial에 그때까지 완성된 결과를 담을 수 있음)"""
+
+    def __init__(self, message="요청 마감 시각을 넘었습니다", partial=None):
+        super().__init__(message)
+        self.partial = partial
+
+
+def resolve(requested_ms, default=REQUEST_DEADLINE_SECONDS):
+    """클라이언트가 지정한 마감(밀리초)을 허용 범위의 초 단위로, 없거나 잘못된 값이면 기본값"""
+    try:
+        seconds = float(requested_ms) / 1000
+    except (TypeError, ValueError):
+        return default
+    return min(max(seconds, MIN_DEADLINE_SECONDS), MAX_DEADLINE_SECONDS)
+
+
+def start(seconds):
+    """현재 컨텍스트의 마감 시각을 지금부터 seconds초 뒤로 설정"""
+    _deadline.set(time.monotonic() + seconds)
+
+
+def clear():
+    _deadline.set(None)
+
+
+def current():
+    """현재 마감 시각(time.monotonic 기준), 없으면 None"""
+    return _deadline.get()
+
+
+def start_at(at):
+    """current()로 얻은 마감 시각으로 설정 (None이면 마감 없음)"""
+    _deadline.set(at)
+
+
+def remaining():
+    """남은 시간(초), 마감이 없으면 None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def grace_remaining():
+    """남은 시간 + GRACE_SECONDS, 마감이 없으면 None"""
+    left = remaining()
+    return None if left is None else left + GRACE_SECONDS
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check():
+    """마감이 지났으면 DeadlineExceeded"""
+    if expired():
+        raise DeadlineExceeded()
+
+
+def cap(seconds):
+    """seconds와 남은 시간 중 작은 값 (타임아웃 · 대기 시간 제한용)"""
+    left = remaining()
+    return seconds if left is None else min(seconds, left)
+
+
+def allows(seconds):
+    """seconds만큼 기다려도 마감 전인지 (재시도 백오프 판단용)"""
+    left = remaining()
+    return left is None or left > seconds
@@ -0,0 +1,134 @@
+"""Nominatim 지오코딩 프록시 - 캐시, 동일 조회 병합, 전역 1초 1회 제한
+
+역지오코딩은 좌표를 REVERSE_GRID_DEG 격자 칸으로 양자화해 칸 중심으로 조회 · 캐시하고,
+검색은 정규화한 검색어 단위로 캐시합니다. 같은 워커에서 동시에 들어온 같은 조회는 한 번만 요청합니다.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future
+
+import deadline
+import http_client
+from cache_store import SQLiteCache
+from rate_limit import SharedRateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = os.getenv('NOMINATIM_URL', "https://nominatim.openstreetmap.org")
+# Nominatim 사용 정책: 앱을 식별할 수 있는 User-Agent, 전체 초당 1회 이하
+NOMINATIM_USER_AGENT = os.getenv('NOMINATIM_USER_AGENT', 'climate-architecture-map/1.0')
+NOMINATIM_INTERVAL = float(os.getenv('NOMINATIM_INTERVAL', '1.0'))
+# 호출 순서를 기다리는 최대 시간 (넘으면 RateLimited), 요청 전체 마감
+GEOCODE_MAX_WAIT = float(os.getenv('GEOCODE_MAX_WAIT', '5'))
+GEOCODE_DEADLINE_SECONDS = float(os.getenv('GEOCODE_DEADLINE_SECONDS', '15'))
+
+# 역지오코딩 격자 (0.01도 ≈ 1km), 행정 구역 이름은 자주 바뀌지 않으므로 길게 유지
+REVERSE_GRID_DEG = float(os.getenv('REVERSE_GRID_DEG', '0.01'))
+REVERSE_CACHE_TTL = int(os.getenv('REVERSE_CACHE_TTL', str(30 * 86400)))
+GEOCODE_CACHE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', str(7 * 86400)))
+GEOCODE_LIMIT_MAX = 10
+
+# 지역 이름으로 쓸 행정 단위 (앞쪽 우선)
+ADMIN_LEVELS = ('city', 'town', 'county', 'state')
+WHITESPACE = re.compile(r"\s+")
+
+
+def reverse_tile(lat, lng):
+    """좌표를 격자 칸으로 양자화 (칸 키, 칸 중심 좌표)"""
+    row = round(lat / REVERSE_GRID_DEG)
+    col = round(lng / REVERSE_GRID_DEG)
+    return f"{REVERSE_GRID_DEG}:{row}:{col}", round(row * REVERSE_GRID_DEG, 6), round(col * REVERSE_GRID_DEG, 6)
+
+
+def normalize_query(query):
+    return WHITESPACE.sub(' ', query.strip()).lower()
+
+
+def parse_place(data):
+    """Nominatim 역지오코딩 응답 → 지역 이름 · 행정 단위"""
+    address = data.get('address') or {}
+    level = next((level for level in ADMIN_LEVELS if address.get(level)), '')
+    return {
+        "name": address[level] if level else 'Unknown',
+        "admin_level": level,
+        "display_name": data.get('display_name', ''),
+        "address": address
+    }
+
+
+class Geocoder:
+    """역지오코딩 · 검색 (캐시 → 진행 중 조회 합류 → 속도 제한 후 Nominatim 요청)"""
+
+    def __init__(self):
+        self.reverse_cache = SQLiteCache('reverse_geocode', ttl=REVERSE_CACHE_TTL)
+        self.search_cache = SQLiteCache('geocode', ttl=GEOCODE_CACHE_TTL)
+        self.limiter = SharedRateLimiter('nominatim', NOMINATIM_INTERVAL)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _coalesced(self, key, func, *args):
+        """같은 key의 조회가 진행 중이면 그 결과를 기다림"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result(timeout=deadline.remaining())
+        try:
+            result = func(*args)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _get(self, path, params):
+        self.limiter.acquire(deadline.cap(GEOCODE_MAX_WAIT))
+        response = http_client.get('nominatim', f"{NOMINATIM_URL}{path}", params=dict(params, format='json'),
+                                   headers={'User-Agent': NOMINATIM_USER_AGENT})
+        response.raise_for_status()
+        return response.json()
+
+    def reverse(self, lat, lng, language='ko'):
+        """좌표의 지역 이름 (같은 격자 칸은 캐시 공유)"""
+        tile, tile_lat, tile_lng = reverse_tile(lat, lng)
+        key = f"{language}:{tile}"
+        cached = self.reverse_cache.get(key)
+        if cached is not None:
+            return cached
+
+        def fetch():
+            place = parse_place(self._get('/reverse', {'lat': tile_lat, 'lon': tile_lng, 'accept-language': language}))
+            self.reverse_cache.set(key, place)
+            return place
+
+        return self._coalesced(('reverse', key), fetch)
+
+    def search(self, query, language='ko', limit=1):
+        """검색어의 위치 후보 목록"""
+        limit = min(max(int(limit), 1), GEOCODE_LIMIT_MAX)
+        key = f"{language}:{limit}:{normalize_query(query)}"
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        def fetch():
+            data = self._get('/search', {'q': query, 'accept-language': language, 'limit': limit})
+            results = [
+                {"lat": float(item['lat']), "lng": float(item['lon']), "display_name": item.get('display_name', '')}
+                for item in data if 'lat' in item and 'lon' in item
+            ]
+            self.search_cache.set(key, results)
+            return results
+
+        return self._coalesced(('search', key), fetch)
+
+    def stats(self):
+        return {"reverse": self.reverse_cache.stats(), "search": self.search_cache.stats()}
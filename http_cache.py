@@ -0,0 +1,96 @@
+"""JSON 응답 압축 협상(brotli / gzip)과 ETag 조건부 응답
+
+brotli 패키지가 설치되어 있으면 br을 우선 사용하고, 없으면 gzip만 제공합니다.
+"""
+import gzip
+import hashlib
+import json
+import time
+
+from flask import Response, request
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성
+    brotli = None
+
+
+# 이보다 작은 본문은 압축 이득보다 비용이 큼
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def choose_encoding(accept_encoding):
+    """Accept-Encoding에서 사용할 인코딩 선택 (br > gzip, q=0은 제외), 없으면 None"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    for encoding in (('br',) if brotli else ()) + ('gzip',):
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def content_etag(payload):
+    """값의 정규화된 JSON으로 만든 ETag 값 (따옴표 제외)"""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def json_response(payload, etag=None, status=200, cache_control='no-cache'):
+    """압축 · ETag를 적용한 JSON 응답
+
+    etag를 지정하면 인코딩별로 구분한 강한 ETag를 붙이고, If-None-Match가 같으면 본문 없이 304를 반환합니다.
+    직렬화 · 압축 시간과 크기는 Server-Timing 헤더와 요청 스팬에 기록됩니다.
+    """
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    tag = f"{etag}-{encoding}" if etag and encoding else etag
+    # 작은 본문은 압축하지 않고 인코딩 구분 없는 ETag로 보냈으므로 둘 다 확인
+    if etag and (request.if_none_match.contains(tag) or request.if_none_match.contains(etag)):
+        response = Response(status=304)
+        response.set_etag(tag if request.if_none_match.contains(tag) else etag)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+    started = time.perf_counter()
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    serialized = time.perf_counter()
+    raw_size = len(body)
+    timing = [f"serialize;dur={(serialized - started) * 1000:.2f}"]
+    metrics.record_span('serialize', 'json', serialized - started, bytes=raw_size)
+
+    response = Response(status=status, mimetype='application/json')
+    if encoding and raw_size >= COMPRESS_MIN_BYTES:
+        body = compress(body, encoding)
+        duration = time.perf_counter() - serialized
+        timing.append(f"compress;dur={duration * 1000:.2f};desc=\"{encoding} {raw_size}->{len(body)}\"")
+        metrics.record_span('serialize', encoding, duration, bytes=len(body))
+        response.headers['Content-Encoding'] = encoding
+    else:
+        # 인코딩과 관계없이 같은 본문이므로 ETag도 하나로
+        tag = etag
+    response.set_data(body)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Server-Timing'] = ", ".join(timing)
+    if tag:
+        response.set_etag(tag)
+    return response
@@ -0,0 +1,189 @@
+"""업스트림 공용 HTTP 클라이언트 - 호스트별 keep-alive 풀, 재시도, 백오프, 서킷 브레이커"""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import deadline
+import metrics
+from circuit_breaker import CircuitBreaker, CircuitOpen
+
+
+# 풀 크기: gunicorn 워커 스레드 수 × 요청당 동시 호출 수(이미지 검색어 5개)
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '4'))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', str(GUNICORN_THREADS * 5)))
+POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '10'))
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.3'))
+BACKOFF_CAP = float(os.getenv('HTTP_BACKOFF_CAP', '5'))
+
+# 업스트림별 설정 (HTTP_TIMEOUT_<NAME>, HTTP_RETRIES_<NAME>, HTTP_SLOW_<NAME> 환경변수로 변경 가능)
+# Hugging Face 503(모델 로딩)은 호출부에서 별도 처리하므로 재시도 대상에서 제외
+# retry_statuses 응답과 연결 오류 · 타임아웃은 서킷 브레이커에 실패로, slow(초) 이상 걸린 호출은 느린 호출로 집계
+UPSTREAMS = {
+    'open_meteo': {'timeout': 10, 'retries': 2, 'slow': 5, 'retry_statuses': {429, 500, 502, 503, 504}},
+    'wikipedia': {'timeout': 10, 'retries': 2, 'slow': 5, 'retry_statuses': {429, 500, 502, 503, 504}},
+    'commons': {'timeout': 10, 'retries': 2, 'slow': 5, 'retry_statuses': {429, 500, 502, 503, 504}},
+    'huggingface': {'timeout': 150, 'retries': 1, 'slow': 120, 'retry_statuses': {429, 500, 502, 504}},
+    'commons_media': {'timeout': 20, 'retries': 1, 'slow': 10, 'retry_statuses': {429, 500, 502, 503, 504}},
+    # Nominatim은 전역 속도 제한(geocoding)을 거쳐야 하므로 자체 재시도 없음
+    'nominatim': {'timeout': 10, 'retries': 0, 'slow': 5, 'retry_statuses': {429, 500, 502, 503, 504}},
+}
+
+for _name, _config in UPSTREAMS.items():
+    _config['timeout'] = float(os.getenv(f'HTTP_TIMEOUT_{_name.upper()}', _config['timeout']))
+    _config['retries'] = int(os.getenv(f'HTTP_RETRIES_{_name.upper()}', _config['retries']))
+    _config['slow'] = float(os.getenv(f'HTTP_SLOW_{_name.upper()}', _config['slow']))
+
+BREAKERS = {name: CircuitBreaker(name, config['slow']) for name, config in UPSTREAMS.items()}
+
+
+class UpstreamUnavailable(requests.ConnectionError):
+    """서킷이 열려 업스트림을 호출하지 않음"""
+
+
+_sessions = {}
+_counters = {}
+_lock = threading.Lock()
+
+
+def _get_session(upstream):
+    """업스트림별 세션 (커넥션 풀 재사용)"""
+    session = _sessions.get(upstream)
+    if session is None:
+        with _lock:
+            session = _sessions.get(upstream)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[upstream] = session
+                _counters[upstream] = {'requests': 0, 'retries': 0, 'errors': 0}
+    return session
+
+
+def _count(upstream, key):
+    with _lock:
+        _counters[upstream][key] += 1
+
+
+def _backoff(attempt):
+    """지터가 적용된 지수 백오프 (full jitter)"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _response_bytes(response, streamed):
+    """응답 크기 (스트리밍 응답은 본문을 소비하지 않도록 Content-Length 사용)"""
+    if response is None:
+        return 0
+    if streamed:
+        return int(response.headers.get('Content-Length') or 0)
+    return len(response.content)
+
+
+def request(upstream, method, url, timeout=None, **kwargs):
+    """업스트림 요청 (연결 오류, 재시도 대상 상태 코드는 백오프 후 재시도)
+
+    재시도를 모두 소진하면 마지막 응답을 반환하거나 마지막 예외를 그대로 발생시킵니다.
+    요청 마감 시각(deadline)이 있으면 타임아웃을 남은 시간으로 줄이고, 백오프 후 재시도할 시간이
+    없으면 재시도하지 않습니다. 이미 마감이 지났으면 DeadlineExceeded를 발생시킵니다.
+    업스트림 서킷이 열려 있으면 요청하지 않고 UpstreamUnavailable(requests.ConnectionError)을 발생시키므로
+    호출부의 기존 오류 처리(대체 값 반환)가 그대로 적용됩니다.
+    호출마다 소요 시간 · 응답 크기 · 상태 · 재시도 수를 메트릭과 현재 요청의 스팬에 기록합니다.
+    """
+    config = UPSTREAMS[upstream]
+    breaker = BREAKERS[upstream]
+    session = _get_session(upstream)
+    read_timeout = timeout if timeout is not None else config['timeout']
+    started = time.perf_counter()
+    retries = 0
+    response = None
+    rejected = False
+    metrics.UPSTREAM_IN_FLIGHT.inc(upstream=upstream)
+
+    try:
+        for attempt in range(config['retries'] + 1):
+            deadline.check()
+            timeouts = (deadline.cap(CONNECT_TIMEOUT), deadline.cap(read_timeout))
+            delay = _backoff(attempt)
+            try:
+                breaker.before_call()
+            except CircuitOpen as e:
+                rejected = True
+                raise UpstreamUnavailable(str(e)) from e
+            _count(upstream, 'requests')
+            attempt_started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeouts, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                _count(upstream, 'errors')
+                if deadline.expired():
+                    # 남은 시간으로 줄인 타임아웃은 업스트림 장애로 보지 않음
+                    breaker.release()
+                else:
+                    breaker.record(True, time.perf_counter() - attempt_started)
+                if attempt >= config['retries'] or not deadline.allows(delay):
+                    raise
+            else:
+                failed = response.status_code in config['retry_statuses']
+                breaker.record(failed, time.perf_counter() - attempt_started)
+                if not failed or attempt >= config['retries'] or not deadline.allows(delay):
+                    return response
+                _count(upstream, 'errors')
+                response.close()
+                response = None
+
+            _count(upstream, 'retries')
+            retries += 1
+            time.sleep(delay)
+    finally:
+        metrics.UPSTREAM_IN_FLIGHT.dec(upstream=upstream)
+        duration = time.perf_counter() - started
+        if response is not None:
+            status = response.status_code
+        else:
+            status = 'circuit_open' if rejected else 'error'
+        size = _response_bytes(response, kwargs.get('stream'))
+        metrics.UPSTREAM_DURATION.observe(duration, upstream=upstream, status=status)
+        metrics.UPSTREAM_BYTES.observe(size, upstream=upstream)
+        if retries:
+            metrics.UPSTREAM_RETRIES.inc(retries, upstream=upstream)
+        metrics.record_span('upstream', upstream, duration, status=status, bytes=size, retries=retries)
+
+
+def get(upstream, url, **kwargs):
+    return request(upstream, 'GET', url, **kwargs)
+
+
+def post(upstream, url, **kwargs):
+    return request(upstream, 'POST', url, **kwargs)
+
+
+def stats():
+    """업스트림별 요청/재시도 수, 서킷 상태와 호스트별 커넥션 풀 적중(재사용)/미스(신규 연결)"""
+    result = {}
+    with _lock:
+        sessions = dict(_sessions)
+        counters = {name: dict(c) for name, c in _counters.items()}
+
+    for upstream, session in sessions.items():
+        hosts = {}
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                hosts[pool.host] = {
+                    'requests': pool.num_requests,
+                    'pool_misses': pool.num_connections,
+                    'pool_hits': max(pool.num_requests - pool.num_connections, 0)
+                }
+        result[upstream] = dict(counters[upstream], hosts=hosts)
+
+    for upstream, breaker in BREAKERS.items():
+        result.setdefault(upstream, {})['circuit'] = breaker.snapshot()
+    return result
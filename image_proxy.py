@@ -0,0 +1,149 @@
+"""Commons 썸네일 URL 구성과 디스크 캐시 이미지 프록시 (/img/<hash>)
+
+검색 결과의 썸네일 URL은 등록(register) 시 해시로 바꿔 공유 SQLite에 기록하고,
+프록시는 등록된 해시만 받아 원본 서버에서 한 번 내려받은 뒤 IMAGE_CACHE_DIR에 보관합니다.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import random
+import re
+import threading
+import time
+
+import http_client
+import metrics
+from cache_store import SQLiteCache
+
+
+logger = logging.getLogger(__name__)
+
+# 갤러리 기본 썸네일 폭(Commons iiurlwidth)과 srcset으로 제공할 폭 목록
+THUMB_WIDTH = int(os.getenv('IMAGE_THUMB_WIDTH', '640'))
+THUMB_WIDTHS = tuple(sorted({int(w) for w in os.getenv('IMAGE_THUMB_WIDTHS', '320,640,1024').split(',') if w.strip()}
+                            | {THUMB_WIDTH}))
+
+IMAGE_PROXY = os.getenv('IMAGE_PROXY', '0') == '1'
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', 'image_cache')
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(500 * 1024 * 1024)))
+IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', str(5 * 1024 * 1024)))
+# 썸네일 URL은 내용이 바뀌지 않으므로 브라우저가 1년간 재검증 없이 사용
+IMAGE_MAX_AGE = 365 * 86400
+IMAGE_URL_TTL = 90 * 86400
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+THUMB_WIDTH_PATTERN = re.compile(r"/(\d+)px-([^/]+)$")
+
+
+class ImageTooLarge(Exception):
+    """IMAGE_MAX_BYTES를 넘는 이미지"""
+
+
+def thumbnail_urls(thumb_url, original_width=None):
+    """Commons 썸네일 URL의 폭 부분만 바꿔 THUMB_WIDTHS별 URL 생성 {폭: URL}
+
+    원본보다 넓은 썸네일은 만들 수 없으므로 제외하고, 썸네일 형식이 아니면 그 URL 하나만 반환합니다.
+    """
+    match = THUMB_WIDTH_PATTERN.search(thumb_url or '')
+    if not match:
+        return {THUMB_WIDTH: thumb_url} if thumb_url else {}
+    urls = {}
+    for width in THUMB_WIDTHS:
+        if original_width and width >= original_width:
+            continue
+        urls[width] = thumb_url[:match.start()] + f"/{width}px-{match.group(2)}"
+    return urls or {THUMB_WIDTH: thumb_url}
+
+
+class ImageProxy:
+    """해시 → 원본 URL 등록과 디스크 캐시 (파일: IMAGE_CACHE_DIR/<해시 앞 2자>/<해시>)"""
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.urls = SQLiteCache('image_urls', ttl=IMAGE_URL_TTL)
+        self._lock = threading.Lock()
+
+    def register(self, url):
+        """프록시 경로 반환 (/img/<hash>)"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        self.urls.set(key, url)
+        return f"/img/{key}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """캐시된 파일 경로와 Content-Type (없으면 내려받음), 등록되지 않은 해시면 None"""
+        if not HASH_PATTERN.match(key):
+            return None
+        url = self.urls.get(key)
+        if url is None:
+            return None
+        mimetype = mimetypes.guess_type(url)[0] or 'application/octet-stream'
+        path = self._path(key)
+        hit = os.path.exists(path)
+        metrics.CACHE_LOOKUPS.inc(cache='image', result='hit' if hit else 'miss')
+        if hit:
+            # 정리 순서(수정 시각) 갱신
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        else:
+            self._download(url, path)
+        return path, mimetype
+
+    def _download(self, url, path):
+        """내려받아 임시 파일에 쓴 뒤 이름 변경 (동시에 받아도 완성된 파일만 보임)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        response = http_client.get('commons_media', url, stream=True)
+        try:
+            response.raise_for_status()
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            size = 0
+            try:
+                with open(tmp, 'wb') as f:
+                    for chunk in response.iter_content(64 * 1024):
+                        size += len(chunk)
+                        if size > IMAGE_MAX_BYTES:
+                            raise ImageTooLarge(url)
+                        f.write(chunk)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        finally:
+            response.close()
+        # 가끔씩 용량 한도 확인
+        if random.random() < 0.02:
+            self._evict()
+
+    def _evict(self):
+        """용량 한도를 넘으면 오래 사용하지 않은 파일(수정 시각 기준)부터 삭제"""
+        with self._lock:
+            files = []
+            for root, _, names in os.walk(self.cache_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            if total <= self.max_bytes:
+                return
+            started = time.perf_counter()
+            removed = 0
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            logger.info(f"🧹 이미지 캐시 정리: {removed}개 삭제 ({(time.perf_counter() - started) * 1000:.0f}ms)")
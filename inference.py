@@ -0,0 +1,277 @@
+"""추론 백엔드 - 모델 호출 인터페이스(HTTP / 테스트용 스텁)와 동시 요청 마이크로 배칭
+
+INFERENCE_BATCH_WINDOW_MS 안에 들어온 같은 생성 설정의 프롬프트를 최대 INFERENCE_BATCH_MAX개까지 모아
+inputs 목록 하나로 보내고, 생성 결과를 순서대로 각 호출자에게 돌려줍니다.
+배치를 기다리는 호출자도 각자 모델 승인 자리(admission)를 잡고 있으므로 배치 크기는 ADMISSION_LIMIT를 넘을 수 없고,
+클라이언트당 동시 실행(ADMISSION_PER_CLIENT)도 제한되므로 큰 배치는 여러 클라이언트의 요청이 겹칠 때만 채워집니다.
+토큰 스트리밍은 호출자마다 연결이 필요하므로 배칭하지 않습니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import deadline
+import http_client
+import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# http(HF_API_URL) / stub(외부 호출 없는 고정 응답, 테스트 · 벤치마크용)
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'http')
+# 첫 프롬프트가 들어온 뒤 같은 배치에 합류할 요청을 기다리는 시간 (0이면 배칭하지 않음)
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '20'))
+# 0이면 모델 동시 실행 한도(ADMISSION_LIMIT)와 같게, 한도보다 크면 한도로 줄임 (batch_max_size)
+INFERENCE_BATCH_MAX = int(os.getenv('INFERENCE_BATCH_MAX', '0'))
+STUB_LATENCY_MS = float(os.getenv('INFERENCE_STUB_LATENCY_MS', '0'))
+
+STUB_HEADERS = (
+    "**1. 기후 특성 전문 분석 (Climatology)**",
+    "**2. 자연 환경 지리학적 분석 (Physical Geography)**",
+    "**3. 전통 건축 양식 건축학적 분석 (Architecture)**",
+    "**4. 기후 적응 건축 원리 환경공학적 분석 (Environmental Engineering)**",
+    "**5. 쉬운 추가 설명 (Simple Explanation)**"
+)
+
+
+def generated_text(item):
+    """생성 결과 항목 하나의 텍스트 (입력별로 후보 목록을 돌려주는 형식도 처리)"""
+    if isinstance(item, list):
+        item = item[0] if item else {}
+    if isinstance(item, dict):
+        return item.get('generated_text', '')
+    return str(item)
+
+
+def parse_generations(result, count):
+    """text-generation 응답 → 입력 순서대로 생성 텍스트 count개"""
+    if not isinstance(result, list) or not result:
+        if count == 1:
+            return [str(result)]
+        raise ValueError(f"배치 응답 형식 오류: {str(result)[:200]}")
+    if count == 1:
+        return [generated_text(result[0])]
+    if len(result) != count:
+        raise ValueError(f"배치 응답 개수 불일치 ({len(result)}개, 요청 {count}개)")
+    return [generated_text(item) for item in result]
+
+
+def batch_max_size(admission_limit, configured=INFERENCE_BATCH_MAX):
+    """실제로 채울 수 있는 배치 최대 크기 (설정값과 승인 한도 중 작은 값)"""
+    if not configured:
+        return admission_limit
+    if configured > admission_limit:
+        logger.warning(f"⚠️ INFERENCE_BATCH_MAX({configured})가 ADMISSION_LIMIT({admission_limit})보다 커서 "
+                       f"{admission_limit}개로 줄입니다")
+        return admission_limit
+    return configured
+
+
+class InferenceBackend(ABC):
+    """모델 호출 인터페이스
+
+    generate(prompts, parameters, max_wait): 프롬프트 목록을 한 번에 생성해 같은 순서의 텍스트 목록 반환
+    stream(prompt, parameters, max_wait): 토큰 스트림(SSE) 응답 (iter_lines() · close())
+    max_wait는 모델이 로딩 중일 때 기다릴 수 있는 최대 시간(초)입니다.
+    """
+    name = 'base'
+    # 여러 프롬프트를 한 요청으로 보낼 수 있는지
+    supports_batch = False
+
+    @abstractmethod
+    def generate(self, prompts, parameters, max_wait):
+        ...
+
+    @abstractmethod
+    def stream(self, prompt, parameters, max_wait):
+        ...
+
+    def state(self):
+        return {"status": "unknown"}
+
+
+class HTTPBackend(InferenceBackend):
+    """Hugging Face Inference API 형식의 text-generation 엔드포인트 (콜드 스타트는 warmup이 처리)"""
+    name = 'http'
+    supports_batch = True
+
+    def __init__(self, url, headers, warmup, upstream='huggingface'):
+        self.url = url
+        self.headers = headers
+        self.warmup = warmup
+        self.upstream = upstream
+
+    def _post(self, payload, max_wait, stream=False):
+        response = self.warmup.call(
+            lambda: http_client.post(self.upstream, self.url, headers=self.headers, json=payload, stream=stream),
+            max_wait
+        )
+        response.raise_for_status()
+        return response
+
+    def generate(self, prompts, parameters, max_wait):
+        # 프롬프트가 하나면 기존과 같은 문자열 입력
+        payload = {"inputs": prompts[0] if len(prompts) == 1 else list(prompts), "parameters": parameters,
+                   "stream": False}
+        return parse_generations(self._post(payload, max_wait).json(), len(prompts))
+
+    def stream(self, prompt, parameters, max_wait):
+        return self._post({"inputs": prompt, "parameters": parameters, "stream": True}, max_wait, stream=True)
+
+    def state(self):
+        return self.warmup.state()
+
+
+class _StubStream:
+    """스텁 생성 결과를 토큰 스트림 응답처럼 제공"""
+
+    def __init__(self, text):
+        self._lines = [line + "\n" for line in text.split("\n")]
+
+    def iter_lines(self):
+        for line in self._lines:
+            event = {"token": {"text": line, "special": False}}
+            yield f"data:{json.dumps(event, ensure_ascii=False)}".encode('utf-8')
+
+    def close(self):
+        pass
+
+
+class StubBackend(InferenceBackend):
+    """외부 호출 없이 다섯 섹션 형식의 고정 텍스트를 생성 (요청 한 번에 STUB_LATENCY_MS 지연)"""
+    name = 'stub'
+    supports_batch = True
+
+    def __init__(self, latency_ms=STUB_LATENCY_MS):
+        self.latency = latency_ms / 1000
+
+    def _text(self, prompt):
+        return "\n\n".join(
+            f"{header}\n- 스텁 분석 결과입니다 (입력 {len(prompt)}자). 실제 모델 응답이 아닙니다."
+            for header in STUB_HEADERS
+        )
+
+    def generate(self, prompts, parameters, max_wait):
+        time.sleep(self.latency)
+        return [self._text(prompt) for prompt in prompts]
+
+    def stream(self, prompt, parameters, max_wait):
+        time.sleep(self.latency)
+        return _StubStream(self._text(prompt))
+
+    def state(self):
+        return {"status": "warm", "backend": self.name}
+
+
+class _Batch:
+    __slots__ = ('prompts', 'futures', 'deadlines', 'full')
+
+    def __init__(self):
+        self.prompts = []
+        self.futures = []
+        # 호출자별 마감 시각 (deadline.current(), 마감이 없으면 None)
+        self.deadlines = []
+        self.full = threading.Event()
+
+    def latest_deadline(self):
+        """가장 늦은 마감 시각 (마감이 없는 호출자가 있으면 None)"""
+        return None if None in self.deadlines else max(self.deadlines)
+
+
+class MicroBatcher:
+    """동시에 들어온 생성 요청을 모아 backend.generate 한 번으로 처리
+
+    배치의 첫 호출자가 창(window) 동안 기다렸다가(가득 차면 바로) 전송 스레드를 시작합니다.
+    배치는 구성원 중 가장 늦은 마감 시각으로 보내므로 마감이 먼저 오는 호출자 때문에 다른 호출자가 실패하지 않고,
+    첫 호출자를 포함한 각 호출자는 자신의 마감까지만 기다립니다 (넘으면 DeadlineExceeded).
+    업스트림 호출 스팬은 첫 호출자의 요청에 기록되며, 생성 설정(parameters)과 max_wait가 같은 요청끼리만 묶습니다.
+    같은 배치 안의 동일한 프롬프트는 한 번만 생성해 모든 호출자에게 같은 결과를 돌려줍니다.
+    """
+
+    def __init__(self, backend, max_size, window_ms=INFERENCE_BATCH_WINDOW_MS):
+        self.backend = backend
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._prompts = 0
+        self._deduplicated = 0
+
+    @property
+    def enabled(self):
+        return self.backend.supports_batch and self.window > 0 and self.max_size > 1
+
+    def generate(self, prompt, parameters, max_wait):
+        """프롬프트 하나의 생성 텍스트 (가능하면 다른 요청과 묶어서 생성)"""
+        if not self.enabled:
+            return self._send([prompt], parameters, max_wait)[0]
+
+        key = (json.dumps(parameters, sort_keys=True), max_wait)
+        future = Future()
+        with self._lock:
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._pending[key] = _Batch()
+            batch.prompts.append(prompt)
+            batch.futures.append(future)
+            batch.deadlines.append(deadline.current())
+            if len(batch.prompts) >= self.max_size:
+                # 가득 찬 배치는 더 받지 않고 첫 호출자를 깨움
+                del self._pending[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            threading.Thread(target=metrics.in_context(self._send_batch), args=(batch, parameters, max_wait),
+                             name='inference-batch', daemon=True).start()
+
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeout:
+            # 전송 중 발생한 DeadlineExceeded도 TimeoutError이므로 아직 응답이 없는 경우만 마감 초과로 처리
+            if future.done():
+                raise
+            raise deadline.DeadlineExceeded("추론 배치 응답을 기다리는 중 요청 마감 시각을 넘었습니다")
+
+    def _send_batch(self, batch, parameters, max_wait):
+        """가장 늦은 구성원 마감으로 배치를 보내고 각 호출자의 Future에 결과 전달 (전송 스레드)"""
+        deadline.start_at(batch.latest_deadline())
+        unique = list(dict.fromkeys(batch.prompts))
+        if len(unique) < len(batch.prompts):
+            with self._lock:
+                self._deduplicated += len(batch.prompts) - len(unique)
+        try:
+            texts = dict(zip(unique, self._send(unique, parameters, max_wait)))
+        except Exception as e:
+            for waiting in batch.futures:
+                waiting.set_exception(e)
+            return
+        for waiting, prompt in zip(batch.futures, batch.prompts):
+            waiting.set_result(texts[prompt])
+
+    def _send(self, prompts, parameters, max_wait):
+        metrics.INFERENCE_BATCH_SIZE.observe(len(prompts), backend=self.backend.name)
+        with self._lock:
+            self._batches += 1
+            self._prompts += len(prompts)
+        if len(prompts) > 1:
+            logger.info(f"📦 추론 배치 전송: {len(prompts)}개 프롬프트 ({self.backend.name})")
+        return self.backend.generate(prompts, parameters, max_wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend.name, "enabled": self.enabled,
+                "window_ms": round(self.window * 1000, 1), "max_size": self.max_size,
+                "batches": self._batches, "prompts": self._prompts, "deduplicated": self._deduplicated,
+                "mean_batch_size": round(self._prompts / self._batches, 2) if self._batches else 0
+            }
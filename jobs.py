@@ -0,0 +1,202 @@
+"""비동기 분석 작업 관리 - 워커 풀 실행, 동일 요청 병합, 진행 상황 · 만료 관리
+
+작업 상태는 공유 SQLite 파일에 저장되므로 어느 gunicorn 워커에서든 조회할 수 있습니다.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_store import CACHE_DB_PATH, ensure_schema, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', '32'))
+JOB_TTL = int(os.getenv('JOB_TTL', '3600'))
+# 이 시간 동안 갱신이 없는 진행 중 작업은 (워커 종료 등으로) 중단된 것으로 간주
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '600'))
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobQueueFull(Exception):
+    """대기 중인 작업이 한도를 넘음"""
+
+
+class JobStoreError(Exception):
+    """작업 상태 저장소(SQLite)를 사용할 수 없음 (잠김 · 손상 등)"""
+
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            stages TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            subscribers INTEGER NOT NULL DEFAULT 1,
+            created REAL NOT NULL,
+            updated REAL NOT NULL,
+            expires REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (key, status)")
+
+
+class JobManager:
+    """지역 분석 작업 실행기
+
+    같은 key로 진행 중인 작업이 있으면 새 작업을 만들지 않고 기존 작업에 합류합니다.
+    run_job(params, on_stage_done)은 결과 dict를 반환해야 합니다.
+    """
+
+    def __init__(self, run_job, max_workers=JOB_WORKERS, max_queue=JOB_QUEUE_MAX, ttl=JOB_TTL, path=CACHE_DB_PATH):
+        self.run_job = run_job
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _conn(self):
+        conn = get_connection(self.path)
+        ensure_schema(conn, self.path, 'jobs', _create_table)
+        return conn
+
+    def submit(self, key, params, stages):
+        """작업 등록 또는 진행 중인 동일 작업에 합류, (작업, 합류 여부) 반환"""
+        try:
+            return self._submit(key, params, stages)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 작업 등록 오류: {e}")
+            raise JobStoreError(str(e)) from e
+
+    def _submit(self, key, params, stages):
+        now = time.time()
+        reserved = False
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM jobs WHERE expires <= ?", (now,))
+            placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE key = ? AND status IN ({placeholders}) AND updated > ? "
+                "ORDER BY created DESC LIMIT 1",
+                (key, *ACTIVE_STATUSES, now - JOB_STALE_SECONDS)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE jobs SET subscribers = subscribers + 1 WHERE id = ?", (row[0],))
+                conn.execute("COMMIT")
+                return self._get(row[0]), True
+
+            with self._lock:
+                if self._pending >= self.max_queue:
+                    raise JobQueueFull(f"대기 중인 작업이 너무 많습니다 ({self._pending}/{self.max_queue})")
+                self._pending += 1
+            reserved = True
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, key, status, params, stages, created, updated, expires) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, key, json.dumps(params, ensure_ascii=False),
+                 json.dumps({name: 'pending' for name in stages}), now, now, now + self.ttl)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            if reserved:
+                with self._lock:
+                    self._pending -= 1
+            raise
+
+        self._executor.submit(self._run, job_id, params)
+        return self._get(job_id), False
+
+    def _run(self, job_id, params):
+        self._update(job_id, status='running')
+
+        def on_stage_done(name, _value):
+            try:
+                job = self.get(job_id)
+            except JobStoreError:
+                return
+            if job:
+                stages = dict(job['stages'], **{name: 'done'})
+                self._update(job_id, stages=json.dumps(stages))
+
+        try:
+            result = self.run_job(params, on_stage_done)
+            self._update(job_id, status='done', result=json.dumps(result, ensure_ascii=False))
+        except Exception as e:
+            logger.error(f"❌ 작업 실패 ({job_id}): {e}")
+            self._update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _update(self, job_id, **fields):
+        now = time.time()
+        fields['updated'] = now
+        if fields.get('status') in ('done', 'failed'):
+            fields['expires'] = now + self.ttl
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        try:
+            self._conn().execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 작업 상태 저장 오류 ({job_id}): {e}")
+
+    def get(self, job_id):
+        """작업 상태 조회 (없거나 만료되었으면 None, 저장소 오류는 JobStoreError)"""
+        try:
+            return self._get(job_id)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 작업 조회 오류 ({job_id}): {e}")
+            raise JobStoreError(str(e)) from e
+
+    def _get(self, job_id):
+        row = self._conn().execute(
+            "SELECT id, status, params, stages, result, error, subscribers, created, updated, expires "
+            "FROM jobs WHERE id = ? AND expires > ?",
+            (job_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "params": json.loads(row[2]),
+            "stages": json.loads(row[3]),
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "subscribers": row[6],
+            "created": row[7],
+            "updated": row[8],
+            "expires": row[9]
+        }
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending
+        try:
+            rows = self._conn().execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE expires > ? GROUP BY status",
+                (time.time(),)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 작업 통계 조회 오류: {e}")
+            rows = []
+        return {"pending_in_worker": pending, "max_queue": self.max_queue, "by_status": dict(rows)}
@@ -0,0 +1,33 @@
+"""로그 설정 - 요청 스레드는 큐에 넣기만 하고, 별도 스레드가 stdout에 출력"""
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+
+_listener = None
+
+
+def setup_logging():
+    """루트 로거를 QueueHandler로 교체 (여러 번 호출해도 한 번만 설정)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, stream)
+    _listener.start()
+    # 종료 시 큐에 남은 로그까지 출력
+    atexit.register(_listener.stop)
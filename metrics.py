@@ -0,0 +1,192 @@
+"""지연 시간 계측 - 요청 단위 스팬 기록과 Prometheus 텍스트 형식 메트릭
+
+메트릭은 프로세스(gunicorn 워커)별로 집계되며, 스팬은 요청 처리 중 contextvars로 모읍니다.
+스레드 풀에서 실행되는 작업도 같은 요청의 스팬에 기록되도록 submit()/in_context()로 컨텍스트를 넘깁니다.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return "\n".join(lines)
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """현재 값 (진행 중인 요청 수 등)"""
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """블록 실행 중 1 증가"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', bound)])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {round(total, 6)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render():
+    """등록된 모든 메트릭을 Prometheus 텍스트 형식으로 직렬화"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+REQUEST_DURATION = Histogram('app_request_duration_seconds', 'API 요청 처리 시간', ('endpoint', 'status'))
+REQUESTS_IN_FLIGHT = Gauge('app_requests_in_flight', '처리 중인 API 요청 수', ('endpoint',))
+STAGE_DURATION = Histogram('app_stage_duration_seconds', '분석 단계별 소요 시간', ('stage',))
+STAGES_IN_FLIGHT = Gauge('app_stages_in_flight', '실행 중인 분석 단계 수', ('stage',))
+UPSTREAM_DURATION = Histogram('app_upstream_duration_seconds', '업스트림 호출 소요 시간 (재시도 포함)',
+                              ('upstream', 'status'))
+UPSTREAM_BYTES = Histogram('app_upstream_response_bytes', '업스트림 응답 크기', ('upstream',), buckets=BYTES_BUCKETS)
+UPSTREAM_RETRIES = Counter('app_upstream_retries_total', '업스트림 재시도 횟수', ('upstream',))
+UPSTREAM_IN_FLIGHT = Gauge('app_upstream_in_flight', '진행 중인 업스트림 호출 수', ('upstream',))
+CIRCUIT_STATE = Gauge('app_circuit_state', '업스트림 서킷 브레이커 상태 (현재 상태만 1)', ('upstream', 'state'))
+CIRCUIT_TRANSITIONS = Counter('app_circuit_transitions_total', '서킷 브레이커 상태 전이 횟수', ('upstream', 'state'))
+CIRCUIT_REJECTED = Counter('app_circuit_rejected_total', '서킷이 열려 즉시 실패한 호출 수', ('upstream',))
+ADMISSION_LIMIT = Gauge('app_admission_limit', 'AI 모델 단계 동시 실행 한도', ('pool',))
+ADMISSION_IN_USE = Gauge('app_admission_in_use', 'AI 모델 단계 실행 중 수', ('pool',))
+ADMISSION_QUEUE_DEPTH = Gauge('app_admission_queue_depth', 'AI 모델 단계 대기열 길이', ('pool',))
+ADMISSION_WAIT = Histogram('app_admission_wait_seconds', 'AI 모델 단계 자리 대기 시간', ('pool',))
+ADMISSION_REJECTED = Counter('app_admission_rejected_total', '자리를 얻지 못한 요청 수 (queue_full / timeout)',
+                             ('pool', 'reason'))
+INFERENCE_BATCH_SIZE = Histogram('app_inference_batch_size', '추론 요청 한 번에 보낸 프롬프트 수', ('backend',),
+                                 buckets=(1, 2, 4, 8, 16, 32))
+CACHE_LOOKUPS = Counter('app_cache_lookups_total', '캐시 조회 결과 (hit / miss / stale)', ('cache', 'result'))
+
+
+# 요청 단위 스팬 목록 (요청 밖에서는 None이라 기록하지 않음)
+_spans = contextvars.ContextVar('spans', default=None)
+
+
+def start_trace():
+    """현재 컨텍스트에서 새 스팬 목록 시작, 목록 반환"""
+    spans = []
+    _spans.set(spans)
+    return spans
+
+
+def record_span(kind, name, duration, **attrs):
+    """현재 요청에 스팬 추가 (duration은 초)"""
+    spans = _spans.get()
+    if spans is not None:
+        spans.append(dict(kind=kind, name=name, ms=round(duration * 1000, 1), **attrs))
+
+
+@contextmanager
+def stage_span(name):
+    """분석 단계 실행 구간 계측 (히스토그램 + 스팬)"""
+    started = time.perf_counter()
+    with STAGES_IN_FLIGHT.track(stage=name):
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            STAGE_DURATION.observe(duration, stage=name)
+            record_span('stage', name, duration)
+
+
+def in_context(func):
+    """현재 컨텍스트(스팬 목록 포함)에서 실행되도록 감싼 함수 반환 (스레드 대상 등)"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def submit(executor, func, *args, **kwargs):
+    """현재 컨텍스트를 유지한 채 executor에 작업 제출"""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
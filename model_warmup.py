@@ -0,0 +1,199 @@
+"""추론 모델 콜드 스타트 관리 - estimated_time 기반 재시도, 백그라운드 예열, 워커 간 상태 공유"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import deadline
+import http_client
+from cache_store import CACHE_DB_PATH, ensure_schema, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+WARMUP_INTERVAL = int(os.getenv('MODEL_WARMUP_INTERVAL', '300'))
+WARMUP_TIMEOUT = float(os.getenv('MODEL_WARMUP_TIMEOUT', '30'))
+# estimated_time이 없는 503 응답일 때 가정하는 로딩 시간
+DEFAULT_LOADING_SECONDS = 20.0
+# 로딩 중 재시도 간격 하한/상한
+MIN_RETRY_SECONDS = 1.0
+MAX_RETRY_SECONDS = 30.0
+
+
+class ModelCold(Exception):
+    """모델이 로딩 중이며 허용 대기 시간 안에 준비되지 않음"""
+
+    def __init__(self, wait_seconds):
+        super().__init__(f"모델 로딩 중 (예상 대기 {wait_seconds:.0f}초)")
+        self.wait_seconds = wait_seconds
+
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS model_state (
+            name TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            ready_at REAL NOT NULL DEFAULT 0,
+            checked_at REAL NOT NULL DEFAULT 0,
+            lease_until REAL NOT NULL DEFAULT 0
+        )
+    """)
+
+
+def parse_estimated_time(response):
+    """503 응답 본문의 estimated_time(초) 추출"""
+    try:
+        return float(response.json().get('estimated_time', DEFAULT_LOADING_SECONDS))
+    except (ValueError, AttributeError):
+        return DEFAULT_LOADING_SECONDS
+
+
+class ModelWarmup:
+    """모델 warm/cold 상태를 공유 SQLite에 기록하고, 요청 경로에서 대기 여부를 판단
+
+    status: unknown(확인 전) / warm / loading(ready_at까지 로딩 예상) / error
+    """
+
+    def __init__(self, name, url, headers, path=CACHE_DB_PATH):
+        self.name = name
+        self.url = url
+        self.headers = headers
+        self.path = path
+        self._thread = None
+
+    def _conn(self):
+        conn = get_connection(self.path)
+        ensure_schema(conn, self.path, f"model_state:{self.name}", self._create_state)
+        return conn
+
+    def _create_state(self, conn):
+        _create_table(conn)
+        conn.execute("INSERT OR IGNORE INTO model_state (name, status) VALUES (?, 'unknown')", (self.name,))
+
+    def state(self):
+        """공유 상태 조회 (요청 경로에서 호출되므로 저장소 오류는 unknown으로 처리)"""
+        try:
+            row = self._conn().execute(
+                "SELECT status, ready_at, checked_at FROM model_state WHERE name = ?", (self.name,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 모델 상태 조회 오류: {e}")
+            return {"status": "unknown", "expected_wait_s": 0, "checked_at": None}
+        return {
+            "status": row[0],
+            "expected_wait_s": round(max(row[1] - time.time(), 0), 1) if row[0] == 'loading' else 0,
+            "checked_at": row[2]
+        }
+
+    def expected_wait(self):
+        """모델 준비까지 예상 대기 시간(초), warm/unknown이면 0"""
+        return self.state()["expected_wait_s"]
+
+    def _set(self, status, ready_at=0.0):
+        try:
+            self._conn().execute(
+                "UPDATE model_state SET status = ?, ready_at = ?, checked_at = ? WHERE name = ?",
+                (status, ready_at, time.time(), self.name)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 모델 상태 저장 오류: {e}")
+
+    def mark_warm(self):
+        self._set('warm')
+
+    def mark_loading(self, estimated_seconds):
+        self._set('loading', time.time() + estimated_seconds)
+
+    def call(self, send, max_wait):
+        """send()로 요청, 503(로딩 중)이면 estimated_time만큼 기다렸다 재시도
+
+        예상 대기가 max_wait(요청 마감이 더 가까우면 남은 시간)를 넘으면 워커를 붙잡지 않고
+        즉시 ModelCold를 발생시킵니다.
+        """
+        max_wait = deadline.cap(max_wait)
+        give_up_at = time.time() + max_wait
+        wait = self.expected_wait()
+        if wait > max_wait:
+            raise ModelCold(wait)
+        if wait > 0:
+            time.sleep(wait)
+
+        while True:
+            response = send()
+            if response.status_code != 503:
+                if response.ok:
+                    self.mark_warm()
+                return response
+
+            estimated = parse_estimated_time(response)
+            response.close()
+            self.mark_loading(estimated)
+            retry_in = min(max(estimated, MIN_RETRY_SECONDS), MAX_RETRY_SECONDS)
+            if time.time() + retry_in > give_up_at:
+                raise ModelCold(estimated)
+            logger.info(f"⏳ 모델 로딩 중... {retry_in:.0f}초 후 재시도 (예상 {estimated:.0f}초)")
+            time.sleep(retry_in)
+
+    def _acquire_lease(self, seconds):
+        """여러 워커 중 하나만 예열 요청을 보내도록 임대(lease) 획득"""
+        now = time.time()
+        try:
+            cursor = self._conn().execute(
+                "UPDATE model_state SET lease_until = ? WHERE name = ? AND lease_until <= ?",
+                (now + seconds, self.name, now)
+            )
+            return cursor.rowcount == 1
+        except sqlite3.Error:
+            return False
+
+    def ping(self):
+        """최소 생성 요청으로 모델 로딩 유도, 다음 확인까지 대기할 시간(초) 반환"""
+        payload = {
+            "inputs": "ping",
+            "parameters": {"max_new_tokens": 1, "return_full_text": False},
+            "options": {"wait_for_model": False}
+        }
+        try:
+            response = http_client.post('huggingface', self.url, headers=self.headers, json=payload,
+                                        timeout=WARMUP_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"⚠️ 모델 예열 요청 실패: {e}")
+            self._set('error')
+            return WARMUP_INTERVAL
+
+        if response.status_code == 503:
+            estimated = parse_estimated_time(response)
+            self.mark_loading(estimated)
+            logger.info(f"🔥 모델 예열 중 (예상 {estimated:.0f}초)")
+            return min(max(estimated, MIN_RETRY_SECONDS), MAX_RETRY_SECONDS)
+        if response.ok:
+            self.mark_warm()
+        else:
+            self._set('error')
+        return WARMUP_INTERVAL
+
+    def start(self):
+        """시작 시 즉시, 이후 주기적으로 예열 (데몬 스레드)"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                delay = WARMUP_INTERVAL
+                try:
+                    if self._acquire_lease(WARMUP_INTERVAL):
+                        delay = self.ping()
+                        if delay < WARMUP_INTERVAL:
+                            # 로딩 중에는 임대를 짧게 잡아 곧바로 다시 확인
+                            self._conn().execute(
+                                "UPDATE model_state SET lease_until = ? WHERE name = ?",
+                                (time.time() + delay, self.name)
+                            )
+                except sqlite3.Error as e:
+                    # 다른 워커가 잠근 경우 등 - 스레드를 끝내지 않고 다음 주기에 다시 시도
+                    logger.warning(f"⚠️ 모델 예열 상태 저장 오류: {e}")
+                time.sleep(delay)
+
+        self._thread = threading.Thread(target=loop, name='model-warmup', daemon=True)
+        self._thread.start()
@@ -0,0 +1,109 @@
+"""지역 분석 파이프라인 - 의존성 기반 단계 병렬 실행기"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import deadline
+import metrics
+
+
+class StagePipeline:
+    """의존성 그래프에 따라 독립적인 단계를 병렬로 실행
+
+    각 단계는 의존하는 단계의 결과를 위치 인자로 받습니다.
+    의존 단계가 모두 끝나는 즉시 시작되며, 단계별 시작/종료 시각을
+    기록해 임계 경로(critical path)를 계산합니다.
+    단계는 호출한 요청의 컨텍스트에서 실행되어 소요 시간이 단계 메트릭과 요청 스팬에 기록됩니다.
+    요청 마감 시각이 지나면 끝나지 않은 단계를 기다리지 않고, 완료된 결과만 반환합니다
+    (미완료 단계는 timings["incomplete"]).
+    """
+
+    def __init__(self, max_workers=None):
+        self.stages = {}
+        self.max_workers = max_workers
+
+    def add_stage(self, name, func, depends_on=()):
+        """단계 등록 (의존 단계는 먼저 등록되어 있어야 함)"""
+        if name in self.stages:
+            raise ValueError(f"중복된 단계 이름: {name}")
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"알 수 없는 의존 단계: {dep}")
+        self.stages[name] = {"func": func, "depends_on": tuple(depends_on)}
+        return self
+
+    def run(self, on_stage_done=None):
+        """모든 단계 실행 후 (결과, 타이밍) 반환
+
+        on_stage_done(name, result)를 지정하면 각 단계가 끝나는 즉시 호출합니다.
+        마감 시각이 지나 끝나지 않은 단계는 결과에 포함되지 않습니다.
+        """
+        results = {}
+        timings = {}
+        pending = dict(self.stages)
+        running = {}
+        started_at = time.perf_counter()
+
+        def submit_ready(executor):
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage["depends_on"]):
+                    args = [results[dep] for dep in stage["depends_on"]]
+                    timings[name] = {"start": time.perf_counter() - started_at}
+                    running[metrics.submit(executor, self._run_stage, name, stage["func"], *args)] = name
+                    del pending[name]
+
+        workers = self.max_workers or max(len(self.stages), 1)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            submit_ready(executor)
+            while running:
+                done, _ = wait(running, timeout=deadline.grace_remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    # 마감 초과: 실행 중인 단계는 스스로 마감을 확인하고 끝나도록 두고 기다리지 않음
+                    break
+                for future in done:
+                    name = running.pop(future)
+                    end = time.perf_counter() - started_at
+                    timings[name]["end"] = end
+                    timings[name]["duration"] = end - timings[name]["start"]
+                    error = future.exception()
+                    if error is not None:
+                        for other in running:
+                            other.cancel()
+                        raise error
+                    results[name] = future.result()
+                    if on_stage_done:
+                        on_stage_done(name, results[name])
+                submit_ready(executor)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        incomplete = [name for name in self.stages if name not in results]
+        return results, self._summarize(timings, time.perf_counter() - started_at, incomplete)
+
+    @staticmethod
+    def _run_stage(name, func, *args):
+        with metrics.stage_span(name):
+            return func(*args)
+
+    def _summarize(self, timings, total, incomplete=()):
+        """단계별 타이밍과 임계 경로 정리 (초 → 밀리초)"""
+        finished = {name: t for name, t in timings.items() if "end" in t}
+        stages = {
+            name: {key: round(value * 1000, 1) for key, value in t.items()}
+            for name, t in finished.items()
+        }
+
+        # 가장 늦게 끝난 단계에서 시작해, 가장 늦게 끝난 의존 단계를 역추적
+        path = []
+        current = max(finished, key=lambda n: finished[n]["end"]) if finished else None
+        while current:
+            path.append(current)
+            deps = self.stages[current]["depends_on"]
+            current = max(deps, key=lambda n: finished[n]["end"]) if deps else None
+
+        return {
+            "stages": stages,
+            "critical_path": list(reversed(path)),
+            "total_ms": round(total * 1000, 1),
+            "incomplete": list(incomplete)
+        }
@@ -0,0 +1,107 @@
+"""인기 지역 사전 생성 CLI - 지역 목록의 전체 분석 파이프라인을 실행해 스냅샷 파일로 저장
+
+사용법: python prewarm.py regions.csv [--languages ko,en] [--tier full] [--concurrency 4]
+                          [--output snapshot.bin] [--merge]
+지역 목록은 한 줄에 '이름,위도,경도[,행정 단위]'이며 빈 줄과 #으로 시작하는 줄은 무시합니다.
+앱은 시작 시 SNAPSHOT_PATH 파일을 메모리 매핑해 캐시에 없는 지역의 위키피디아 · 이미지 · AI 분석에 사용합니다.
+"""
+import argparse
+import csv
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from snapshot import SNAPSHOT_PATH, Snapshot, SnapshotWriter
+
+
+def read_regions(path):
+    """지역 목록 파일 → [(이름, 위도, 경도, 행정 단위)]"""
+    regions = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, row in enumerate(csv.reader(f), 1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            if len(row) < 3:
+                raise ValueError(f"{path}:{line_no}: '이름,위도,경도[,행정 단위]' 형식이 아닙니다")
+            level = row[3].strip() if len(row) > 3 else ''
+            regions.append((row[0].strip(), float(row[1]), float(row[2]), level))
+    return regions
+
+
+def prewarm_region(app, region, lat, lng, level, language, tier):
+    """한 지역의 파이프라인 실행 → 스냅샷 항목 [(네임스페이스, 키, 값)]
+
+    실패한 단계와 대체 분석(모델 실패 · 대기 초과)은 저장하지 않습니다.
+    """
+    app.admission.set_client('prewarm')
+    pipeline = app.build_region_pipeline(region, lat, lng, language, max_model_wait=app.MODEL_MAX_WAIT_JOB, tier=tier,
+                                         admin_level=level, queue_timeout=app.MODEL_MAX_WAIT_JOB, overflow='fallback')
+    results, _ = pipeline.run()
+    entries = []
+    if results.get('wiki'):
+        entries.append(('wikipedia', app.wiki_cache_key(region, language), results['wiki']))
+    if results.get('images'):
+        entries.append(('images', f"{language}:{region}", results['images']))
+
+    weather = results.get('weather')
+    analysis = results.get('analysis')
+    if weather and analysis is not None and analysis.get('nearby'):
+        # 인근 지역 분석을 재사용한 경우 이 지역 분석을 따로 생성
+        analysis = app.analyze_with_ai_enhanced(region, weather, results.get('wiki'), language,
+                                                max_model_wait=app.MODEL_MAX_WAIT_JOB, tier=tier,
+                                                queue_timeout=app.MODEL_MAX_WAIT_JOB, overflow='fallback')
+    # 모델이 생성했거나 캐시에 있던 분석만 저장 (대체 분석은 fallback_sections가 있음)
+    if analysis and not analysis.get('fallback_sections') and not analysis.get('nearby'):
+        entries.append(('analysis', app.snapshot_analysis_key(region, language, tier), analysis))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('regions', help="지역 목록 파일 ('이름,위도,경도[,행정 단위]')")
+    parser.add_argument('--languages', default='ko', help='쉼표로 구분한 언어 목록')
+    parser.add_argument('--tier', default='full', choices=('full', 'summary'))
+    parser.add_argument('--concurrency', type=int, default=4, help='동시에 처리할 지역 수')
+    parser.add_argument('--output', default=SNAPSHOT_PATH)
+    parser.add_argument('--merge', action='store_true', help='기존 스냅샷 항목을 유지하고 새 결과로 덮어씀')
+    args = parser.parse_args()
+
+    regions = read_regions(args.regions)
+    languages = [language.strip() for language in args.languages.split(',') if language.strip()]
+
+    import app
+
+    # 기존 스냅샷 대신 실제로 생성하고, 이미지는 배포 서버마다 다른 프록시 해시 대신 원본 URL로 저장
+    app.snapshot = Snapshot('')
+    app.image_proxy.IMAGE_PROXY = False
+
+    writer = SnapshotWriter()
+    if args.merge:
+        for namespace, key, value in Snapshot(args.output).items():
+            writer.add(namespace, key, value)
+
+    tasks = [(region, lat, lng, level, language) for region, lat, lng, level in regions for language in languages]
+    started = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as executor:
+        futures = [(task, executor.submit(prewarm_region, app, *task, args.tier)) for task in tasks]
+        for (region, _, _, _, language), future in futures:
+            try:
+                entries = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {region} ({language}): {e}", file=sys.stderr)
+                continue
+            for entry in entries:
+                writer.add(*entry)
+            names = ", ".join(namespace for namespace, _, _ in entries) or '없음'
+            print(f"✅ {region} ({language}): {names}")
+
+    size = writer.write(args.output)
+    print(f"\n📀 {args.output}: {len(writer)}개 항목, {size / 1024:.0f}KB "
+          f"({len(tasks) - failed}/{len(tasks)}개 지역, {time.perf_counter() - started:.1f}초)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""AI 분석 프롬프트 구성 - 토큰 단위 입력 예산, 섹션별 출력 예산, 템플릿 버전 관리"""
+import math
+import os
+import re
+
+from section_parser import SECTION_KEYS
+
+
+# 프롬프트 문구, 섹션 구성, 파싱 방식을 바꾸면 올려서 캐시된 분석 결과를 무효화
+PROMPT_TEMPLATE_VERSION = "3"
+
+# 위키피디아 배경 정보에 쓸 입력 토큰 예산
+WIKI_CONTEXT_TOKENS = int(os.getenv('WIKI_CONTEXT_TOKENS', '700'))
+
+# 섹션별 출력 토큰 예산 (한국어는 같은 분량에 영어보다 토큰이 많이 듦)
+SECTION_OUTPUT_TOKENS = {
+    'ko': {'climate': 800, 'environment': 700, 'architecture': 1000, 'adaptation': 900, 'simple_explanation': 600},
+    'en': {'climate': 450, 'environment': 400, 'architecture': 600, 'adaptation': 550, 'simple_explanation': 350}
+}
+
+# 분석 단계(tier)별 생성할 섹션
+ANALYSIS_TIERS = {
+    'full': SECTION_KEYS,
+    'summary': ['climate', 'simple_explanation']
+}
+
+# 배경 문장 선택 시 가중치를 주는 주제어
+CONTEXT_KEYWORDS = re.compile(
+    "기후|기온|강수|습도|계절|몬순|태풍|지형|산맥|하천|평야|분지|해발|토양|식생|건축|궁|사찰|전통|목조|석조|가옥|"
+    "climate|temperat|rain|precipit|humid|season|monsoon|terrain|mountain|river|plain|basin|elevation|soil|"
+    "vegetation|architect|palace|temple|traditional|building|house|timber|stone"
+)
+
+# Mixtral(SentencePiece) 토큰 수 근사: 한글 음절·숫자·기호는 1토큰, 라틴 단어는 약 4자당 1토큰
+TOKEN_PATTERN = re.compile(r'[A-Za-z]+|[^\sA-Za-z]')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?。])\s+|\n+')
+
+
+def estimate_tokens(text):
+    """모델 토크나이저 기준 토큰 수 추정 (문자 수가 아닌 토큰 단위 예산용)"""
+    count = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        count += math.ceil(len(piece) / 4) if piece[0].isascii() and piece[0].isalpha() else 1
+    return count
+
+
+def select_context(text, budget):
+    """예산 안에서 정보량이 많은 문장을 골라 원래 순서대로 연결
+
+    점수 = 주제어 수 + 앞부분 가중치(도입부가 보통 지역 개요), 토큰당 점수가 높은 순으로 채움
+    """
+    if not text:
+        return ""
+    sentences = [s.strip() for s in SENTENCE_PATTERN.split(text) if s.strip()]
+    if estimate_tokens(text) <= budget:
+        return "\n".join(sentences)
+
+    candidates = []
+    for index, sentence in enumerate(sentences):
+        tokens = estimate_tokens(sentence)
+        if tokens == 0 or tokens > budget:
+            continue
+        score = len(CONTEXT_KEYWORDS.findall(sentence.lower())) + 2.0 / (1 + index)
+        candidates.append((score / tokens, index, tokens))
+
+    chosen = []
+    used = 0
+    for _density, index, tokens in sorted(candidates, reverse=True):
+        if used + tokens <= budget:
+            chosen.append(index)
+            used += tokens
+    return "\n".join(sentences[i] for i in sorted(chosen))
+
+
+SECTION_PROMPTS = {
+    'ko': {
+        'climate': """**1. 기후 특성 전문 분석 (Climatology)**
+- 쾨펜-가이거 기후 구분 (정확한 기호 예: Cfa, Dwa, BWh 등)
+- 연평균 기온, 최한월/최난월 평균기온, 연교차, 일교차
+- 연평균 강수량(mm), 계절별 강수 분포, 강수 집중도
+- 주요 기단: 시베리아 기단, 북태평양 고기압, 적도 기단 등의 영향
+- 대기 순환: 편서풍, 무역풍, 몬순, 제트기류
+- 특수 기상 현상: 태풍, 뇌우, 한파, 폭염, 가뭄
+- 기후변화 영향: 기온 상승률, 강수 패턴 변화, 극한 기상 빈도
+- 미기후(microclimate) 특성
+- **반드시 구체적 수치 포함**""",
+        'environment': """**2. 자연 환경 지리학적 분석 (Physical Geography)**
+- 지형: 해발고도(m), 지형 기복, 주요 산맥명, 하천명, 분지/평야
+- 지질: 암석 종류(화강암, 편마암, 석회암 등), 지질 시대, 토양 유형(충적토, 황토, 화산토)
+- 식생: 식물군계(낙엽활엽수림, 침엽수림 등), 주요 수종, 식생대
+- 수문: 연간 강수량, 증발산량, 하천 유량, 지하수위
+- 생태계: 생물다양성, 주요 동식물종, 생태 서비스
+- 자연재해: 홍수, 산사태, 가뭄 위험도
+- **실제 지명과 수치 필수**""",
+        'architecture': """**3. 전통 건축 양식 건축학적 분석 (Architecture)**
+- 건축 양식 명칭과 역사적 시대 배경
+- **건축 재료 상세 분석**:
+  * 목재: 수종(소나무, 참나무, 삼나무 등), 목재 선택 이유, 건조 방법, 내구성
+  * 석재: 암석 종류(화강암, 대리석 등), 채석 위치, 가공 기법, 구조적 특성
+  * 흙/점토: 토양 특성, 벽돌 제조법, 흙벽 구조, 단열 성능
+  * 지붕재: 기와 종류, 초가, 석판, 제조 방식, 배수 시스템
+- **구조 시스템**:
+  * 기초: 초석, 기단, 지내력, 내진 설계
+  * 골조: 목구조(기둥-보 구조), 조적조, 트러스, 접합 방식
+  * 지붕: 형태(맞배, 우진각, 팔작), 경사각, 처마 길이, 하중 분산
+- **공간 구성**: 평면 배치, 동선, 방 구성, 마당/중정, 창호 체계
+- **실제 건축물 최소 7개** (건물명, 건축 연도, 크기, 구조, 특징)
+- 지역별/시대별 변화와 차이점""",
+        'adaptation': """**4. 기후 적응 건축 원리 환경공학적 분석 (Environmental Engineering)**
+- **열환경 제어**:
+  * 일사 조절: 처마 설계, 차양, 남향 배치, 창호 크기
+  * 자연 환기: 베르누이 원리, 온도 차 환기, 풍압 환기, 굴뚝 효과
+  * 단열: 재료별 열전도율(W/m·K), R-value, U-value
+  * 축열/방열: 열용량, 야간 복사냉각
+- **습도 제어**:
+  * 흡습/방습 재료: 목재, 흙, 회반죽의 습기 조절 특성
+  * 결로 방지: 노점온도, 습기 차단층, 환기량
+- **구조 안정성**:
+  * 내진 설계: 유연 구조, 감쇠 메커니즘, 내진 요소
+  * 내풍 설계: 공기역학, 풍압 계수, 저층 설계
+- **우수 처리**: 지붕 경사, 배수로, 빗물 저장
+- **에너지 효율**: 패시브 디자인, 자연 채광, 열교 차단
+- **과학적 원리**: 열역학 법칙, 유체역학, 재료역학 적용
+- 현대 건축에 주는 시사점""",
+        'simple_explanation': """**5. 쉬운 추가 설명 (Simple Explanation)**
+위의 전문 용어들을 **중학생도 이해할 수 있게** 쉽게 풀어서 설명하세요:
+- 쾨펜 기후 구분이 뭔가요?
+- 기단이 날씨에 어떤 영향을 주나요?
+- 목구조와 석조 구조의 차이는?
+- 베르누이 원리로 어떻게 환기가 되나요?
+- 열전도율이 낮다는 게 왜 좋은가요?
+- 내진 설계는 어떻게 지진을 견디나요?
+- 남향 배치가 왜 중요한가요?"""
+    },
+    'en': {
+        'climate': "**1. Climate Analysis (Climatology)** - Köppen classification, temperatures, precipitation, air masses, weather phenomena",
+        'environment': "**2. Natural Environment (Physical Geography)** - Topography, geology, vegetation, hydrology, ecosystems",
+        'architecture': "**3. Traditional Architecture (Architecture)** - Style, materials (wood types, stone, earth), structure, spatial composition, at least 7 building examples",
+        'adaptation': "**4. Climate Adaptation (Environmental Engineering)** - Thermal control, ventilation, insulation, seismic design, water management, scientific principles",
+        'simple_explanation': "**5. Simple Explanation** - Explain technical terms in simple language for students"
+    }
+}
+
+
+def _korean_prompt(region_name, weather_data, context, section_blocks, count):
+    return f"""당신은 세계 최고 수준의 기후학자, 지리학자, 건축학자, 환경공학자입니다.
+다음 지역에 대해 **대학원 수준의 전문적이고 상세한 분석**을 제공하세요.
+
+**분석 대상**: {region_name}
+
+**실시간 기상 데이터**:
+- 현재 기온: {weather_data['temperature']}°C (체감: {weather_data['apparent_temperature']}°C)
+- 일교차: {weather_data['temp_max'] - weather_data['temp_min']}°C (최고: {weather_data['temp_max']}°C, 최저: {weather_data['temp_min']}°C)
+- 상대습도: {weather_data['humidity']}%
+- 풍속: {weather_data['wind_speed']} km/h (풍향: {weather_data.get('wind_direction', 0)}°)
+- 강수량: {weather_data['precipitation']} mm
+- 기압: {weather_data['pressure']} hPa
+- 운량: {weather_data.get('cloud_cover', 0)}%
+- 날씨: {weather_data['weather_description']}
+
+**배경 정보**:
+{context or '정보 없음'}
+
+---
+
+다음 {count}개 섹션을 **각각 최소 400자 이상**, **구체적인 수치, 과학적 용어, 실제 사례**를 포함하여 작성하세요:
+
+{section_blocks}
+
+각 섹션마다 **구체적인 숫자, 전문 용어, 실제 사례**를 반드시 포함하세요."""
+
+
+def _english_prompt(region_name, weather_data, context, section_blocks, count):
+    return f"""You are a world-class climatologist, geographer, architect, and environmental engineer.
+Provide **graduate-level professional and detailed analysis** of the following region.
+
+**Region**: {region_name}
+
+**Real-time Weather Data**:
+- Temperature: {weather_data['temperature']}°C (Feels like: {weather_data['apparent_temperature']}°C)
+- Daily range: {weather_data['temp_max'] - weather_data['temp_min']}°C
+- Humidity: {weather_data['humidity']}%
+- Wind: {weather_data['wind_speed']} km/h (Direction: {weather_data.get('wind_direction', 0)}°)
+- Precipitation: {weather_data['precipitation']} mm
+- Pressure: {weather_data['pressure']} hPa
+
+**Background**:
+{context or 'No information'}
+
+---
+
+Write {count} sections with **at least 400 characters each**, including **specific numbers, scientific terms, real examples**:
+
+{section_blocks}
+
+Include **specific numbers, technical terms, and real examples** in each section."""
+
+
+def build_prompt(region_name, weather_data, wiki_info, language='ko', tier='full',
+                 context_tokens=None, section_tokens=None):
+    """분석 프롬프트와 생성 길이 구성
+
+    section_tokens로 섹션별 출력 예산을 덮어쓸 수 있으며, max_new_tokens는 요청 섹션 예산의 합입니다.
+    반환: {"prompt", "max_new_tokens", "sections"(생성할 섹션 키), "input_tokens"(추정)}
+    """
+    lang = 'ko' if language == 'ko' else 'en'
+    sections = ANALYSIS_TIERS.get(tier, ANALYSIS_TIERS['full'])
+    budget = WIKI_CONTEXT_TOKENS if context_tokens is None else context_tokens
+    context = select_context(wiki_info['full_text'], budget) if wiki_info else ""
+
+    section_blocks = "\n\n".join(SECTION_PROMPTS[lang][key] for key in sections)
+    template = _korean_prompt if lang == 'ko' else _english_prompt
+    prompt = template(region_name, weather_data, context, section_blocks, len(sections))
+
+    budgets = dict(SECTION_OUTPUT_TOKENS[lang], **(section_tokens or {}))
+    return {
+        "prompt": prompt,
+        "max_new_tokens": sum(budgets[key] for key in sections),
+        "sections": list(sections),
+        "input_tokens": estimate_tokens(prompt)
+    }
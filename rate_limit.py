@@ -0,0 +1,65 @@
+"""gunicorn 워커 간 공유 속도 제한 - 공유 SQLite에 다음 호출 가능 시각을 예약"""
+import logging
+import sqlite3
+import time
+
+from cache_store import CACHE_DB_PATH, ensure_schema, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """허용 대기 시간 안에 호출 순서가 돌아오지 않음"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"호출 한도 초과 ({retry_after:.1f}초 뒤 재시도)")
+        self.retry_after = retry_after
+
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            name TEXT PRIMARY KEY,
+            next_at REAL NOT NULL
+        )
+    """)
+
+
+class SharedRateLimiter:
+    """모든 워커를 합쳐 interval초에 한 번만 호출되도록 순서를 예약하고 그때까지 대기"""
+
+    def __init__(self, name, interval, path=CACHE_DB_PATH):
+        self.name = name
+        self.interval = interval
+        self.path = path
+
+    def _reserve(self, max_wait):
+        """호출 시각 예약 후 반환 (max_wait보다 멀면 예약하지 않고 RateLimited)"""
+        conn = get_connection(self.path)
+        ensure_schema(conn, self.path, 'rate_limits', _create_table)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_at FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+            slot = max(now, row[0] if row else 0.0)
+            if slot - now > max_wait:
+                raise RateLimited(slot - now)
+            conn.execute("INSERT OR REPLACE INTO rate_limits (name, next_at) VALUES (?, ?)",
+                         (self.name, slot + self.interval))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return slot
+
+    def acquire(self, max_wait):
+        """호출 순서가 될 때까지 대기 (공유 저장소 오류 시에는 제한 없이 통과)"""
+        try:
+            slot = self._reserve(max_wait)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 속도 제한 저장소 오류 ({self.name}): {e}")
+            return
+        delay = slot - time.time()
+        if delay > 0:
+            time.sleep(delay)
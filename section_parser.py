@@ -0,0 +1,165 @@
+"""AI 분석 텍스트의 섹션 분리 - 번호 붙은 섹션 제목 기준 단일 패스 분류기
+
+전체 응답(parse_ai_response_enhanced)과 토큰 스트림(완성된 섹션부터 전달) 모두
+SectionStreamParser 하나로 처리하며, 섹션 분류와 건축물 예시 추출을 한 번의 순회로 끝냅니다.
+"""
+import re
+
+
+# 프롬프트의 섹션 번호 순서 (1. 기후 … 5. 쉬운 설명)
+SECTION_KEYS = ['climate', 'environment', 'architecture', 'adaptation', 'simple_explanation']
+
+# 번호 붙은 목록(건축물 예시 등)과 구분하기 위해, 굵게/제목 표시가 없으면 섹션 키워드를 요구
+SECTION_KEYWORDS = {
+    'climate': ["기후", "climat", "쾨펜", "köppen"],
+    'environment': ["환경", "environment", "지리", "geograph", "지형"],
+    'architecture': ["건축", "architect"],
+    'adaptation': ["적응", "adaptation", "환경공학", "engineering"],
+    'simple_explanation': ["쉬운", "simple", "설명", "explanation"]
+}
+BUILDING_KEYWORDS = ['palace', 'temple', 'house', 'building', '궁', '사원', '집', '건물', '전각']
+
+HEADER_PATTERN = re.compile(r'^\s*(#{1,6}\s*)?(\*\*)?\s*([1-5])\s*[.)]\s*(.*)$')
+# 섹션별 키워드를 이름 붙은 그룹 하나의 정규식으로 묶어 제목을 한 번만 훑음
+# (re.IGNORECASE는 한글이 섞인 줄에서 느리므로 소문자로 바꾼 줄에 적용)
+SECTION_KEYWORD_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{key}>{'|'.join(re.escape(kw) for kw in kws)})"
+        for key, kws in SECTION_KEYWORDS.items()
+    )
+)
+# 건축물 예시: 목록 기호로 시작하고 건축물 키워드를 포함하는 줄
+LIST_ITEM_PATTERN = re.compile(r'^\s*(?:[-•*]|\d{1,2}[.)])')
+BUILDING_PATTERN = re.compile("|".join(re.escape(kw) for kw in BUILDING_KEYWORDS))
+# 마지막 섹션 뒤에 모델이 덧붙이는 맺음말의 시작 (구분선 또는 6번째 섹션)
+TRAILER_PATTERN = re.compile(r'^\s*((---+|\*\*\*+|___+)\s*$|(#{1,6}\s*)?(\*\*)?\s*6\s*[.)])')
+
+HEADER_MAX_CHARS = 150
+LAST_SECTION_MAX_CHARS = 4000
+EXAMPLE_MIN_CHARS = 15
+EXAMPLE_MAX_CHARS = 250
+
+
+def match_section_header(line, expected):
+    """line이 expected 번호 이후 섹션의 제목이면 섹션 번호(1~5), 아니면 None"""
+    if len(line) > HEADER_MAX_CHARS:
+        return None
+    match = HEADER_PATTERN.match(line)
+    if not match:
+        return None
+    number = int(match.group(3))
+    if number < expected:
+        return None
+    if match.group(1) or match.group(2):
+        return number
+    key = SECTION_KEYS[number - 1]
+    for keyword in SECTION_KEYWORD_PATTERN.finditer(match.group(4).lower()):
+        if keyword.lastgroup == key:
+            return number
+    return None
+
+
+class SectionStreamParser:
+    """생성 텍스트를 조각 단위로 받아 섹션이 닫히는 즉시 (키, 내용) 반환
+
+    섹션 N은 다음 번호의 섹션 제목이 나오면 닫힙니다. 마지막 섹션은 맺음말이 시작되거나
+    LAST_SECTION_MAX_CHARS에 도달하면 닫히며, 이때 complete가 True가 되어 생성을 멈출 수 있습니다.
+    keys로 요청한 섹션만 지정하면 그중 번호가 가장 큰 섹션이 마지막 섹션입니다.
+    닫힌 섹션은 sections, 건축물 예시는 examples에 누적됩니다.
+    """
+
+    def __init__(self, keys=None):
+        self.keys = list(keys or SECTION_KEYS)
+        self._last = max(SECTION_KEYS.index(key) for key in self.keys) + 1
+        self.complete = False
+        self.sections = {}
+        self.examples = []
+        self._chunks = []
+        self._buffer = ""
+        self._current = None
+        self._lines = []
+        self._chars = 0
+
+    @property
+    def text(self):
+        """지금까지 받은 전체 텍스트"""
+        return "".join(self._chunks)
+
+    def feed(self, chunk):
+        """텍스트 조각 추가, 새로 완성된 섹션 목록 반환"""
+        self._chunks.append(chunk)
+        if self.complete:
+            return []
+        if '\n' not in chunk:
+            self._buffer += chunk
+            return []
+
+        *lines, self._buffer = (self._buffer + chunk).split('\n')
+        completed = []
+        for line in lines:
+            completed.extend(self._process_line(line))
+            if self.complete:
+                break
+        return completed
+
+    def close(self):
+        """스트림 종료 - 남은 섹션을 마무리해 반환"""
+        completed = []
+        if self._buffer and not self.complete:
+            completed.extend(self._process_line(self._buffer))
+        self._buffer = ""
+        completed.extend(self._finish_current())
+        self.complete = True
+        return completed
+
+    def _process_line(self, line):
+        number = match_section_header(line, (self._current or 0) + 1)
+        if number is not None:
+            completed = self._finish_current()
+            self._current = number
+            return completed
+
+        if LIST_ITEM_PATTERN.match(line) and BUILDING_PATTERN.search(line.lower()):
+            example = line.strip().strip('- •*1234567890.)')
+            if EXAMPLE_MIN_CHARS < len(example) < EXAMPLE_MAX_CHARS:
+                self.examples.append(example)
+
+        if self._current is None:
+            return []
+        last = self._current == self._last
+        if last and self._lines and TRAILER_PATTERN.match(line):
+            completed = self._finish_current()
+            self.complete = True
+            return completed
+
+        stripped = line.strip()
+        if stripped:
+            self._lines.append(stripped)
+            self._chars += len(stripped)
+        if last and self._chars >= LAST_SECTION_MAX_CHARS:
+            completed = self._finish_current()
+            self.complete = True
+            return completed
+        return []
+
+    def _finish_current(self):
+        if self._current is None:
+            return []
+        key = SECTION_KEYS[self._current - 1]
+        content = "\n".join(self._lines)
+        self._lines = []
+        self._chars = 0
+        if key in self.sections or not content:
+            return []
+        self.sections[key] = content
+        if self._current == self._last and all(k in self.sections for k in self.keys):
+            self.complete = True
+        return [(key, content)]
+
+
+def parse_sections(text, keys=None):
+    """전체 응답을 한 번에 분류, (섹션 dict, 건축물 예시 목록) 반환"""
+    parser = SectionStreamParser(keys)
+    parser.feed(text)
+    parser.close()
+    return parser.sections, parser.examples
@@ -0,0 +1,162 @@
+"""사전 생성 캐시 스냅샷 - 정렬된 해시 색인 + JSON 레코드를 담은 읽기 전용 파일, 메모리 매핑으로 조회
+
+파일 구조: 헤더(매직, 항목 수, 생성 시각) | 색인(키 해시 16바이트, 오프셋, 길이) × 항목 수 (해시 순 정렬) | 레코드
+레코드는 [네임스페이스, 키, 값] JSON입니다. 시작 시에는 헤더만 읽으므로 파일 크기와 관계없이 바로 열리고,
+조회는 색인 이진 탐색 후 레코드 하나만 읽습니다. 페이지 캐시를 공유하므로 워커 수만큼 메모리가 늘지 않습니다.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+import metrics
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'snapshot.bin')
+
+MAGIC = b'CASNAP01'
+HEADER = struct.Struct('<8sQd')
+ENTRY = struct.Struct('<16sQI')
+DIGEST_SIZE = 16
+
+
+class SnapshotError(Exception):
+    """스냅샷 파일 형식 오류"""
+
+
+def entry_digest(namespace, key):
+    return hashlib.sha256(f"{namespace}\0{key}".encode('utf-8')).digest()[:DIGEST_SIZE]
+
+
+class Snapshot:
+    """읽기 전용 스냅샷 (파일이 없거나 형식이 맞지 않으면 모든 조회가 None)"""
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self.count = 0
+        self.created_at = None
+        self._mm = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        try:
+            self._open()
+        except FileNotFoundError:
+            pass
+        except (OSError, SnapshotError) as e:
+            logger.warning(f"⚠️ 스냅샷을 열 수 없습니다 ({path}): {e}")
+            self._mm = None
+            self.count = 0
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise SnapshotError("헤더보다 작은 파일")
+            # 매핑은 파일을 닫아도 유지됨
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, created_at = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError("스냅샷 파일이 아닙니다")
+        if HEADER.size + count * ENTRY.size > size:
+            raise SnapshotError("색인이 잘렸습니다")
+        self.count = count
+        self.created_at = created_at
+        logger.info(f"📀 스냅샷 로드: {self.path} ({count}개 항목, {size / 1024 / 1024:.1f}MB)")
+
+    def _find(self, digest):
+        """색인 이진 탐색 → (오프셋, 길이) 또는 None"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = HEADER.size + mid * ENTRY.size
+            current = self._mm[pos:pos + DIGEST_SIZE]
+            if current < digest:
+                lo = mid + 1
+            elif current > digest:
+                hi = mid
+            else:
+                _, offset, length = ENTRY.unpack_from(self._mm, pos)
+                return offset, length
+        return None
+
+    def _record(self, offset, length):
+        return json.loads(self._mm[offset:offset + length])
+
+    def get(self, namespace, key):
+        """저장된 값, 없으면 None"""
+        if not self.count:
+            return None
+        started = time.perf_counter()
+        value = None
+        found = self._find(entry_digest(namespace, key))
+        if found is not None:
+            record_namespace, record_key, record_value = self._record(*found)
+            if record_namespace == namespace and record_key == key:
+                value = record_value
+        result = 'miss' if value is None else 'hit'
+        metrics.CACHE_LOOKUPS.inc(cache='snapshot', result=result)
+        metrics.record_span('cache', 'snapshot', time.perf_counter() - started, result=result, namespace=namespace)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def items(self):
+        """모든 (네임스페이스, 키, 값) (색인 순서)"""
+        for index in range(self.count):
+            _, offset, length = ENTRY.unpack_from(self._mm, HEADER.size + index * ENTRY.size)
+            yield tuple(self._record(offset, length))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path, "entries": self.count,
+                "bytes": len(self._mm) if self._mm is not None else 0,
+                "created_at": self.created_at, "hits": self._hits, "misses": self._misses
+            }
+
+
+class SnapshotWriter:
+    """항목을 모아 스냅샷 파일로 저장 (같은 키는 나중 값 사용)"""
+
+    def __init__(self):
+        self._records = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, namespace, key, value):
+        record = json.dumps([namespace, key, value], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._records[entry_digest(namespace, key)] = record
+
+    def write(self, path=SNAPSHOT_PATH):
+        """임시 파일에 쓴 뒤 이름 변경 (실행 중인 워커는 이전 파일 매핑을 계속 사용), 파일 크기 반환"""
+        digests = sorted(self._records)
+        offset = HEADER.size + len(digests) * ENTRY.size
+        index = bytearray()
+        for digest in digests:
+            length = len(self._records[digest])
+            index += ENTRY.pack(digest, offset, length)
+            offset += length
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, len(digests), time.time()))
+                f.write(index)
+                for digest in digests:
+                    f.write(self._records[digest])
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return offset
@@ -0,0 +1,174 @@
+"""완료된 AI 분석의 위치 색인 - 가까운 곳을 다시 클릭하면 기존 분석을 재사용
+
+좌표를 위도 CELL_DEG 간격의 격자 칸으로 나눠 메모리에 두고, 반경 안의 칸만 살펴 가장 가까운 분석을 찾습니다.
+색인은 공유 SQLite(cache.db)에 저장되어 재시작 후에도 유지되며, 다른 워커가 추가한 항목은
+SYNC_SECONDS마다 증분(id 기준)으로 가져옵니다.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+import metrics
+from cache_store import CACHE_DB_PATH, ensure_schema, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+# 행정 단위별 재사용 반경 (NEARBY_RADIUS_KM_<LEVEL> 환경변수로 변경 가능, 단위를 모르면 '')
+NEARBY_RADIUS_KM = {'town': 5, 'city': 10, 'county': 20, 'state': 50, '': 5}
+for _level in NEARBY_RADIUS_KM:
+    NEARBY_RADIUS_KM[_level] = float(os.getenv(f'NEARBY_RADIUS_KM_{_level.upper() or "DEFAULT"}',
+                                               NEARBY_RADIUS_KM[_level]))
+CELL_DEG = 0.1
+SYNC_SECONDS = 1.0
+# 가장 가까운 항목의 분석이 캐시에서 사라졌을 때 다음으로 가까운 항목을 확인하는 최대 횟수
+MAX_CANDIDATES = 3
+
+
+def admin_level(value):
+    """요청의 행정 단위 값 정리 (알 수 없는 값은 '')"""
+    return value if value in NEARBY_RADIUS_KM else ''
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """두 좌표 사이 대원 거리(km)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_locations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cache_key TEXT NOT NULL UNIQUE,
+            region TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            language TEXT NOT NULL,
+            tier TEXT NOT NULL,
+            admin_level TEXT NOT NULL,
+            created REAL NOT NULL
+        )
+    """)
+
+
+class SpatialIndex:
+    """(언어, 분석 단계, 행정 단위)별 격자 색인
+
+    항목: (lat, lng, cache_key, region), 칸: (row, col) = 위도 · 경도를 CELL_DEG로 나눈 정수
+    """
+
+    def __init__(self, path=CACHE_DB_PATH):
+        self.path = path
+        self._cells = defaultdict(list)
+        self._size = 0
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = get_connection(self.path)
+        ensure_schema(conn, self.path, 'analysis_locations', _create_table)
+        return conn
+
+    @staticmethod
+    def _cell(lat, lng):
+        return math.floor(lat / CELL_DEG), math.floor(lng / CELL_DEG)
+
+    def _sync(self, force=False):
+        """다른 워커가 추가한 항목까지 메모리 색인에 반영"""
+        now = time.monotonic()
+        if not force and now - self._synced_at < SYNC_SECONDS:
+            return
+        self._synced_at = now
+        try:
+            rows = self._conn().execute(
+                "SELECT id, cache_key, region, lat, lng, language, tier, admin_level "
+                "FROM analysis_locations WHERE id > ? ORDER BY id", (self._last_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 위치 색인 동기화 오류: {e}")
+            return
+        with self._lock:
+            for row_id, cache_key, region, lat, lng, language, tier, level in rows:
+                if row_id <= self._last_id:
+                    continue
+                self._cells[(language, tier, level) + self._cell(lat, lng)].append((lat, lng, cache_key, region))
+                self._size += 1
+                self._last_id = row_id
+
+    def add(self, cache_key, region, lat, lng, language, tier, level):
+        """완료된 분석 위치 등록 (같은 캐시 키는 한 번만)"""
+        try:
+            self._conn().execute(
+                "INSERT OR IGNORE INTO analysis_locations "
+                "(cache_key, region, lat, lng, language, tier, admin_level, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, region, lat, lng, language, tier, level, time.time())
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 위치 색인 저장 오류: {e}")
+            return
+        self._sync(force=True)
+
+    def remove(self, cache_key):
+        """분석이 캐시에서 사라진 항목 제거"""
+        with self._lock:
+            for key, entries in self._cells.items():
+                kept = [entry for entry in entries if entry[2] != cache_key]
+                if len(kept) != len(entries):
+                    self._cells[key] = kept
+                    self._size -= len(entries) - len(kept)
+        try:
+            self._conn().execute("DELETE FROM analysis_locations WHERE cache_key = ?", (cache_key,))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 위치 색인 삭제 오류: {e}")
+
+    def nearby(self, lat, lng, language, tier, level, radius_km=None):
+        """반경 안의 항목을 가까운 순으로 [(거리 km, cache_key, region), ...]"""
+        self._sync()
+        radius_km = NEARBY_RADIUS_KM[level] if radius_km is None else radius_km
+        row, col = self._cell(lat, lng)
+        rows = math.ceil(radius_km / KM_PER_DEG_LAT / CELL_DEG)
+        # 고위도에서는 경도 1도의 거리가 짧아 더 많은 칸을 살핌
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + rows * CELL_DEG, 89.9))), 0.01)
+        cols = min(math.ceil(radius_km / (KM_PER_DEG_LAT * cos_lat) / CELL_DEG), int(180 / CELL_DEG))
+
+        found = []
+        with self._lock:
+            for r in range(row - rows, row + rows + 1):
+                for c in range(col - cols, col + cols + 1):
+                    for entry_lat, entry_lng, cache_key, region in self._cells.get((language, tier, level, r, c), ()):
+                        distance = haversine_km(lat, lng, entry_lat, entry_lng)
+                        if distance <= radius_km:
+                            found.append((distance, cache_key, region))
+        found.sort()
+        return found
+
+    def stats(self):
+        with self._lock:
+            return {"entries": self._size, "cells": sum(1 for entries in self._cells.values() if entries)}
+
+
+def find_reusable(index, cache, lat, lng, language, tier, level):
+    """반경 안에서 가장 가까운, 캐시에 남아 있는 분석 (값, 거리 km, 지역) 또는 None"""
+    started = time.perf_counter()
+    result = None
+    for distance, cache_key, region in index.nearby(lat, lng, language, tier, level)[:MAX_CANDIDATES]:
+        value = cache.get(cache_key)
+        if value is not None:
+            result = (value, distance, region)
+            break
+        index.remove(cache_key)
+    outcome = 'hit' if result else 'miss'
+    metrics.CACHE_LOOKUPS.inc(cache='nearby', result=outcome)
+    metrics.record_span('cache', 'nearby', time.perf_counter() - started, result=outcome)
+    return result
@@ -0,0 +1,16 @@
+"""테스트 공통 설정 - 저장소 루트의 모듈을 바로 import하고, 테스트 사이에 요청 마감이 남지 않도록 정리"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import deadline  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_deadline():
+    deadline.clear()
+    yield
+    deadline.clear()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import AdmissionController, Overloaded
+
+
+def wait_until(predicate, timeout=2.0):
+    give_up = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > give_up:
+            raise AssertionError("조건이 시간 안에 충족되지 않음")
+        time.sleep(0.005)
+
+
+def enqueue(controller, client, label, order, threads):
+    """대기열에 들어갈 때까지 기다려 대기 순서를 고정하고, 자리를 얻으면 기록 후 바로 반납"""
+    waiting = controller.stats()['waiting']
+
+    def run():
+        controller.acquire(client, timeout=5)
+        order.append(label)
+        controller.release(client, 0.01)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    threads.append(thread)
+    wait_until(lambda: controller.stats()['waiting'] == waiting + 1)
+
+
+def test_waiting_clients_are_served_round_robin():
+    controller = AdmissionController('test', limit=1, queue_max=8, per_client=1)
+    controller.acquire('holder', timeout=0)
+    order, threads = [], []
+    for label in ('a1', 'a2', 'a3'):
+        enqueue(controller, 'a', label, order, threads)
+    enqueue(controller, 'b', 'b1', order, threads)
+
+    controller.release('holder', 0.01)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # 먼저 몰아서 보낸 클라이언트 a가 b를 뒤로 밀어내지 않음
+    assert order == ['a1', 'b1', 'a2', 'a3']
+
+
+def test_per_client_limit_lets_other_clients_run():
+    controller = AdmissionController('test', limit=3, queue_max=8, per_client=1)
+    controller.acquire('a', timeout=0)
+
+    with pytest.raises(Overloaded):
+        controller.acquire('a', timeout=0.05)
+    controller.acquire('b', timeout=0)
+    assert controller.stats()['running'] == 2
+
+
+def test_queue_full_is_rejected_immediately():
+    controller = AdmissionController('test', limit=1, queue_max=0, per_client=1)
+    controller.acquire('a', timeout=0)
+
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire('b', timeout=5)
+
+    assert time.monotonic() - started < 1
+    assert excinfo.value.retry_after >= 1
+    assert controller.stats()['waiting'] == 0
+
+
+def test_wait_timeout_removes_the_waiter():
+    controller = AdmissionController('test', limit=1, queue_max=4, per_client=1)
+    controller.acquire('a', timeout=0)
+
+    with pytest.raises(Overloaded):
+        controller.acquire('b', timeout=0.05)
+
+    assert controller.stats()['waiting'] == 0
+    assert controller.stats()['clients_waiting'] == 0
+    controller.release('a', 0.01)
+    controller.acquire('b', timeout=0)
+
+
+def test_slot_releases_on_error():
+    controller = AdmissionController('test', limit=1, queue_max=1, per_client=1)
+
+    with pytest.raises(RuntimeError):
+        with controller.slot(timeout=0):
+            raise RuntimeError('boom')
+
+    assert controller.stats()['running'] == 0
+
+
+def test_client_id_uses_forwarded_for_only_when_trusted(monkeypatch):
+    monkeypatch.setattr(admission, 'TRUST_FORWARDED', False)
+    assert admission.client_id('10.0.0.1', '203.0.113.5') == '10.0.0.1'
+    monkeypatch.setattr(admission, 'TRUST_FORWARDED', True)
+    assert admission.client_id('10.0.0.1', '203.0.113.5, 10.0.0.1') == '203.0.113.5'
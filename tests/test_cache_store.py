@@ -0,0 +1,110 @@
+import pytest
+
+import cache_store
+from cache_store import SQLiteCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_store.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'cache.db')
+
+
+def test_value_expires_after_ttl(db_path, clock):
+    cache = SQLiteCache('weather', ttl=60, path=db_path)
+    cache.set('seoul', {"temperature": 20})
+
+    clock.now += 59
+    assert cache.get('seoul') == {"temperature": 20}
+    clock.now += 2
+    assert cache.get('seoul') is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_per_entry_ttl_overrides_default(db_path, clock):
+    cache = SQLiteCache('weather', ttl=60, path=db_path)
+    cache.set('short', 1, ttl=5)
+
+    clock.now += 10
+    assert cache.get('short') is None
+
+
+def test_revalidate_cache_keeps_stale_entry_until_touched(db_path, clock):
+    cache = SQLiteCache('wikipedia', ttl=60, path=db_path, revalidate=True)
+    cache.set('Seoul', {"etag": '"v1"', "summary": "..."})
+
+    clock.now += 120
+    # 만료된 값은 get에서는 없는 것으로, get_entry에서는 재검증용으로 반환
+    assert cache.get('Seoul') is None
+    entry = cache.get_entry('Seoul')
+    assert entry['fresh'] is False
+    assert entry['value']['etag'] == '"v1"'
+
+    # 304 응답을 받은 경우처럼 만료 시각만 연장
+    cache.touch('Seoul')
+    entry = cache.get_entry('Seoul')
+    assert entry['fresh'] is True
+    assert entry['created'] == clock.now
+
+    stats = cache.stats()
+    assert stats['stale'] == 2
+    assert stats['hits'] == 1
+
+
+def test_expired_entry_is_dropped_without_revalidate(db_path, clock):
+    cache = SQLiteCache('weather', ttl=60, path=db_path)
+    cache.set('k', 'v')
+
+    clock.now += 61
+    assert cache.get_entry('k') is None
+
+
+def test_invalidate_removes_tagged_entries_only(db_path, clock):
+    cache = SQLiteCache('analysis', ttl=60, path=db_path)
+    cache.set('a1', 1, tag='seoul')
+    cache.set('a2', 2, tag='seoul')
+    cache.set('b1', 3, tag='busan')
+
+    assert cache.invalidate('seoul') == 2
+    assert cache.get('a1') is None
+    assert cache.get('b1') == 3
+
+
+def test_lru_eviction_keeps_recently_used_entries(db_path, clock):
+    cache = SQLiteCache('wikipedia', ttl=600, path=db_path, max_bytes=30)
+    cache.set('old', 'x' * 10)
+    clock.now += 1
+    cache.set('recent', 'y' * 10)
+    clock.now += 1
+    cache.get('old')
+    clock.now += 1
+    # 용량을 넘으면 가장 오래 사용되지 않은 'recent'부터 제거
+    cache.set('new', 'z' * 10)
+
+    assert cache.get('recent') is None
+    assert cache.get('old') == 'x' * 10
+    assert cache.get('new') == 'z' * 10
+    assert cache.stats()['evictions'] == 1
+
+
+def test_namespaces_share_the_file_but_not_keys(db_path, clock):
+    weather = SQLiteCache('weather', ttl=60, path=db_path)
+    wiki = SQLiteCache('wikipedia', ttl=60, path=db_path)
+    weather.set('seoul', 'sunny')
+
+    assert wiki.get('seoul') is None
+    assert weather.get('seoul') == 'sunny'
@@ -0,0 +1,111 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpen
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    monkeypatch.setattr(circuit_breaker, 'MIN_CALLS', 4)
+    monkeypatch.setattr(circuit_breaker, 'FAILURE_RATE', 0.5)
+    monkeypatch.setattr(circuit_breaker, 'OPEN_SECONDS', 30)
+    monkeypatch.setattr(circuit_breaker, 'PROBES', 2)
+    return clock
+
+
+def call(breaker, failed=False, duration=0.1):
+    breaker.before_call()
+    breaker.record(failed, duration)
+
+
+def open_breaker(breaker):
+    for failed in (True, True, False, False):
+        call(breaker, failed)
+    assert breaker.state == 'open'
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = CircuitBreaker('wikipedia', slow_seconds=5)
+    for _ in range(3):
+        call(breaker, failed=True)
+
+    assert breaker.state == 'closed'
+
+
+def test_opens_on_failure_rate_and_rejects_immediately(clock):
+    breaker = CircuitBreaker('wikipedia', slow_seconds=5)
+    open_breaker(breaker)
+
+    clock.now += 10
+    with pytest.raises(CircuitOpen) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_in == pytest.approx(20)
+
+
+def test_opens_on_slow_calls(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'SLOW_RATE', 0.75)
+    breaker = CircuitBreaker('commons', slow_seconds=1)
+    for duration in (2, 2, 2, 0.1):
+        call(breaker, duration=duration)
+
+    assert breaker.state == 'open'
+
+
+def test_half_open_after_open_seconds_allows_limited_probes(clock):
+    breaker = CircuitBreaker('wikipedia', slow_seconds=5)
+    open_breaker(breaker)
+
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == 'half_open'
+    breaker.before_call()
+    # PROBES개를 넘는 시험 호출은 거절
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_successful_probes_close_the_circuit(clock):
+    breaker = CircuitBreaker('wikipedia', slow_seconds=5)
+    open_breaker(breaker)
+    clock.now += 30
+
+    call(breaker)
+    assert breaker.state == 'half_open'
+    call(breaker)
+    assert breaker.state == 'closed'
+    assert breaker.snapshot()['calls'] == 0
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker('wikipedia', slow_seconds=5)
+    open_breaker(breaker)
+    clock.now += 30
+
+    call(breaker, failed=True)
+
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_release_returns_an_undecided_probe(clock):
+    breaker = CircuitBreaker('wikipedia', slow_seconds=5)
+    open_breaker(breaker)
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.before_call()
+    breaker.release()
+    # 반납한 자리로 다시 시험 호출 가능
+    breaker.before_call()
+    assert breaker.state == 'half_open'
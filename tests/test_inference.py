@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+import deadline
+import inference
+from inference import InferenceBackend, MicroBatcher
+
+
+class RecordingBackend(InferenceBackend):
+    name = 'recording'
+    supports_batch = True
+
+    def __init__(self, latency=0.0, error=None):
+        self.latency = latency
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompts, parameters, max_wait):
+        with self._lock:
+            self.calls.append(list(prompts))
+        time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return [f"out:{prompt}" for prompt in prompts]
+
+    def stream(self, prompt, parameters, max_wait):
+        raise NotImplementedError
+
+
+def run_concurrently(batcher, requests, stagger=0.01):
+    """(프롬프트, 생성 설정, 마감 초) 목록을 동시에 호출해 요청 순서대로 (결과 또는 예외) 반환"""
+    results = [None] * len(requests)
+
+    def call(index, prompt, parameters, seconds):
+        if seconds is not None:
+            deadline.start(seconds)
+        try:
+            results[index] = batcher.generate(prompt, parameters, 1)
+        except Exception as e:
+            results[index] = e
+
+    threads = []
+    for index, (prompt, parameters, seconds) in enumerate(requests):
+        thread = threading.Thread(target=call, args=(index, prompt, parameters, seconds))
+        thread.start()
+        threads.append(thread)
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_concurrent_prompts_share_one_backend_call():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_size=8, window_ms=200)
+
+    results = run_concurrently(batcher, [(f"p{i}", {}, None) for i in range(3)])
+
+    assert results == ['out:p0', 'out:p1', 'out:p2']
+    assert backend.calls == [['p0', 'p1', 'p2']]
+
+
+def test_identical_prompts_are_generated_once():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_size=8, window_ms=200)
+
+    results = run_concurrently(batcher, [('same', {}, None), ('other', {}, None), ('same', {}, None)])
+
+    assert results == ['out:same', 'out:other', 'out:same']
+    assert backend.calls == [['same', 'other']]
+    stats = batcher.stats()
+    assert stats['deduplicated'] == 1
+    assert stats['prompts'] == 2
+
+
+def test_different_parameters_are_not_batched_together():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_size=8, window_ms=200)
+
+    run_concurrently(batcher, [('a', {"max_new_tokens": 10}, None), ('b', {"max_new_tokens": 20}, None)])
+
+    assert sorted(backend.calls) == [['a'], ['b']]
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_size=2, window_ms=5000)
+
+    started = time.monotonic()
+    results = run_concurrently(batcher, [('a', {}, None), ('b', {}, None)])
+
+    assert results == ['out:a', 'out:b']
+    assert time.monotonic() - started < 2
+
+
+def test_backend_error_reaches_every_caller():
+    backend = RecordingBackend(error=RuntimeError('upstream down'))
+    batcher = MicroBatcher(backend, max_size=8, window_ms=200)
+
+    results = run_concurrently(batcher, [('a', {}, None), ('b', {}, None)])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(backend.calls) == 1
+
+
+def test_each_caller_waits_only_until_its_own_deadline():
+    backend = RecordingBackend(latency=0.5)
+    batcher = MicroBatcher(backend, max_size=8, window_ms=100)
+
+    # 첫 호출자의 마감이 먼저 지나도 배치는 가장 늦은 마감으로 보내져 두 번째 호출자는 결과를 받음
+    leader, follower = run_concurrently(batcher, [('a', {}, 0.2), ('b', {}, 5)])
+
+    assert isinstance(leader, deadline.DeadlineExceeded)
+    assert follower == 'out:b'
+    assert backend.calls == [['a', 'b']]
+
+
+def test_batching_disabled_sends_each_prompt_alone():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_size=1, window_ms=200)
+
+    assert not batcher.enabled
+    assert batcher.generate('a', {}, 1) == 'out:a'
+    assert backend.calls == [['a']]
+
+
+@pytest.mark.parametrize('configured, expected', [(0, 4), (2, 2), (8, 4)])
+def test_batch_max_size_never_exceeds_admission_limit(configured, expected):
+    assert inference.batch_max_size(4, configured) == expected
+
+
+def test_parse_generations_checks_batch_size():
+    assert inference.parse_generations([{"generated_text": "x"}], 1) == ['x']
+    assert inference.parse_generations([[{"generated_text": "a"}], {"generated_text": "b"}], 2) == ['a', 'b']
+    with pytest.raises(ValueError):
+        inference.parse_generations([{"generated_text": "a"}], 2)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+import deadline
+from pipeline import StagePipeline
+
+
+def test_stages_receive_dependency_results():
+    pipeline = StagePipeline()
+    pipeline.add_stage('weather', lambda: 20)
+    pipeline.add_stage('wiki', lambda: 'summary')
+    pipeline.add_stage('analysis', lambda weather, wiki: f"{wiki}:{weather}", depends_on=('weather', 'wiki'))
+
+    results, timings = pipeline.run()
+
+    assert results == {'weather': 20, 'wiki': 'summary', 'analysis': 'summary:20'}
+    assert timings['critical_path'][-1] == 'analysis'
+    assert timings['incomplete'] == []
+
+
+def test_independent_stages_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=2)
+    pipeline = StagePipeline()
+    # 둘 중 하나라도 순차 실행되면 Barrier가 시간 초과로 실패
+    pipeline.add_stage('a', barrier.wait)
+    pipeline.add_stage('b', barrier.wait)
+
+    results, _ = pipeline.run()
+
+    assert set(results) == {'a', 'b'}
+
+
+def test_on_stage_done_is_called_per_stage():
+    done = []
+    pipeline = StagePipeline()
+    pipeline.add_stage('a', lambda: 1)
+    pipeline.add_stage('b', lambda a: a + 1, depends_on=('a',))
+
+    pipeline.run(lambda name, value: done.append((name, value)))
+
+    assert done == [('a', 1), ('b', 2)]
+
+
+def test_unknown_dependency_and_duplicate_stage_are_rejected():
+    pipeline = StagePipeline()
+    pipeline.add_stage('a', lambda: 1)
+    with pytest.raises(ValueError):
+        pipeline.add_stage('a', lambda: 2)
+    with pytest.raises(ValueError):
+        pipeline.add_stage('b', lambda c: c, depends_on=('c',))
+
+
+def test_stage_error_propagates():
+    def fail():
+        raise RuntimeError('boom')
+
+    pipeline = StagePipeline()
+    pipeline.add_stage('a', fail)
+
+    with pytest.raises(RuntimeError, match='boom'):
+        pipeline.run()
+
+
+def test_deadline_returns_completed_stages_only():
+    release = threading.Event()
+    pipeline = StagePipeline()
+    pipeline.add_stage('fast', lambda: 'ok')
+    pipeline.add_stage('slow', lambda: release.wait(5))
+    deadline.start(0.2)
+
+    started = time.monotonic()
+    results, timings = pipeline.run()
+    release.set()
+
+    assert time.monotonic() - started < 2
+    assert results == {'fast': 'ok'}
+    assert timings['incomplete'] == ['slow']
@@ -0,0 +1,99 @@
+from section_parser import SECTION_KEYS, SectionStreamParser, parse_sections
+
+
+def section(number, title, body):
+    return f"**{number}. {title}**\n{body}\n\n"
+
+
+FULL_TEXT = (
+    section(1, "기후 특성 (Climatology)", "- 연평균 기온 12°C")
+    + section(2, "자연 환경 (Physical Geography)", "- 한강 유역의 평야")
+    + section(3, "전통 건축 양식 (Architecture)", "- 경복궁 근정전 (palace) 중층 팔작지붕 건물")
+    + section(4, "기후 적응 건축 원리 (Environmental Engineering)", "- 온돌과 대청")
+    + section(5, "쉬운 추가 설명 (Simple Explanation)", "- 겨울엔 따뜻하게, 여름엔 시원하게")
+)
+
+
+def feed_in_chunks(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+def test_section_closes_only_when_next_header_arrives():
+    parser = SectionStreamParser()
+
+    assert parser.feed(section(1, "기후 특성", "- 온대 기후")) == []
+    completed = parser.feed("**2. 자연 환경**\n")
+
+    assert completed == [('climate', '- 온대 기후')]
+    assert not parser.complete
+
+
+def test_partial_stream_keeps_closed_sections_only():
+    # 생성 도중 끊긴 스트림: 3번 섹션이 열린 채로 끝남
+    cut = FULL_TEXT.index("- 경복궁")
+    parser = SectionStreamParser()
+
+    completed = feed_in_chunks(parser, FULL_TEXT[:cut], 7)
+
+    assert [key for key, _ in completed] == ['climate', 'environment']
+    assert set(parser.sections) == {'climate', 'environment'}
+    assert not parser.complete
+
+
+def test_chunk_boundaries_do_not_change_the_result():
+    expected, expected_examples = parse_sections(FULL_TEXT)
+    for size in (1, 3, 16, 64):
+        parser = SectionStreamParser()
+        feed_in_chunks(parser, FULL_TEXT, size)
+        parser.close()
+        assert parser.sections == expected
+        assert parser.examples == expected_examples
+    assert list(expected) == SECTION_KEYS
+
+
+def test_trailer_after_last_section_stops_early():
+    parser = SectionStreamParser()
+
+    completed = parser.feed(FULL_TEXT + "---\n맺음말: 더 궁금한 점이 있으면 물어보세요.\n")
+
+    assert completed[-1][0] == 'simple_explanation'
+    assert parser.complete
+    assert '맺음말' not in parser.sections['simple_explanation']
+    # 완료 뒤에 도착한 조각은 무시
+    assert parser.feed("**6. 추가**\n") == []
+
+
+def test_requested_keys_complete_after_last_requested_section():
+    parser = SectionStreamParser(['climate', 'simple_explanation'])
+
+    parser.feed(section(1, "기후 특성", "- 온대") + section(5, "쉬운 설명", "- 사계절") + "**6. 맺음말**\n")
+
+    assert parser.complete
+    assert set(parser.sections) == {'climate', 'simple_explanation'}
+
+
+def test_numbered_list_inside_section_is_not_a_header():
+    text = section(1, "기후 특성", "2. 여름철 강수 집중\n3. 겨울철 건조") + "**2. 자연 환경**\n- 산지\n"
+    sections, _ = parse_sections(text)
+
+    assert sections['climate'] == "2. 여름철 강수 집중\n3. 겨울철 건조"
+    assert sections['environment'] == "- 산지"
+
+
+def test_building_examples_are_collected_from_list_items():
+    _, examples = parse_sections(FULL_TEXT)
+
+    assert examples == ["경복궁 근정전 (palace) 중층 팔작지붕 건물"]
+
+
+def test_close_flushes_unterminated_last_line():
+    parser = SectionStreamParser()
+    parser.feed(section(1, "기후 특성", "- 온대") + "**2. 자연 환경**\n- 줄바꿈 없이 끝난 마지막 줄")
+
+    completed = parser.close()
+
+    assert completed == [('environment', '- 줄바꿈 없이 끝난 마지막 줄')]
+    assert parser.complete